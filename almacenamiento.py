@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Almacenamiento de facturas y comprobantes por contenido
+
+Cada archivo se guarda una sola vez bajo su SHA-256 en
+<UPLOADS_PATH>/blobs/ab/abcdef..., y en la base se guarda la clave relativa
+("blobs/ab/abcdef..."), no la ruta absoluta: mover la carpeta de datos no
+rompe nada. La tabla adjuntos lleva la cuenta de cuántos pagos usan cada
+archivo; se borra del disco cuando ya nadie lo referencia.
+
+Las escrituras son atómicas: el archivo se escribe en tmp/ mientras se
+calcula el hash y después se renombra a su lugar final, con el lock de
+escritura de SQLite tomado. Los borrados se hacen recién después del commit
+que deja un blob sin referencias, y antes de borrar se vuelve a tomar el lock
+y se verifica que nadie lo haya subido de nuevo, así una subida y un borrado
+del mismo contenido no se pisan. Si la transacción de una subida se revierte
+después del renombre, el blob queda huérfano hasta el próximo --limpiar.
+
+Los pagos viejos que todavía tienen rutas absolutas (uploads/invoices/...)
+se siguen sirviendo; `python almacenamiento.py --migrar` los pasa al
+almacenamiento por contenido.
+
+Usage:
+    python almacenamiento.py --migrar   # Mueve los adjuntos viejos a blobs/
+    python almacenamiento.py --limpiar  # Borra blobs sin referencias y temporales viejos
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import time
+import database
+import miniaturas
+
+UPLOADS_PATH = os.environ.get(
+    'UPLOADS_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+)
+
+# Bytes leídos por vez al copiar un archivo
+CHUNK_SIZE = 64 * 1024
+
+# Segundos tras los cuales un temporal se da por abandonado (la subida se cortó)
+TMP_ABANDONADO = 24 * 60 * 60
+
+
+class Almacenamiento:
+    """Blobs direccionados por contenido con conteo de referencias en la base"""
+
+    def __init__(self, raiz=None):
+        self.raiz = raiz or UPLOADS_PATH
+        self.tmp = os.path.join(self.raiz, 'tmp')
+
+    def ruta(self, clave):
+        """Ruta en disco de una clave (las rutas absolutas viejas se devuelven tal cual)"""
+        if os.path.isabs(clave):
+            return clave
+        return os.path.join(self.raiz, *clave.split('/'))
+
+    def temporal(self):
+        """Archivo temporal abierto para escritura dentro de la raíz (mismo disco que blobs/)"""
+        os.makedirs(self.tmp, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=self.tmp, delete=False)
+
+    def escribir_temporal(self, stream):
+        """
+        Copia `stream` a un archivo temporal calculando el hash
+
+        Returns:
+            (ruta_temporal, digest_hex, tamaño)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        with self.temporal() as tmp:
+            try:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            except BaseException:
+                tmp.close()
+                os.remove(tmp.name)
+                raise
+        return tmp.name, digest.hexdigest(), size
+
+    def confirmar(self, db, ruta_temporal, digest, size):
+        """
+        Mueve un temporal ya hasheado a su blob y suma una referencia
+
+        Deja abierta la transacción de `db`: el llamador hace commit junto con
+        el UPDATE de pagos que guarda la clave.
+
+        Returns:
+            Clave relativa del blob
+        """
+        clave = f'blobs/{digest[:2]}/{digest}'
+
+        # Tomar el lock de escritura antes de tocar el disco
+        db.execute('''
+            INSERT INTO adjuntos (clave, referencias, size)
+            VALUES (?, 1, ?)
+            ON CONFLICT (clave) DO UPDATE SET referencias = referencias + 1
+        ''', (clave, size))
+
+        destino = self.ruta(clave)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        # Si ya existe tiene el mismo contenido: reemplazarlo es inofensivo
+        os.replace(ruta_temporal, destino)
+        return clave
+
+    def guardar(self, db, stream):
+        """
+        Guarda el contenido de `stream` (deduplicado) y suma una referencia
+
+        Returns:
+            (clave, tamaño); la transacción de `db` queda abierta
+        """
+        ruta_temporal, digest, size = self.escribir_temporal(stream)
+        try:
+            return self.confirmar(db, ruta_temporal, digest, size), size
+        except BaseException:
+            if os.path.exists(ruta_temporal):
+                os.remove(ruta_temporal)
+            raise
+
+    def liberar(self, db, clave):
+        """
+        Resta una referencia; si era la última el blob deja de estar registrado
+
+        No toca el disco: deja abierta la transacción de `db` y el llamador,
+        después del commit, le pasa a borrar() las claves devueltas. Los
+        archivos con ruta absoluta (anteriores a este almacenamiento) no
+        tienen referencias y se devuelven siempre.
+
+        Returns:
+            Lista de claves a borrar del disco (vacía si el blob se sigue usando)
+        """
+        if os.path.isabs(clave):
+            return [clave]
+
+        db.execute('UPDATE adjuntos SET referencias = referencias - 1 WHERE clave = ?', (clave,))
+        fila = db.execute('SELECT referencias FROM adjuntos WHERE clave = ?', (clave,)).fetchone()
+        if fila is None or fila['referencias'] <= 0:
+            db.execute('DELETE FROM adjuntos WHERE clave = ?', (clave,))
+            return [clave]
+        return []
+
+    def borrar(self, db, claves):
+        """
+        Borra del disco los blobs (y sus miniaturas) que liberar() dejó sin referencias
+
+        Se llama fuera de una transacción: cada blob se borra con el lock de
+        escritura tomado y solo si no se volvió a subir entre el commit y acá.
+        """
+        for clave in claves:
+            if os.path.isabs(clave):
+                self._borrar_archivo(clave)
+                continue
+
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                if db.execute('SELECT 1 FROM adjuntos WHERE clave = ?', (clave,)).fetchone() is None:
+                    self._borrar_archivo(self.ruta(clave))
+            finally:
+                db.rollback()
+
+    def _borrar_archivo(self, ruta):
+        if os.path.exists(ruta):
+            os.remove(ruta)
+        miniaturas.borrar(ruta)
+
+    def limpiar(self, db):
+        """
+        Borra los blobs que no figuran en la tabla adjuntos y los temporales abandonados
+
+        Los blobs huérfanos quedan cuando una transacción se revierte después
+        de confirmar() o el proceso se corta antes de borrar().
+
+        Returns:
+            (blobs, temporales): cantidad de archivos borrados de cada tipo
+        """
+        blobs_dir = os.path.join(self.raiz, 'blobs')
+        en_disco = set()
+        for _, _, archivos in os.walk(blobs_dir):
+            for nombre in archivos:
+                # Blobs y sus miniaturas; los temporales de miniaturas.generar() no
+                digest = nombre.removesuffix(miniaturas.SUFIJO)
+                if len(digest) == 64 and not digest.strip('0123456789abcdef'):
+                    en_disco.add(f'blobs/{digest[:2]}/{digest}')
+
+        registradas = {fila[0] for fila in db.execute('SELECT clave FROM adjuntos')}
+        huerfanas = sorted(en_disco - registradas)
+        self.borrar(db, huerfanas)
+
+        temporales = 0
+        limite = time.time() - TMP_ABANDONADO
+        if os.path.isdir(self.tmp):
+            for entrada in os.scandir(self.tmp):
+                if entrada.is_file() and entrada.stat().st_mtime < limite:
+                    os.remove(entrada.path)
+                    temporales += 1
+
+        return len(huerfanas), temporales
+
+
+def migrar_rutas_absolutas(db, almacenamiento=None):
+    """
+    Pasa los adjuntos guardados con ruta absoluta al almacenamiento por contenido
+
+    Returns:
+        (migrados, faltantes): archivos movidos y rutas que ya no existían
+    """
+    almacenamiento = almacenamiento or Almacenamiento()
+    migrados = 0
+    faltantes = []
+
+    for prefix in ('invoice', 'bill'):
+        filas = db.execute(f'''
+            SELECT id, {prefix}_path as ruta FROM pagos
+            WHERE {prefix}_path IS NOT NULL
+        ''').fetchall()
+
+        for fila in filas:
+            if not os.path.isabs(fila['ruta']):
+                continue
+            if not os.path.exists(fila['ruta']):
+                faltantes.append(fila['ruta'])
+                continue
+
+            with open(fila['ruta'], 'rb') as archivo:
+                clave, size = almacenamiento.guardar(db, archivo)
+            db.execute(f'UPDATE pagos SET {prefix}_path = ?, {prefix}_size = ? WHERE id = ?',
+                       (clave, size, fila['id']))
+            db.commit()
+            os.remove(fila['ruta'])
+            miniaturas.borrar(fila['ruta'])
+            migrados += 1
+
+    return migrados, faltantes
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    if '--migrar' not in argv and '--limpiar' not in argv:
+        print(__doc__)
+        return 0
+
+    import migrations
+
+    print(f"Base de datos: {database.DATABASE_PATH}")
+    print(f"Adjuntos: {UPLOADS_PATH}")
+    db = database.connect()
+    try:
+        migrations.migrate(db)
+        if '--migrar' in argv:
+            migrados, faltantes = migrar_rutas_absolutas(db)
+            print(f"   ✓ {migrados} archivos movidos a blobs/")
+            for ruta in faltantes:
+                print(f"   ✗ No existe: {ruta}")
+        if '--limpiar' in argv:
+            blobs, temporales = Almacenamiento().limpiar(db)
+            print(f"   ✓ {blobs} blobs sin referencias y {temporales} temporales borrados")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
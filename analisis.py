@@ -0,0 +1,188 @@
+"""
+Análisis de gastos por mes para Billetera Mata Galán
+
+Los totales por categoría, servicio y medio de pago salen de pagos_resumen y
+pagos_resumen_metodo (una fila por usuario, período y servicio o medio,
+mantenidas por triggers), así que cinco años de gráfico son unas pocas miles
+de filas leídas por clave, nunca un recorrido de pagos. Igual que el
+dashboard, el resultado se cachea por versión de datos del usuario.
+"""
+
+import os
+from datetime import datetime
+import pronostico
+from cache import LRUCache
+from dashboard_data import obtener_dashboard_cacheado
+
+# Cantidades de períodos que ofrece la página
+OPCIONES_PERIODOS = (6, 12, 24, 36, 60)
+PERIODOS_DEFECTO = 12
+
+# Períodos anteriores al actual con los que se compara el pronóstico
+PERIODOS_PROMEDIO = 3
+
+# Lo pagado por servicio en el rango, con su categoría actual
+SERVICIOS_QUERY = '''
+    SELECT r.periodo, r.servicio_id, r.total, r.cantidad,
+           s.nombre as servicio_nombre, s.categoria_id,
+           c.nombre as categoria_nombre, c.color as categoria_color
+    FROM pagos_resumen r
+    JOIN servicios s ON s.id = r.servicio_id
+    LEFT JOIN categorias c ON c.id = s.categoria_id
+    WHERE r.user_id = ? AND r.periodo BETWEEN ? AND ?
+'''
+
+METODOS_QUERY = '''
+    SELECT periodo, metodo_pago, total, cantidad
+    FROM pagos_resumen_metodo
+    WHERE user_id = ? AND periodo BETWEEN ? AND ?
+'''
+
+_analisis_cache = LRUCache(maxsize=int(os.environ.get('ANALISIS_CACHE_SIZE', 128)))
+
+
+def periodo_valido(periodo):
+    """True si `periodo` tiene la forma 'YYYY-MM'"""
+    try:
+        datetime.strptime(periodo, '%Y-%m')
+        return len(periodo) == 7
+    except (TypeError, ValueError):
+        return False
+
+
+def lista_periodos(hasta, cantidad):
+    """Los `cantidad` períodos 'YYYY-MM' consecutivos que terminan en `hasta`"""
+    anio, mes = map(int, hasta.split('-'))
+    indice = anio * 12 + mes - 1
+    return [
+        f'{i // 12:04d}-{i % 12 + 1:02d}'
+        for i in range(indice - cantidad + 1, indice + 1)
+    ]
+
+
+def _variacion(actual, anterior):
+    return {
+        'diferencia': actual - anterior,
+        'porcentaje': (actual - anterior) / anterior * 100 if anterior else None
+    }
+
+
+def _series(filas, posiciones, clave, datos):
+    """
+    Agrupa (periodo, total) por `clave(fila)` en listas alineadas con los
+    períodos de `posiciones` (las filas de otros períodos se ignoran)
+
+    Returns:
+        Lista de dicts de `datos(fila)` más 'totales' y 'total', de mayor a menor
+    """
+    series = {}
+    for fila in filas:
+        posicion = posiciones.get(fila['periodo'])
+        if posicion is None:
+            continue
+        id_serie = clave(fila)
+        serie = series.get(id_serie)
+        if serie is None:
+            serie = series[id_serie] = dict(datos(fila), totales=[0.0] * len(posiciones))
+        serie['totales'][posicion] += fila['total']
+
+    for serie in series.values():
+        serie['total'] = sum(serie['totales'])
+    return sorted(series.values(), key=lambda serie: (-serie['total'], serie['nombre'] or ''))
+
+
+def _pronostico(db, user_id, periodo, pagado, anteriores):
+    """
+    Lo que falta pagar en `periodo` según los montos de los servicios activos
+    (o su monto estimado si no tienen), y los vencimientos de los próximos meses
+    """
+    servicios = obtener_dashboard_cacheado(db, user_id)['servicios']
+    calendario = pronostico.calendario(servicios)
+    restante = calendario[0]['total']
+    promedio = sum(anteriores) / len(anteriores) if anteriores else None
+    estimado = pagado + restante
+    return {
+        'periodo': periodo,
+        'pagado': pagado,
+        'restante': restante,
+        'estimado': estimado,
+        'promedio_anterior': promedio,
+        'variacion': _variacion(estimado, promedio) if promedio is not None else None,
+        'calendario': calendario
+    }
+
+
+def obtener_analisis(db, user_id, periodos=PERIODOS_DEFECTO, hasta=None):
+    """
+    Totales mensuales de un usuario para los `periodos` meses que terminan en `hasta`
+
+    Args:
+        db: Conexión SQLite con row_factory = sqlite3.Row
+        user_id: ID del usuario
+        periodos: Cantidad de meses
+        hasta: Último período 'YYYY-MM' (por defecto el actual)
+
+    Returns:
+        Dict con 'periodos', 'totales' y 'variaciones' (contra el mes
+        anterior) alineados, 'por_categoria', 'por_servicio' y 'por_metodo'
+        (cada uno con 'totales' por período y 'total'), y 'pronostico' del
+        período actual (None si `hasta` es otro)
+    """
+    actual = datetime.now().strftime('%Y-%m')
+    hasta = hasta or actual
+
+    # Se lee un período más al principio para la variación del primero
+    rango = lista_periodos(hasta, periodos + 1)
+    params = (user_id, rango[0], rango[-1])
+
+    filas_servicios = db.execute(SERVICIOS_QUERY, params).fetchall()
+    filas_metodos = db.execute(METODOS_QUERY, params).fetchall()
+
+    indices = {periodo: i for i, periodo in enumerate(rango)}
+    totales = [0.0] * len(rango)
+    for fila in filas_servicios:
+        totales[indices[fila['periodo']]] += fila['total']
+    variaciones = [_variacion(totales[i], totales[i - 1]) for i in range(1, len(rango))]
+
+    posiciones = {periodo: i for i, periodo in enumerate(rango[1:])}
+
+    por_servicio = _series(
+        filas_servicios, posiciones,
+        lambda fila: fila['servicio_id'],
+        lambda fila: {'id': fila['servicio_id'], 'nombre': fila['servicio_nombre'],
+                      'categoria': fila['categoria_nombre']}
+    )
+    por_categoria = _series(
+        filas_servicios, posiciones,
+        lambda fila: fila['categoria_id'],
+        lambda fila: {'id': fila['categoria_id'], 'nombre': fila['categoria_nombre'] or 'Sin categoría',
+                      'color': fila['categoria_color']}
+    )
+    por_metodo = _series(
+        filas_metodos, posiciones,
+        lambda fila: fila['metodo_pago'],
+        lambda fila: {'nombre': fila['metodo_pago'] or 'Sin especificar'}
+    )
+
+    pronostico = None
+    if hasta == actual:
+        pronostico = _pronostico(db, user_id, actual, totales[-1],
+                                 totales[-1 - PERIODOS_PROMEDIO:-1])
+
+    return {
+        'periodos': rango[1:],
+        'totales': totales[1:],
+        'variaciones': variaciones,
+        'por_categoria': por_categoria,
+        'por_servicio': por_servicio,
+        'por_metodo': por_metodo,
+        'pronostico': pronostico
+    }
+
+
+def obtener_analisis_cacheado(db, user_id, periodos=PERIODOS_DEFECTO, hasta=None):
+    """obtener_analisis() servido desde memoria mientras no cambien los datos ni el día"""
+    version = db.execute('SELECT datos_version FROM usuarios WHERE id = ?', (user_id,)).fetchone()
+    ahora = datetime.now()
+    clave = (user_id, version[0] if version else 0, ahora.date(), periodos, hasta)
+    return _analisis_cache.get_or_set(clave, lambda: obtener_analisis(db, user_id, periodos, hasta))
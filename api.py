@@ -0,0 +1,396 @@
+"""
+API JSON de Billetera Mata Galán (/api/v1)
+
+Para scripts y la app móvil: los mismos datos que el dashboard y el
+historial, sin renderizar plantillas. Se autentica con un token personal
+(Configuración → Tokens de la API) en el encabezado
+
+    Authorization: Bearer bmg_...
+
+Las respuestas son JSON compacto, comprimido con gzip (o brotli si está
+instalado y el cliente lo acepta), y los listados aceptan ?fields=a,b,c para
+devolver solo esos campos.
+
+Endpoints:
+    GET    /api/v1/dashboard             Servicios del mes, estados y totales
+    GET    /api/v1/analisis              Totales mensuales (?periodos=, ?hasta=YYYY-MM)
+    GET    /api/v1/pagos                 Historial paginado (?cursor=, ?limite=, filtros)
+    POST   /api/v1/pagos                 Registra uno o varios pagos
+    GET    /api/v1/servicios             Servicios (?inactivos=1 para incluir los dados de baja)
+    POST   /api/v1/servicios             Crea un servicio
+    GET    /api/v1/servicios/<id>
+    PATCH  /api/v1/servicios/<id>        Modifica los campos enviados
+    DELETE /api/v1/servicios/<id>        Da de baja el servicio
+"""
+
+import gzip
+import hashlib
+import json
+import math
+import secrets
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import Blueprint, Response, g, request
+from werkzeug.exceptions import HTTPException
+import analisis
+import eventos
+import historial_data
+import pagos_lote
+from dashboard_data import obtener_dashboard_cacheado
+from database import get_db
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+PREFIJO_TOKEN = 'bmg_'
+
+# Respuestas más chicas que esto no se comprimen
+MIN_COMPRIMIR = 1024
+
+# last_used_at se actualiza como mucho una vez por este intervalo
+INTERVALO_USO = timedelta(hours=1)
+
+LIMITE_MAXIMO = 200
+
+CAMPOS_SERVICIO = ('nombre', 'dia_vencimiento', 'monto', 'medio_pago', 'categoria_id', 'es_unico')
+
+TOKEN_QUERY = 'SELECT id, user_id, last_used_at FROM api_tokens WHERE token_hash = ?'
+
+SERVICIO_QUERY = '''
+    SELECT id, nombre, dia_vencimiento, monto, medio_pago, categoria_id, es_unico, activo
+    FROM servicios
+    WHERE user_id = ?
+'''
+
+
+class ErrorAPI(Exception):
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.status = status
+
+
+def _hash_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def crear_token(db, user_id, nombre):
+    """
+    Genera un token nuevo para el usuario
+
+    Returns:
+        El token en claro (solo se puede mostrar ahora: en la base queda el hash)
+    """
+    token = PREFIJO_TOKEN + secrets.token_urlsafe(32)
+    with db:
+        db.execute('''
+            INSERT INTO api_tokens (user_id, nombre, token_hash, prefijo)
+            VALUES (?, ?, ?, ?)
+        ''', (user_id, nombre, _hash_token(token), token[:len(PREFIJO_TOKEN) + 6]))
+    return token
+
+
+def revocar_token(db, user_id, token_id):
+    with db:
+        db.execute('DELETE FROM api_tokens WHERE id = ? AND user_id = ?', (token_id, user_id))
+
+
+def listar_tokens(db, user_id):
+    return db.execute('''
+        SELECT id, nombre, prefijo, created_at, last_used_at
+        FROM api_tokens
+        WHERE user_id = ?
+        ORDER BY created_at DESC
+    ''', (user_id,)).fetchall()
+
+
+def token_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        tipo, _, token = request.headers.get('Authorization', '').partition(' ')
+        if tipo.lower() != 'bearer' or not token:
+            raise ErrorAPI('Falta el token (Authorization: Bearer ...)', 401)
+
+        db = get_db()
+        fila = db.execute(TOKEN_QUERY, (_hash_token(token.strip()),)).fetchone()
+        if fila is None:
+            raise ErrorAPI('Token inválido', 401)
+
+        # Escribir solo si el último uso registrado es viejo
+        ahora = datetime.now(timezone.utc).replace(tzinfo=None)  # CURRENT_TIMESTAMP es UTC
+        if fila['last_used_at'] is None or datetime.fromisoformat(fila['last_used_at']) < ahora - INTERVALO_USO:
+            with db:
+                db.execute('UPDATE api_tokens SET last_used_at = CURRENT_TIMESTAMP WHERE id = ?', (fila['id'],))
+
+        g.api_user_id = fila['user_id']
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def _seleccionar_campos(items):
+    """Aplica ?fields=a,b a una lista de dicts"""
+    campos = request.args.get('fields')
+    if not campos:
+        return items
+    campos = [campo.strip() for campo in campos.split(',') if campo.strip()]
+    return [{campo: item[campo] for campo in campos if campo in item} for item in items]
+
+
+def _respuesta(datos, status=200):
+    """JSON compacto, comprimido si el cliente lo acepta y vale la pena"""
+    # allow_nan=False: NaN e Infinity no son JSON válido, mejor un error que un cuerpo ilegible
+    cuerpo = json.dumps(datos, ensure_ascii=False, separators=(',', ':'), allow_nan=False).encode()
+    response = Response(cuerpo, status=status, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+
+    if len(cuerpo) < MIN_COMPRIMIR:
+        return response
+
+    aceptadas = request.accept_encodings
+    if brotli is not None and aceptadas['br']:
+        response.set_data(brotli.compress(cuerpo, quality=5))
+        response.content_encoding = 'br'
+    elif aceptadas['gzip']:
+        response.set_data(gzip.compress(cuerpo, compresslevel=6))
+        response.content_encoding = 'gzip'
+    return response
+
+
+def _cuerpo_json():
+    datos = request.get_json(silent=True)
+    if datos is None:
+        raise ErrorAPI('Se esperaba un cuerpo JSON')
+    return datos
+
+
+@bp.errorhandler(ErrorAPI)
+def error_api(error):
+    return _respuesta({'error': str(error)}, error.status)
+
+
+@bp.errorhandler(HTTPException)
+def error_http(error):
+    return _respuesta({'error': error.description}, error.code)
+
+
+# Dashboard
+
+@bp.route('/dashboard')
+@token_required
+def dashboard():
+    datos = obtener_dashboard_cacheado(get_db(), g.api_user_id,
+                                       categoria_id=request.args.get('categoria_id', type=int),
+                                       medio_pago=request.args.get('medio_pago'))
+    servicios = [
+        {clave: valor for clave, valor in servicio.items() if clave != 'prioridad'}
+        for servicio in datos['servicios']
+    ]
+    return _respuesta({
+        'periodo': datetime.now().strftime('%Y-%m'),
+        'total_mes': datos['total_mes'],
+        'total_pagado': datos['total_pagado'],
+        'pendiente': datos['pendiente'],
+        'medios_pago': [medio['medio_pago'] for medio in datos['medios_pago']],
+        'servicios': _seleccionar_campos(servicios)
+    })
+
+
+# Análisis
+
+@bp.route('/analisis')
+@token_required
+def ver_analisis():
+    """Totales mensuales de los últimos ?periodos= meses (hasta 60) que terminan en ?hasta=YYYY-MM"""
+    periodos = request.args.get('periodos', analisis.PERIODOS_DEFECTO, type=int)
+    if not 1 <= periodos <= max(analisis.OPCIONES_PERIODOS):
+        raise ErrorAPI(f'periodos tiene que estar entre 1 y {max(analisis.OPCIONES_PERIODOS)}')
+    hasta = request.args.get('hasta')
+    if hasta is not None and not analisis.periodo_valido(hasta):
+        raise ErrorAPI('hasta tiene que ser un período YYYY-MM')
+
+    return _respuesta(analisis.obtener_analisis_cacheado(get_db(), g.api_user_id, periodos, hasta))
+
+
+# Pagos
+
+def _pago(row):
+    return {
+        'id': row['id'],
+        'servicio_id': row['servicio_id'],
+        'servicio': row['servicio_nombre'],
+        'categoria': row['categoria_nombre'],
+        'periodo': row['periodo'],
+        'monto': row['monto'],
+        'fecha_pago': row['fecha_pago'],
+        'metodo_pago': row['metodo_pago'],
+        'factura': row['bill_filename'],
+        'comprobante': row['invoice_filename']
+    }
+
+
+@bp.route('/pagos')
+@token_required
+def listar_pagos():
+    filtros = {
+        'servicio_id': request.args.get('servicio_id', type=int),
+        'periodo': request.args.get('periodo'),
+        'categoria_id': request.args.get('categoria_id', type=int),
+        'metodo_pago': request.args.get('metodo_pago')
+    }
+    limite = min(max(request.args.get('limite', historial_data.PAGOS_POR_PAGINA, type=int), 1), LIMITE_MAXIMO)
+
+    pagina = historial_data.obtener_historial(get_db(), g.api_user_id, filtros,
+                                              request.args.get('cursor'), limite)
+    return _respuesta({
+        'total': pagina['total'],
+        'cantidad': pagina['cantidad'],
+        'siguiente': pagina['siguiente'],
+        'pagos': _seleccionar_campos([_pago(row) for row in pagina['pagos']])
+    })
+
+
+@bp.route('/pagos', methods=['POST'])
+@token_required
+def registrar_pagos():
+    """Un pago ({"servicio_id", "monto", "metodo_pago"}) o varios ({"pagos": [...]})"""
+    datos = _cuerpo_json()
+    if isinstance(datos, dict) and 'pagos' not in datos:
+        datos = [datos]
+
+    db = get_db()
+    try:
+        entradas = pagos_lote.entradas_desde_json(datos)
+        resultado = pagos_lote.registrar_pagos(db, g.api_user_id, entradas)
+    except pagos_lote.PagosInvalidos as e:
+        raise ErrorAPI(str(e)) from None
+
+    eventos.emitir(eventos.PAGOS_MODIFICADOS, db=db, user_id=g.api_user_id)
+    return _respuesta(resultado, 201)
+
+
+# Servicios
+
+def _servicio(db, servicio_id):
+    fila = db.execute(SERVICIO_QUERY + ' AND id = ?', (g.api_user_id, servicio_id)).fetchone()
+    if fila is None:
+        raise ErrorAPI('Servicio no encontrado', 404)
+    return dict(fila)
+
+
+def _validar_servicio(datos, parcial=False):
+    """Campos de servicio del cuerpo JSON, validados y con los tipos de la base"""
+    if not isinstance(datos, dict):
+        raise ErrorAPI('Se esperaba un objeto')
+
+    desconocidos = set(datos) - set(CAMPOS_SERVICIO)
+    if desconocidos:
+        raise ErrorAPI(f"Campos desconocidos: {', '.join(sorted(desconocidos))}")
+
+    if not parcial and not datos.get('nombre'):
+        raise ErrorAPI('Falta el nombre')
+
+    valores = {}
+    for campo, valor in datos.items():
+        try:
+            # true/false solo valen en es_unico (int(True) sería 1)
+            if isinstance(valor, bool) and campo != 'es_unico':
+                raise ValueError
+            if campo == 'nombre':
+                if not isinstance(valor, str) or not valor.strip():
+                    raise ValueError
+                valor = valor.strip()
+            elif campo == 'dia_vencimiento' and valor is not None:
+                valor = int(valor)
+                if not 1 <= valor <= 31:
+                    raise ValueError
+            elif campo == 'monto' and valor is not None:
+                valor = float(valor)
+                # NaN se guardaría como NULL e Infinity rompería los totales
+                if not math.isfinite(valor) or valor < 0:
+                    raise ValueError
+            elif campo == 'categoria_id' and valor is not None:
+                valor = int(valor)
+            elif campo == 'medio_pago' and valor is not None:
+                if not isinstance(valor, str):
+                    raise ValueError
+                valor = valor.strip() or None
+            elif campo == 'es_unico':
+                # JSON true/false o 0/1; "false" sería verdadero con bool()
+                if not isinstance(valor, int) or valor not in (0, 1):
+                    raise ValueError
+                valor = int(valor)
+        except (TypeError, ValueError, OverflowError):
+            raise ErrorAPI(f'Valor inválido para {campo}') from None
+        valores[campo] = valor
+
+    if valores.get('categoria_id') is not None:
+        existe = get_db().execute('SELECT 1 FROM categorias WHERE id = ?', (valores['categoria_id'],)).fetchone()
+        if not existe:
+            raise ErrorAPI('La categoría no existe')
+
+    return valores
+
+
+@bp.route('/servicios')
+@token_required
+def listar_servicios():
+    query = SERVICIO_QUERY
+    if not request.args.get('inactivos', type=int):
+        query += ' AND activo = 1'
+    servicios = [dict(row) for row in get_db().execute(query + ' ORDER BY nombre', (g.api_user_id,))]
+    return _respuesta({'servicios': _seleccionar_campos(servicios)})
+
+
+@bp.route('/servicios', methods=['POST'])
+@token_required
+def crear_servicio():
+    valores = _validar_servicio(_cuerpo_json())
+    db = get_db()
+
+    columnas = ', '.join(valores)
+    marcadores = ', '.join('?' for _ in valores)
+    with db:
+        cursor = db.execute(f'INSERT INTO servicios (user_id, {columnas}) VALUES (?, {marcadores})',
+                            (g.api_user_id, *valores.values()))
+    eventos.emitir(eventos.SERVICIOS_MODIFICADOS, db=db, user_id=g.api_user_id)
+
+    return _respuesta(_servicio(db, cursor.lastrowid), 201)
+
+
+@bp.route('/servicios/<int:servicio_id>')
+@token_required
+def ver_servicio(servicio_id):
+    return _respuesta(_servicio(get_db(), servicio_id))
+
+
+@bp.route('/servicios/<int:servicio_id>', methods=['PATCH'])
+@token_required
+def modificar_servicio(servicio_id):
+    db = get_db()
+    _servicio(db, servicio_id)
+    valores = _validar_servicio(_cuerpo_json(), parcial=True)
+
+    if valores:
+        asignaciones = ', '.join(f'{campo} = ?' for campo in valores)
+        with db:
+            db.execute(f'UPDATE servicios SET {asignaciones} WHERE id = ? AND user_id = ?',
+                       (*valores.values(), servicio_id, g.api_user_id))
+        eventos.emitir(eventos.SERVICIOS_MODIFICADOS, db=db, user_id=g.api_user_id)
+
+    return _respuesta(_servicio(db, servicio_id))
+
+
+@bp.route('/servicios/<int:servicio_id>', methods=['DELETE'])
+@token_required
+def eliminar_servicio(servicio_id):
+    db = get_db()
+    _servicio(db, servicio_id)
+    # Igual que en la web: baja lógica, el historial de pagos se conserva
+    with db:
+        db.execute('UPDATE servicios SET activo = 0 WHERE id = ? AND user_id = ?',
+                   (servicio_id, g.api_user_id))
+    eventos.emitir(eventos.SERVICIOS_MODIFICADOS, db=db, user_id=g.api_user_id)
+    return Response(status=204)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark del dashboard: cantidad de consultas y tiempo según cantidad de servicios
+
+Usage:
+    python benchmarks/bench_dashboard.py [cantidades...]
+
+Ejemplo:
+    python benchmarks/bench_dashboard.py 10 100 500
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# La base temporal tiene que estar configurada antes de crear la app
+_tmpdir = tempfile.mkdtemp()
+os.environ['DATABASE_PATH'] = os.path.join(_tmpdir, 'bench.db')
+
+import database
+from app import create_app
+from dashboard_data import obtener_dashboard
+
+REPETICIONES = 20
+
+
+def poblar(db, user_id, cantidad):
+    """Crea `cantidad` servicios activos con pagos parciales y algunas omisiones"""
+    periodo = datetime.now().strftime('%Y-%m')
+    db.execute('DELETE FROM pagos')
+    db.execute('DELETE FROM servicios_omitidos')
+    db.execute('DELETE FROM servicios')
+    for i in range(cantidad):
+        cursor = db.execute('''
+            INSERT INTO servicios (user_id, nombre, dia_vencimiento, monto, medio_pago, categoria_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (user_id, f'Servicio {i:04d}', i % 28 + 1, 1000 + i, 'Débito', i % 8 + 1))
+        servicio_id = cursor.lastrowid
+        for _ in range(i % 3):
+            db.execute('''
+                INSERT INTO pagos (servicio_id, user_id, periodo, monto, metodo_pago)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (servicio_id, user_id, periodo, 300, 'Débito'))
+        if i % 10 == 0:
+            db.execute('''
+                INSERT INTO servicios_omitidos (servicio_id, user_id, periodo)
+                VALUES (?, ?, ?)
+            ''', (servicio_id, user_id, periodo))
+    db.commit()
+
+
+def medir(db, user_id):
+    """Devuelve (consultas por llamada, ms promedio por llamada)"""
+    consultas = []
+    db.set_trace_callback(consultas.append)
+    obtener_dashboard(db, user_id)
+    db.set_trace_callback(None)
+
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES):
+        obtener_dashboard(db, user_id)
+    ms = (time.perf_counter() - inicio) * 1000 / REPETICIONES
+
+    return len(consultas), ms
+
+
+def main(cantidades):
+    # Crear la app aplica las migraciones sobre la base temporal
+    app = create_app()
+    db = database.connect(app.config['DATABASE'])
+    user_id = db.execute(
+        "INSERT INTO usuarios (username, password) VALUES ('bench', 'x')"
+    ).lastrowid
+    db.commit()
+
+    print(f"{'servicios':>10} {'consultas':>10} {'ms/llamada':>12}")
+    for cantidad in cantidades:
+        poblar(db, user_id, cantidad)
+        n_consultas, ms = medir(db, user_id)
+        print(f"{cantidad:>10} {n_consultas:>10} {ms:>12.2f}")
+
+    db.close()
+
+
+if __name__ == '__main__':
+    cantidades = [int(arg) for arg in sys.argv[1:]] or [10, 100, 500]
+    main(cantidades)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque: tiempo de import de la app web y del CLI de recordatorios
+
+Corre `python -X importtime -c "import <módulo>"` en un proceso nuevo (el
+mejor de REPETICIONES) y falla si el tiempo supera el presupuesto o si se
+cargó un módulo que ese punto de entrada no debería importar: openpyxl y
+numpy se importan recién al exportar o pronosticar, y run_reminders no carga
+Flask. También falla si importar el módulo crea la base de datos (las
+migraciones se aplican al crear la app, no al importarla).
+
+Usage:
+    python benchmarks/bench_importtime.py [--factor N]
+
+Ejemplo (máquina lenta, presupuestos x2):
+    python benchmarks/bench_importtime.py --factor 2
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+REPETICIONES = 3
+
+# módulo -> (presupuesto en ms, módulos que no debe importar)
+PUNTOS_DE_ENTRADA = {
+    'app': (400, ('openpyxl', 'numpy', 'pandas')),
+    'run_reminders': (200, ('flask', 'werkzeug', 'openpyxl', 'numpy', 'pandas')),
+}
+
+LINEA = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+def importtime(modulo):
+    """Devuelve (ms acumulados de `modulo`, conjunto de módulos importados, si creó la base)"""
+    # Base temporal por si algún import la crea
+    with tempfile.TemporaryDirectory() as tmpdir:
+        base = os.path.join(tmpdir, 'bench.db')
+        resultado = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+            cwd=RAIZ, env=dict(os.environ, DATABASE_PATH=base), capture_output=True, text=True, check=True
+        )
+        creo_base = os.path.exists(base)
+
+    ms = None
+    importados = set()
+    for linea in resultado.stderr.splitlines():
+        match = LINEA.match(linea)
+        if not match:
+            continue
+        nombre = match.group(4)
+        importados.add(nombre.split('.')[0])
+        if nombre == modulo and not match.group(3):
+            ms = int(match.group(2)) / 1000
+    return ms, importados, creo_base
+
+
+def main(factor):
+    fallas = []
+
+    print(f"{'módulo':>15} {'ms':>8} {'presupuesto':>12}  prohibidos cargados")
+    for modulo, (presupuesto, prohibidos) in PUNTOS_DE_ENTRADA.items():
+        mediciones = [importtime(modulo) for _ in range(REPETICIONES)]
+        ms = min(ms for ms, _, _ in mediciones)
+        cargados = sorted(set(prohibidos) & mediciones[0][1])
+        limite = presupuesto * factor
+
+        print(f"{modulo:>15} {ms:>8.1f} {limite:>12.0f}  {', '.join(cargados) or '-'}")
+        if ms > limite:
+            fallas.append(f'{modulo}: {ms:.1f}ms supera el presupuesto de {limite:.0f}ms')
+        if cargados:
+            fallas.append(f'{modulo}: importa {", ".join(cargados)}')
+        if mediciones[0][2]:
+            fallas.append(f'{modulo}: importarlo crea la base de datos')
+
+    for falla in fallas:
+        print(f'FALLA {falla}')
+    return 1 if fallas else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tiempo de import de los puntos de entrada')
+    parser.add_argument('--factor', type=float, default=1.0,
+                        help='Multiplica los presupuestos (máquinas lentas o CI compartido)')
+    args = parser.parse_args()
+    sys.exit(main(args.factor))
@@ -0,0 +1,279 @@
+"""
+Fixtures de los benchmarks: base sintética, app, cliente logueado y medición
+
+Cada escenario llama a `medir(funcion)`: se ejecuta una vez para calentar,
+otra contando las sentencias SQL y después `--rondas` veces cronometrado.
+Al final se imprime una tabla con p50/p95/p99 y sentencias por escenario
+(y con --bench-json se guarda para comparar entre commits).
+
+Pasarse de las sentencias SQL de un presupuesto siempre falla; pasarse del
+p95 solo falla con --bench-tiempos (o BENCH_TIEMPOS=1), porque los tiempos
+dependen de la máquina. Sin esa opción se avisa en el resumen final.
+
+Usage:
+    python -m pytest benchmarks -q                        # escala chica
+    python -m pytest benchmarks -q --escala mediana --rondas 50
+    python -m pytest benchmarks -q --bench-tiempos --factor 2
+    python -m pytest benchmarks -q --bench-json antes.json
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Los módulos leen DATABASE_PATH y UPLOADS_PATH al importarse: que no sean los reales
+_tmpdir = tempfile.mkdtemp(prefix='bench-')
+os.environ['DATABASE_PATH'] = os.path.join(_tmpdir, 'vacia.db')
+os.environ['UPLOADS_PATH'] = os.path.join(_tmpdir, 'uploads')
+
+import database
+import migrations
+from app import create_app
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import datos
+
+RONDAS = 30
+
+_resultados = []
+
+# Escenarios que se pasaron del p95 sin --bench-tiempos
+_excedidos = []
+
+
+def pytest_addoption(parser):
+    grupo = parser.getgroup('benchmarks')
+    grupo.addoption('--escala', choices=datos.ESCALAS, default=os.environ.get('BENCH_ESCALA', 'chica'),
+                    help='Tamaño de la base sintética (ver benchmarks/datos.py)')
+    grupo.addoption('--rondas', type=int, default=RONDAS,
+                    help='Ejecuciones cronometradas por escenario')
+    grupo.addoption('--factor', type=float, default=1.0,
+                    help='Multiplica los presupuestos de tiempo (máquinas lentas o CI compartido)')
+    grupo.addoption('--bench-tiempos', action='store_true', default=os.environ.get('BENCH_TIEMPOS') == '1',
+                    help='Fallar si un escenario se pasa de su p95 (por defecto solo se avisa)')
+    grupo.addoption('--bench-json', metavar='RUTA',
+                    help='Guardar los resultados en RUTA')
+
+
+class Medicion:
+    """Tiempos (ms) de un escenario y sentencias SQL por ejecución"""
+
+    def __init__(self, nombre, tiempos, sentencias):
+        self.nombre = nombre
+        self.tiempos = sorted(tiempos)
+        self.sentencias = sentencias
+
+    def percentil(self, q):
+        """Percentil `q` con interpolación lineal (como statistics.quantiles inclusive)"""
+        posicion = (len(self.tiempos) - 1) * q / 100
+        abajo = int(posicion)
+        arriba = min(abajo + 1, len(self.tiempos) - 1)
+        return self.tiempos[abajo] + (self.tiempos[arriba] - self.tiempos[abajo]) * (posicion - abajo)
+
+    def como_dict(self):
+        return {
+            'rondas': len(self.tiempos),
+            'p50': round(self.percentil(50), 3),
+            'p95': round(self.percentil(95), 3),
+            'p99': round(self.percentil(99), 3),
+            'media': round(sum(self.tiempos) / len(self.tiempos), 3),
+            'sentencias': self.sentencias,
+        }
+
+
+class _Contador:
+    """Sentencias ejecutadas por las conexiones abiertas con database.connect()"""
+
+    def __init__(self):
+        self.sentencias = None
+
+    def __call__(self, sql):
+        if self.sentencias is not None:
+            self.sentencias.append(sql)
+
+
+@pytest.fixture(scope='session')
+def contador():
+    """Instala el contador en toda conexión nueva (incluidas las del pool de la app)"""
+    contador = _Contador()
+    connect = database.connect
+
+    def connect_contando(path=None):
+        db = connect(path)
+        db.set_trace_callback(contador)
+        return db
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(database, 'connect', connect_contando)
+        yield contador
+
+
+@pytest.fixture(scope='session')
+def escala(request):
+    return request.config.getoption('--escala')
+
+
+@pytest.fixture(scope='session')
+def base(request, escala, contador):
+    """
+    Copia de la base sintética de la escala (generada una vez y guardada en
+    la caché de pytest mientras no cambien el esquema, la semilla ni el día)
+
+    Returns:
+        Dict con 'path', 'uploads' y las cantidades generadas
+    """
+    # Sin la caché de pytest (-p no:cacheprovider) se genera en cada corrida
+    cache = request.config.cache.mkdir('bench-datos') if hasattr(request.config, 'cache') else _tmpdir
+    nombre = f'{escala}-{datos.SEMILLA}-v{len(migrations.MIGRATIONS)}-{date.today().isoformat()}'
+    original = os.path.join(cache, nombre + '.db')
+    uploads = os.path.join(cache, nombre + '.uploads')
+    cantidades_path = os.path.join(cache, nombre + '.json')
+
+    if not os.path.exists(cantidades_path):
+        for ruta in (original, uploads):
+            if os.path.isdir(ruta):
+                shutil.rmtree(ruta)
+            elif os.path.exists(ruta):
+                os.remove(ruta)
+        cantidades = datos.generar(original, uploads=uploads, **datos.ESCALAS[escala])
+        with open(cantidades_path, 'w') as f:
+            json.dump(cantidades, f)
+
+    with open(cantidades_path) as f:
+        cantidades = json.load(f)
+
+    # Los escenarios escriben (pagos, logins): cada corrida usa su copia
+    path = os.path.join(_tmpdir, f'{escala}.db')
+    shutil.copyfile(original, path)
+    return dict(cantidades, path=path, uploads=uploads)
+
+
+@pytest.fixture(scope='session')
+def app(base):
+    app = create_app({
+        'DATABASE': base['path'],
+        'UPLOADS_PATH': base['uploads'],
+        'TESTING': True,
+        # Una línea de log por request ensucia la salida de pytest
+        'SQL_LOG_REQUESTS': False,
+    })
+    return app
+
+
+@pytest.fixture(scope='session')
+def usuario(base):
+    """Usuario de los escenarios: el primero de la base sintética"""
+    db = database.connect(base['path'])
+    try:
+        return dict(db.execute("SELECT id, username FROM usuarios WHERE username = 'usuario0000'").fetchone())
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def cliente(app, usuario):
+    cliente = app.test_client()
+    respuesta = cliente.post('/login', data={'username': usuario['username'], 'password': datos.CONTRASENA})
+    assert respuesta.status_code == 302
+    return cliente
+
+
+@pytest.fixture
+def medir(request, contador):
+    """
+    medir(funcion, preparar=None, rondas=None) -> Medicion
+
+    `preparar` se llama antes de cada ejecución y no se cronometra (por
+    ejemplo para vaciar una caché y medir el caso sin ella).
+    """
+    rondas_defecto = request.config.getoption('--rondas')
+    nombre = request.node.name.removeprefix('test_')
+
+    def medir(funcion, preparar=None, rondas=None):
+        preparar = preparar or (lambda: None)
+
+        preparar()
+        funcion()
+
+        preparar()
+        contador.sentencias = []
+        try:
+            funcion()
+            sentencias = len(contador.sentencias)
+        finally:
+            contador.sentencias = None
+
+        tiempos = []
+        for _ in range(rondas or rondas_defecto):
+            preparar()
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+        medicion = Medicion(nombre, tiempos, sentencias)
+        _resultados.append(medicion)
+        return medicion
+
+    return medir
+
+
+@pytest.fixture
+def presupuesto(request, escala):
+    """
+    presupuesto(medicion, sentencias, p95_ms): falla si la medición se pasa
+
+    `p95_ms` es un dict escala -> ms (multiplicado por --factor); solo se
+    exige con --bench-tiempos.
+    """
+    factor = request.config.getoption('--factor')
+    tiempos = request.config.getoption('--bench-tiempos')
+
+    def presupuesto(medicion, sentencias, p95_ms):
+        assert medicion.sentencias <= sentencias, (
+            f'{medicion.nombre}: {medicion.sentencias} sentencias SQL (máximo {sentencias})')
+        limite = p95_ms[escala] * factor
+        mensaje = f'{medicion.nombre}: p95 {medicion.percentil(95):.1f}ms (máximo {limite:.0f}ms)'
+        if tiempos:
+            assert medicion.percentil(95) <= limite, mensaje
+        elif medicion.percentil(95) > limite:
+            _excedidos.append(mensaje)
+
+    return presupuesto
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not _resultados:
+        return
+
+    escala = config.getoption('--escala')
+    terminalreporter.section(f'benchmarks (escala {escala}, ms)')
+    terminalreporter.write_line(
+        f"{'escenario':<28} {'rondas':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'media':>8} {'sentencias':>10}")
+    for medicion in _resultados:
+        d = medicion.como_dict()
+        terminalreporter.write_line(
+            f"{medicion.nombre:<28} {d['rondas']:>6} {d['p50']:>8.2f} {d['p95']:>8.2f} "
+            f"{d['p99']:>8.2f} {d['media']:>8.2f} {d['sentencias']:>10}")
+
+    if _excedidos:
+        terminalreporter.write_line('Fuera del presupuesto de tiempo (falla con --bench-tiempos):', yellow=True)
+        for mensaje in _excedidos:
+            terminalreporter.write_line(f'  {mensaje}', yellow=True)
+
+    ruta = config.getoption('--bench-json')
+    if ruta:
+        with open(ruta, 'w') as f:
+            json.dump({
+                'escala': escala,
+                'parametros': datos.ESCALAS[escala],
+                'escenarios': {m.nombre: m.como_dict() for m in _resultados},
+            }, f, indent=2)
+        terminalreporter.write_line(f'Resultados guardados en {ruta}')
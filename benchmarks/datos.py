@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Generador de datos sintéticos para los benchmarks
+
+Arma una base SQLite con el esquema actual (migrations.py) y datos
+realistas: usuarios x servicios x meses de pagos x adjuntos. Con la misma
+escala, semilla y fecha el resultado es siempre el mismo.
+
+Cada usuario se llama usuarioNNNN y todos tienen la contraseña
+CONTRASENA (se hashea una sola vez). El primero es el que usan los
+escenarios de benchmarks/test_escenarios.py.
+
+Usage:
+    python benchmarks/datos.py salida.db [--escala chica|mediana|grande]
+                                         [--usuarios N] [--servicios N]
+                                         [--meses N] [--adjuntos F] [--semilla N]
+
+Ejemplo:
+    python benchmarks/datos.py /tmp/bench.db --escala grande
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+import almacenamiento
+import database
+import migrations
+
+# usuarios, servicios por usuario, meses de historia, fracción de pagos con adjuntos
+ESCALAS = {
+    'chica': dict(usuarios=5, servicios=15, meses=12, adjuntos=0.1),
+    'mediana': dict(usuarios=50, servicios=30, meses=24, adjuntos=0.2),
+    'grande': dict(usuarios=200, servicios=60, meses=60, adjuntos=0.3),
+}
+
+SEMILLA = 20240501
+CONTRASENA = 'benchmark'
+
+MEDIOS_PAGO = ('Débito automático', 'Tarjeta de crédito', 'Transferencia', 'Efectivo', 'Mercado Pago')
+NOMBRES = ('Luz', 'Gas', 'Agua', 'Internet', 'Celular', 'Alquiler', 'Expensas', 'Seguro auto',
+           'Patente', 'Prepaga', 'Gimnasio', 'Streaming', 'Tarjeta', 'Colegio', 'ABL')
+
+# Contenidos distintos de los adjuntos: se guardan una vez cada uno (ver almacenamiento.py)
+ARCHIVOS_DISTINTOS = 20
+
+
+def _periodos(hoy, meses):
+    """Los últimos `meses` períodos YYYY-MM terminando en el de `hoy`, del más viejo al actual"""
+    periodos = []
+    anio, mes = hoy.year, hoy.month
+    for _ in range(meses):
+        periodos.append(f'{anio:04d}-{mes:02d}')
+        anio, mes = (anio, mes - 1) if mes > 1 else (anio - 1, 12)
+    return periodos[::-1]
+
+
+def _archivos(db, adjuntos, rng):
+    """Guarda ARCHIVOS_DISTINTOS PDFs chicos y devuelve [(clave, tamaño)]"""
+    archivos = []
+    for i in range(ARCHIVOS_DISTINTOS):
+        contenido = b'%PDF-1.4\n' + rng.randbytes(2048 + i * 512)
+        archivos.append(adjuntos.guardar(db, io.BytesIO(contenido)))
+    # Las referencias se cuentan al final, cuando ya se asignaron a los pagos
+    db.execute('UPDATE adjuntos SET referencias = 0')
+    return archivos
+
+
+def generar(path, usuarios, servicios, meses, adjuntos, semilla=SEMILLA, hoy=None, uploads=None):
+    """
+    Crea la base en `path` (que no debe existir) con los datos de la escala
+
+    Args:
+        usuarios: Cantidad de usuarios
+        servicios: Servicios por usuario
+        meses: Meses de pagos hasta el actual inclusive
+        adjuntos: Fracción de pagos con comprobante (la mitad de esos lleva factura también)
+        hoy: Fecha de referencia (default: hoy; el dashboard y los recordatorios usan la real)
+        uploads: Carpeta de adjuntos (default: <path>.uploads)
+
+    Returns:
+        Dict con las cantidades generadas
+    """
+    if os.path.exists(path):
+        raise FileExistsError(path)
+
+    rng = random.Random(semilla)
+    hoy = hoy or date.today()
+    periodos = _periodos(hoy, meses)
+    actual = periodos[-1]
+    hash_contrasena = generate_password_hash(CONTRASENA)
+    adjuntos_dir = almacenamiento.Almacenamiento(uploads or path + '.uploads')
+
+    db = database.connect(path)
+    try:
+        migrations.migrate(db)
+        categorias = [row[0] for row in db.execute('SELECT id FROM categorias ORDER BY id')]
+        archivos = _archivos(db, adjuntos_dir, rng)
+        referencias = {clave: 0 for clave, _ in archivos}
+
+        pagos = []
+        omitidos = []
+        total_servicios = 0
+        for u in range(usuarios):
+            user_id = db.execute('''
+                INSERT INTO usuarios (username, password, email, recordatorios_email, recordatorios_modo)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (f'usuario{u:04d}', hash_contrasena, f'usuario{u:04d}@example.com',
+                  1 if rng.random() < 0.7 else 0,
+                  'resumen' if rng.random() < 0.3 else 'individual')).lastrowid
+
+            for s in range(servicios):
+                monto = round(rng.uniform(2000, 90000), 2) if rng.random() < 0.9 else None
+                es_unico = 1 if rng.random() < 0.05 else 0
+                servicio_id = db.execute('''
+                    INSERT INTO servicios (user_id, nombre, dia_vencimiento, monto, medio_pago, categoria_id, es_unico)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (user_id, f'{NOMBRES[s % len(NOMBRES)]} {s // len(NOMBRES) + 1}',
+                      rng.randint(1, 28), monto, rng.choice(MEDIOS_PAGO),
+                      rng.choice(categorias), es_unico)).lastrowid
+                total_servicios += 1
+
+                # Los servicios únicos se pagan una vez; el resto casi todos los meses
+                # con montos que varían alrededor del monto cargado
+                base = monto or rng.uniform(2000, 90000)
+                for periodo in ([rng.choice(periodos)] if es_unico else periodos):
+                    if periodo == actual:
+                        if rng.random() < 0.03:
+                            omitidos.append((servicio_id, user_id, periodo))
+                            continue
+                        if rng.random() < 0.5:
+                            continue
+                    elif rng.random() < 0.1:
+                        continue
+
+                    fila = [servicio_id, user_id, periodo,
+                            round(base * rng.uniform(0.8, 1.25), 2),
+                            f'{periodo}-{rng.randint(1, 28):02d} 12:00:00',
+                            rng.choice(MEDIOS_PAGO)]
+                    for prefix, fraccion in (('invoice', adjuntos), ('bill', adjuntos / 2)):
+                        if rng.random() < fraccion:
+                            clave, size = rng.choice(archivos)
+                            referencias[clave] += 1
+                            fila += [f'{prefix}_{len(pagos)}.pdf', clave, size]
+                        else:
+                            fila += [None, None, None]
+                    pagos.append(fila)
+
+        db.executemany('''
+            INSERT INTO pagos (servicio_id, user_id, periodo, monto, fecha_pago, metodo_pago,
+                               invoice_filename, invoice_path, invoice_size,
+                               bill_filename, bill_path, bill_size)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', pagos)
+        db.executemany('''
+            INSERT INTO servicios_omitidos (servicio_id, user_id, periodo)
+            VALUES (?, ?, ?)
+        ''', omitidos)
+        db.executemany('UPDATE adjuntos SET referencias = ? WHERE clave = ?',
+                       [(cantidad, clave) for clave, cantidad in referencias.items()])
+        db.commit()
+        db.execute('ANALYZE')
+    finally:
+        db.close()
+
+    return {
+        'usuarios': usuarios,
+        'servicios': total_servicios,
+        'pagos': len(pagos),
+        'adjuntos': sum(referencias.values()),
+        'omitidos': len(omitidos),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Genera una base de datos sintética')
+    parser.add_argument('salida', help='Ruta de la base a crear')
+    parser.add_argument('--escala', choices=ESCALAS, default='chica')
+    parser.add_argument('--usuarios', type=int)
+    parser.add_argument('--servicios', type=int, help='Servicios por usuario')
+    parser.add_argument('--meses', type=int)
+    parser.add_argument('--adjuntos', type=float, help='Fracción de pagos con comprobante')
+    parser.add_argument('--semilla', type=int, default=SEMILLA)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    escala = dict(ESCALAS[args.escala])
+    for campo in escala:
+        if getattr(args, campo) is not None:
+            escala[campo] = getattr(args, campo)
+
+    inicio = time.perf_counter()
+    cantidades = generar(args.salida, semilla=args.semilla, **escala)
+    print(', '.join(f'{valor} {campo}' for campo, valor in cantidades.items()),
+          f'en {time.perf_counter() - inicio:.1f}s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
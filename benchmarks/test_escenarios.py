@@ -0,0 +1,81 @@
+"""
+Escenarios de los benchmarks sobre la base sintética (ver conftest.py)
+
+Las rutas se piden con el test client de Flask como usuario0000; los
+recordatorios se miden llamando directo a reminders. Cada escenario tiene
+un máximo de sentencias SQL (no depende de la máquina ni de la escala) y un
+p95 por escala, con margen para máquinas más lentas que la de referencia.
+"""
+
+from datetime import datetime
+
+import pytest
+
+import database
+import dashboard_data
+import datos
+import reminders
+
+
+def _ok(respuesta, status=200):
+    assert respuesta.status_code == status, respuesta.status_code
+    return respuesta
+
+
+def test_dashboard(cliente, medir, presupuesto):
+    # Sin la instantánea en memoria: la consulta del dashboard completa
+    medicion = medir(lambda: _ok(cliente.get('/dashboard')),
+                     preparar=dashboard_data._snapshot_cache.clear)
+    presupuesto(medicion, sentencias=6, p95_ms={'chica': 30, 'mediana': 50, 'grande': 80})
+
+
+def test_dashboard_cacheado(cliente, medir, presupuesto):
+    medicion = medir(lambda: _ok(cliente.get('/dashboard')))
+    presupuesto(medicion, sentencias=2, p95_ms={'chica': 40, 'mediana': 60, 'grande': 60})
+
+
+@pytest.mark.parametrize('filtros', ['', 'metodo_pago=Transferencia', 'categoria_id=1&metodo_pago=Efectivo',
+                                     'periodo={periodo}', 'servicio_id={servicio}'],
+                         ids=['sin_filtros', 'metodo', 'categoria_metodo', 'periodo', 'servicio'])
+def test_historial(cliente, usuario, base, medir, presupuesto, filtros):
+    db = database.connect(base['path'])
+    servicio = db.execute('SELECT MIN(id) FROM servicios WHERE user_id = ?', (usuario['id'],)).fetchone()[0]
+    db.close()
+    url = '/historial?' + filtros.format(periodo=datetime.now().strftime('%Y-%m'), servicio=servicio)
+
+    medicion = medir(lambda: _ok(cliente.get(url)))
+    # Página, totales, categorías y datos_version (las opciones de filtro quedan cacheadas)
+    presupuesto(medicion, sentencias=4, p95_ms={'chica': 30, 'mediana': 40, 'grande': 100})
+
+
+def test_exportar_excel(cliente, medir, presupuesto):
+    medicion = medir(lambda: _ok(cliente.get('/exportar/excel')), rondas=10)
+    presupuesto(medicion, sentencias=2, p95_ms={'chica': 150, 'mediana': 400, 'grande': 1500})
+
+
+@pytest.mark.parametrize('dias', [3, 0], ids=['3_dias', 'vencen_hoy'])
+def test_recordatorios(base, medir, presupuesto, monkeypatch, dias):
+    monkeypatch.setattr(database, 'DATABASE_PATH', base['path'])
+    medicion = medir(lambda: reminders.get_services_needing_reminders(dias))
+    # Abre su propia conexión: los PRAGMA de connect() no pasan por el contador
+    presupuesto(medicion, sentencias=1, p95_ms={'chica': 10, 'mediana': 15, 'grande': 30})
+
+
+def test_login(app, usuario, medir, presupuesto):
+    cliente = app.test_client()
+    formulario = {'username': usuario['username'], 'password': datos.CONTRASENA}
+    medicion = medir(lambda: _ok(cliente.post('/login', data=formulario), 302), rondas=10)
+    # Casi todo es el hash de la contraseña (scrypt), no la base
+    presupuesto(medicion, sentencias=1, p95_ms={'chica': 600, 'mediana': 600, 'grande': 600})
+
+
+def test_registrar_pago(cliente, usuario, base, medir, presupuesto):
+    db = database.connect(base['path'])
+    servicio = db.execute('''
+        SELECT MIN(id) FROM servicios WHERE user_id = ? AND activo = 1 AND es_unico = 0
+    ''', (usuario['id'],)).fetchone()[0]
+    db.close()
+
+    formulario = {'monto': '1234.50', 'metodo_pago': 'Transferencia'}
+    medicion = medir(lambda: _ok(cliente.post(f'/pago/registrar/{servicio}', data=formulario), 302))
+    presupuesto(medicion, sentencias=11, p95_ms={'chica': 30, 'mediana': 30, 'grande': 30})
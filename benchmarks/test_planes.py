@@ -0,0 +1,20 @@
+"""
+Planes de las consultas frecuentes sobre la base sintética
+
+Lo mismo que `python migrations.py --planes`, pero con las estadísticas de
+ANALYZE de una base con datos: si una migración o un cambio en una consulta
+hace que SQLite recorra una tabla completa, el test lo muestra.
+"""
+
+import database
+import migrations
+
+
+def test_consultas_frecuentes_usan_indices(base):
+    db = database.connect(base['path'])
+    try:
+        migrations.migrate(db)
+        assert migrations.get_version(db) == migrations.SCHEMA_VERSION
+        assert migrations.check_query_plans(db) == []
+    finally:
+        db.close()
@@ -0,0 +1,62 @@
+"""
+Caché en memoria para datos derivados de la base
+
+Cada proceso de la app tiene su propia caché. Para que todos dejen de usar
+lo que cambió sin coordinarse, las claves incluyen usuarios.datos_version,
+que se incrementa en la base con cada escritura (ver
+dashboard_data.invalidar_dashboard): una versión nueva es una clave nueva, y
+las entradas viejas se descartan solas al llenarse la caché.
+"""
+
+import threading
+from collections import OrderedDict
+
+_FALTANTE = object()
+
+
+class LRUCache:
+    """
+    Diccionario acotado a `maxsize` entradas que descarta la menos usada
+
+    Args:
+        maxsize: Máximo de entradas
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave, default=None):
+        with self._lock:
+            valor = self._datos.get(clave, _FALTANTE)
+            if valor is _FALTANTE:
+                return default
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def get_or_set(self, clave, calcular):
+        """Devuelve el valor guardado o lo calcula con `calcular()` y lo guarda"""
+        valor = self.get(clave, _FALTANTE)
+        if valor is _FALTANTE:
+            valor = calcular()
+            self.set(clave, valor)
+        return valor
+
+    def delete(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
@@ -0,0 +1,123 @@
+"""
+Envío de emails por SMTP con la biblioteca estándar
+
+Reemplaza a Flask-Mail para los recordatorios: no necesita una app de Flask
+ni un app context, así run_reminders.py no carga el stack web. Mensaje y
+Correo tienen la misma forma que flask_mail.Message y flask_mail.Mail
+(subject, recipients, body, html, msgId; send() y connect()), que es lo que
+usan reminders.py y reminder_outbox.py.
+"""
+
+import smtplib
+from email.message import EmailMessage
+from email.utils import formataddr, formatdate, make_msgid
+
+# Segundos de espera de la conexión SMTP
+TIMEOUT = 30
+
+
+class Mensaje:
+    """Email con texto y HTML alternativos"""
+
+    def __init__(self, subject, recipients, body=None, html=None, sender=None):
+        self.subject = subject
+        self.recipients = list(recipients)
+        self.body = body
+        self.html = html
+        self.sender = sender
+        self.msgId = make_msgid(domain='billetera-mata-galan')
+
+    def como_email(self, remitente):
+        """EmailMessage listo para SMTP.send_message(); `remitente` si no tiene sender"""
+        sender = self.sender or remitente
+        if isinstance(sender, (tuple, list)):
+            sender = formataddr(tuple(sender))
+
+        email = EmailMessage()
+        email['Subject'] = self.subject
+        email['From'] = sender
+        email['To'] = ', '.join(self.recipients)
+        email['Date'] = formatdate(localtime=True)
+        email['Message-ID'] = self.msgId
+        email.set_content(self.body or '')
+        if self.html:
+            email.add_alternative(self.html, subtype='html')
+        return email
+
+
+class Conexion:
+    """
+    Sesión SMTP abierta para enviar varios mensajes
+
+    Se reconecta sola después de `max_emails` mensajes (Gmail corta las
+    sesiones alrededor de los 100).
+    """
+
+    def __init__(self, correo):
+        self.correo = correo
+        self.enviados = 0
+        self.smtp = None
+
+    def __enter__(self):
+        self.abrir()
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def abrir(self):
+        config = self.correo.config
+        if config.get('MAIL_USE_SSL'):
+            smtp = smtplib.SMTP_SSL(config['MAIL_SERVER'], config['MAIL_PORT'], timeout=TIMEOUT)
+        else:
+            smtp = smtplib.SMTP(config['MAIL_SERVER'], config['MAIL_PORT'], timeout=TIMEOUT)
+        try:
+            if config.get('MAIL_USE_TLS'):
+                smtp.starttls()
+            if config.get('MAIL_USERNAME') and config.get('MAIL_PASSWORD'):
+                smtp.login(config['MAIL_USERNAME'], config['MAIL_PASSWORD'])
+        except Exception:
+            smtp.close()
+            raise
+        self.smtp = smtp
+        self.enviados = 0
+
+    def cerrar(self):
+        if self.smtp is None:
+            return
+        try:
+            self.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            # El servidor ya cortó: no hay nada que cerrar ordenadamente
+            self.smtp.close()
+        self.smtp = None
+
+    def send(self, mensaje):
+        max_emails = self.correo.config.get('MAIL_MAX_EMAILS')
+        if max_emails and self.enviados >= max_emails:
+            self.cerrar()
+            self.abrir()
+        self.smtp.send_message(mensaje.como_email(self.correo.config.get('MAIL_DEFAULT_SENDER')),
+                               to_addrs=mensaje.recipients)
+        self.enviados += 1
+
+
+class Correo:
+    """
+    Transporte SMTP configurado con las claves MAIL_* de email_config.EMAIL_CONFIG
+
+    Usage:
+        correo = Correo(EMAIL_CONFIG)
+        with correo.connect() as conexion:
+            conexion.send(Mensaje('Asunto', ['a@ejemplo.com'], body='Hola'))
+    """
+
+    def __init__(self, config):
+        self.config = dict(config)
+
+    def connect(self):
+        return Conexion(self)
+
+    def send(self, mensaje):
+        with self.connect() as conexion:
+            conexion.send(mensaje)
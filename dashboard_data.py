@@ -0,0 +1,183 @@
+"""
+Capa de datos del dashboard para Billetera Mata Galán
+Calcula servicios, pagos del mes, omisiones, estados y totales con una sola consulta
+
+Las instantáneas se cachean por (usuario, versión de datos, período, día,
+filtros). Las rutas que escriben emiten eventos que incrementan
+usuarios.datos_version, así que todos los procesos dejan de usar la
+instantánea vieja sin tener que coordinarse.
+"""
+
+import os
+from datetime import datetime
+import eventos
+import pronostico
+from cache import LRUCache
+
+# Una sola consulta: lo pagado en el período sale de pagos_resumen (una fila
+# por servicio, mantenida por triggers) y las omisiones de un LEFT JOIN,
+# sin consultas por servicio
+DASHBOARD_QUERY = '''
+    SELECT s.id, s.nombre, s.dia_vencimiento, s.monto, s.medio_pago,
+           s.categoria_id, s.es_unico,
+           c.nombre as categoria_nombre, c.color as categoria_color, c.icono as categoria_icono,
+           COALESCE(r.total, 0) as monto_pagado,
+           o.id IS NOT NULL as omitido
+    FROM servicios s
+    LEFT JOIN categorias c ON s.categoria_id = c.id
+    LEFT JOIN pagos_resumen r
+      ON r.user_id = ? AND r.periodo = ? AND r.servicio_id = s.id
+    LEFT JOIN servicios_omitidos o ON o.servicio_id = s.id AND o.periodo = ?
+    WHERE s.user_id = ? AND s.activo = 1
+'''
+
+
+MEDIOS_PAGO_QUERY = '''
+    SELECT DISTINCT medio_pago
+    FROM servicios
+    WHERE user_id = ? AND activo = 1 AND medio_pago IS NOT NULL AND medio_pago != ''
+    ORDER BY medio_pago
+'''
+
+# Instantáneas guardadas entre todos los usuarios del proceso
+DASHBOARD_CACHE_SIZE = int(os.environ.get('DASHBOARD_CACHE_SIZE', 512))
+
+_snapshot_cache = LRUCache(maxsize=DASHBOARD_CACHE_SIZE)
+
+
+def calcular_estado(dia_vencimiento, monto, monto_pagado_mes_actual, hoy=None):
+    """Devuelve (estado, prioridad) de un servicio para el mes actual"""
+    if not monto or monto == 0:
+        return 'sin_monto', 4
+
+    if monto_pagado_mes_actual and monto_pagado_mes_actual >= monto:
+        return 'pagado', 5
+
+    if dia_vencimiento:
+        if hoy is None:
+            hoy = datetime.now().day
+        if dia_vencimiento < hoy:
+            return 'vencido', 1
+        elif dia_vencimiento - hoy <= 3:
+            return 'por_vencer', 2
+
+    return 'pendiente', 3
+
+
+def obtener_dashboard(db, user_id, periodo=None, categoria_id=None, medio_pago=None):
+    """
+    Arma los datos del dashboard de un usuario
+
+    Args:
+        db: Conexión SQLite con row_factory = sqlite3.Row
+        user_id: ID del usuario
+        periodo: Período 'YYYY-MM' (por defecto el actual)
+        categoria_id: Filtro opcional por categoría
+        medio_pago: Filtro opcional por medio de pago
+
+    Returns:
+        Dict con 'servicios' (ordenados por prioridad), 'total_mes',
+        'total_pagado' y 'pendiente'. Cada servicio trae 'estimado', el monto
+        esperado según sus pagos anteriores (None si no hay historia)
+    """
+    ahora = datetime.now()
+    if periodo is None:
+        periodo = ahora.strftime('%Y-%m')
+    hoy = ahora.day
+
+    query = DASHBOARD_QUERY
+    params = [user_id, periodo, periodo, user_id]
+
+    if categoria_id:
+        query += ' AND s.categoria_id = ?'
+        params.append(categoria_id)
+
+    if medio_pago:
+        query += ' AND s.medio_pago = ?'
+        params.append(medio_pago)
+
+    estimados = pronostico.obtener_estimados(db, user_id)
+
+    servicios = []
+    total_mes = 0
+    total_pagado = 0
+
+    for row in db.execute(query, params):
+        omitido = bool(row['omitido'])
+        monto_pagado = row['monto_pagado']
+
+        if omitido:
+            # Prioridad baja para que aparezca al final
+            estado, prioridad = 'omitido', 6
+        else:
+            estado, prioridad = calcular_estado(row['dia_vencimiento'], row['monto'], monto_pagado, hoy)
+
+        servicios.append({
+            'id': row['id'],
+            'nombre': row['nombre'],
+            'dia_vencimiento': row['dia_vencimiento'],
+            'monto': row['monto'] or 0,
+            'medio_pago': row['medio_pago'],
+            'monto_pagado': monto_pagado,
+            'estimado': estimados.get(row['id']),
+            'estado': estado,
+            'prioridad': prioridad,
+            'categoria_id': row['categoria_id'],
+            'categoria_nombre': row['categoria_nombre'],
+            'categoria_color': row['categoria_color'],
+            'categoria_icono': row['categoria_icono'],
+            'es_unico': row['es_unico'],
+            'omitido': omitido
+        })
+
+        # No sumar al total si está omitido
+        if row['monto'] and not omitido:
+            total_mes += row['monto']
+            total_pagado += monto_pagado
+
+    # Ordenar por prioridad, día de vencimiento y nombre
+    servicios.sort(key=lambda x: (x['prioridad'], x['dia_vencimiento'] or 999, x['nombre']))
+
+    return {
+        'servicios': servicios,
+        'total_mes': total_mes,
+        'total_pagado': total_pagado,
+        'pendiente': total_mes - total_pagado
+    }
+
+
+def obtener_dashboard_cacheado(db, user_id, categoria_id=None, medio_pago=None):
+    """
+    obtener_dashboard() del período actual más los medios de pago del filtro,
+    servidos desde memoria mientras no cambien los datos ni el día
+
+    Returns:
+        Dict de obtener_dashboard() con 'medios_pago' agregado
+    """
+    version = db.execute('SELECT datos_version FROM usuarios WHERE id = ?', (user_id,)).fetchone()
+    ahora = datetime.now()
+    periodo = ahora.strftime('%Y-%m')
+    clave = (user_id, version[0] if version else 0, periodo, ahora.day, categoria_id, medio_pago)
+
+    def calcular():
+        datos = obtener_dashboard(db, user_id, periodo, categoria_id, medio_pago)
+        datos['medios_pago'] = [dict(row) for row in db.execute(MEDIOS_PAGO_QUERY, (user_id,))]
+        return datos
+
+    return _snapshot_cache.get_or_set(clave, calcular)
+
+
+@eventos.suscribir(eventos.PAGOS_MODIFICADOS)
+@eventos.suscribir(eventos.SERVICIOS_MODIFICADOS)
+def invalidar_dashboard(db, user_id):
+    """Nueva versión de datos del usuario: las instantáneas anteriores ya no se usan"""
+    with db:
+        db.execute('UPDATE usuarios SET datos_version = datos_version + 1 WHERE id = ?', (user_id,))
+
+
+@eventos.suscribir(eventos.CATEGORIAS_MODIFICADAS)
+def invalidar_todos(db):
+    """Nombres y colores de categorías aparecen en el dashboard de todos los usuarios"""
+    with db:
+        db.execute('UPDATE usuarios SET datos_version = datos_version + 1')
+    _snapshot_cache.clear()
@@ -0,0 +1,135 @@
+"""
+Conexiones SQLite compartidas por la app, los recordatorios y las migraciones
+
+- connect(): abre una conexión con los PRAGMA de rendimiento aplicados
+- ConnectionPool: conexiones reutilizables por hilo, con un máximo de ociosas
+- get_db(): una conexión por request/app context (Flask `g`)
+
+Todas las conexiones son instrumentacion.ConexionInstrumentada: cada
+sentencia queda medida (ver instrumentacion.py).
+"""
+
+import os
+import sqlite3
+import threading
+import instrumentacion
+
+DATABASE_PATH = os.environ.get('DATABASE_PATH', 'database/gastos.db')
+
+# Milisegundos que una conexión espera un lock antes de fallar con "database is locked"
+BUSY_TIMEOUT_MS = int(os.environ.get('DATABASE_BUSY_TIMEOUT', 5000))
+
+# Conexiones ociosas que conserva cada hilo
+POOL_MAX_IDLE = int(os.environ.get('DATABASE_POOL_SIZE', 2))
+
+PRAGMAS = (
+    # WAL: los lectores no se bloquean mientras el job de recordatorios escribe
+    'PRAGMA journal_mode = WAL',
+    # Con WAL, NORMAL es seguro ante caídas de la app y evita un fsync por commit
+    'PRAGMA synchronous = NORMAL',
+    f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}',
+    'PRAGMA mmap_size = 67108864',  # 64MB
+    'PRAGMA cache_size = -8000',  # ~8MB de caché de páginas
+    'PRAGMA temp_store = MEMORY',
+)
+
+
+def connect(path=None):
+    """Abre una conexión nueva con row_factory = sqlite3.Row y los PRAGMA aplicados"""
+    path = path or DATABASE_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    db = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000,
+                         factory=instrumentacion.ConexionInstrumentada)
+    db.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        db.execute(pragma)
+    return db
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones por hilo
+
+    SQLite no permite compartir una conexión entre hilos, así que cada hilo
+    reutiliza sus propias conexiones ociosas (hasta `max_idle`) y cierra el resto.
+    """
+
+    def __init__(self, path, max_idle=POOL_MAX_IDLE):
+        self.path = path
+        self.max_idle = max_idle
+        self._local = threading.local()
+
+    def _idle(self):
+        idle = getattr(self._local, 'idle', None)
+        if idle is None:
+            idle = self._local.idle = []
+        return idle
+
+    def acquire(self):
+        """Devuelve una conexión ociosa del hilo actual o abre una nueva"""
+        idle = self._idle()
+        if idle:
+            return idle.pop()
+        return connect(self.path)
+
+    def release(self, db):
+        """Devuelve la conexión al pool, descartando cualquier transacción sin commit"""
+        db.terminar_consultas()
+        db.registro = None
+        if db.in_transaction:
+            db.rollback()
+
+        idle = self._idle()
+        if len(idle) < self.max_idle:
+            idle.append(db)
+        else:
+            db.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=None):
+    """Pool compartido para una ruta de base de datos"""
+    path = path or DATABASE_PATH
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path)
+        return pool
+
+
+def get_db():
+    """
+    Conexión del request (o app context) actual
+
+    Se toma del pool la primera vez que se pide y se devuelve al pool en el
+    teardown; las llamadas siguientes dentro del mismo request la reutilizan.
+    """
+    from flask import g, current_app
+
+    if 'db' not in g:
+        g.db_pool = get_pool(current_app.config['DATABASE'])
+        g.db = g.db_pool.acquire()
+        # Las consultas del request se juntan en g.sql (ver instrumentacion.init_app)
+        g.db.registro = g.setdefault('sql', instrumentacion.Registro())
+    return g.db
+
+
+def close_db(exception=None):
+    """Devuelve la conexión del contexto actual al pool"""
+    from flask import g
+
+    db = g.pop('db', None)
+    pool = g.pop('db_pool', None)
+    if db is not None:
+        pool.release(db)
+
+
+def init_app(app):
+    """Registra la liberación de la conexión al final de cada request"""
+    app.teardown_appcontext(close_db)
@@ -4,17 +4,26 @@ Environment variables required:
 - EMAIL_USER: Gmail address (e.g., your.email@gmail.com)
 - EMAIL_PASSWORD: Gmail App Password (NOT regular password!)
 - EMAIL_FROM_NAME: Display name for sender (optional, defaults to "Billetera Mata Galán")
+
+Optional overrides (e.g. to point at a local stub SMTP server while testing):
+- MAIL_SERVER / MAIL_PORT / MAIL_USE_TLS: SMTP host, port and STARTTLS (1/0)
+- MAIL_MAX_EMAILS: Messages per SMTP connection before reconnecting (default 90)
+- REMINDERS_CONCURRENCY: Parallel SMTP connections used for reminders (default 4)
+- REMINDERS_RATE_LIMIT: Max reminder emails per second, 0 = unlimited (default 5)
+- APP_URL: Link shown in reminder emails (templates/email/)
 """
 
 import os
-from flask_mail import Mail, Message
+from correo import Correo
 
 # Email configuration
 EMAIL_CONFIG = {
-    'MAIL_SERVER': 'smtp.gmail.com',
-    'MAIL_PORT': 587,
-    'MAIL_USE_TLS': True,
+    'MAIL_SERVER': os.environ.get('MAIL_SERVER', 'smtp.gmail.com'),
+    'MAIL_PORT': int(os.environ.get('MAIL_PORT', 587)),
+    'MAIL_USE_TLS': os.environ.get('MAIL_USE_TLS', '1') == '1',
     'MAIL_USE_SSL': False,
+    # Gmail closes sessions after ~100 messages; the connection reconnects at this count
+    'MAIL_MAX_EMAILS': int(os.environ.get('MAIL_MAX_EMAILS', 90)),
     'MAIL_USERNAME': os.environ.get('EMAIL_USER'),
     'MAIL_PASSWORD': os.environ.get('EMAIL_PASSWORD'),
     'MAIL_DEFAULT_SENDER': (
@@ -23,18 +32,23 @@ EMAIL_CONFIG = {
     )
 }
 
-def init_mail(app):
-    """
-    Initialize Flask-Mail with the app
-    Usage: mail = init_mail(app)
+# Reminder dispatch configuration
+DISPATCH_CONFIG = {
+    'concurrency': int(os.environ.get('REMINDERS_CONCURRENCY', 4)),
+    'rate_limit': float(os.environ.get('REMINDERS_RATE_LIMIT', 5)),
+}
+
+def init_mail(app=None):
     """
-    # Update app config
-    app.config.update(EMAIL_CONFIG)
+    SMTP transport for reminders (see correo.py)
+    Usage: mail = init_mail()
 
-    # Create Mail instance
-    mail = Mail(app)
+    No Flask app is needed; if one is given its config gets the MAIL_* keys too.
+    """
+    if app is not None:
+        app.config.update(EMAIL_CONFIG)
 
-    return mail
+    return Correo(EMAIL_CONFIG)
 
 def validate_email_config():
     """
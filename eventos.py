@@ -0,0 +1,32 @@
+"""
+Avisos internos de cambios en los datos
+
+Las rutas que escriben emiten un evento después del commit y los módulos
+que guardan datos derivados (cachés del dashboard y del historial) se
+suscriben para invalidarlos, sin que las rutas tengan que conocerlos.
+"""
+
+from collections import defaultdict
+
+# Argumentos: db, user_id
+PAGOS_MODIFICADOS = 'pagos_modificados'
+SERVICIOS_MODIFICADOS = 'servicios_modificados'
+
+# Argumentos: db (las categorías son compartidas por todos los usuarios)
+CATEGORIAS_MODIFICADAS = 'categorias_modificadas'
+
+_suscriptores = defaultdict(list)
+
+
+def suscribir(evento, funcion=None):
+    """Registra `funcion` para `evento`; se puede usar como decorador"""
+    if funcion is None:
+        return lambda f: suscribir(evento, f)
+    _suscriptores[evento].append(funcion)
+    return funcion
+
+
+def emitir(evento, **datos):
+    """Llama a los suscriptores de `evento` en el orden en que se registraron"""
+    for funcion in _suscriptores[evento]:
+        funcion(**datos)
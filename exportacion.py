@@ -0,0 +1,120 @@
+"""
+Exportación de datos de Billetera Mata Galán a Excel y CSV
+
+Las filas salen directo del cursor de SQLite y se escriben a medida que se
+leen: el libro de Excel se arma en modo write-only sobre un archivo temporal
+y el CSV se envía en bloques, así la memoria no crece con la cantidad de filas.
+"""
+
+import csv
+import io
+import tempfile
+from datetime import datetime, timedelta
+from dashboard_data import DASHBOARD_QUERY, calcular_estado
+
+ENCABEZADOS_ESTADO = ('Servicio', 'Vencimiento', 'Monto', 'Pagado', 'Estado', 'Medio de Pago')
+
+ENCABEZADOS_PAGOS = ('Fecha', 'Período', 'Servicio', 'Categoría', 'Monto', 'Método de Pago')
+
+# Historial de pagos en un rango de fechas (usa idx_pagos_user_fecha)
+PAGOS_QUERY = '''
+    SELECT p.fecha_pago, p.periodo, s.nombre as servicio_nombre,
+           c.nombre as categoria_nombre, p.monto, p.metodo_pago
+    FROM pagos p
+    JOIN servicios s ON p.servicio_id = s.id
+    LEFT JOIN categorias c ON s.categoria_id = c.id
+    WHERE p.user_id = ? AND p.fecha_pago >= ? AND p.fecha_pago < ?
+    ORDER BY p.fecha_pago
+'''
+
+# Filas de CSV por bloque enviado
+CSV_FILAS_POR_BLOQUE = 500
+
+
+def filas_estado(db, user_id):
+    """Estado del mes actual de cada servicio activo, ordenado por nombre"""
+    periodo = datetime.now().strftime('%Y-%m')
+    hoy = datetime.now().day
+
+    for row in db.execute(DASHBOARD_QUERY + ' ORDER BY s.nombre', (user_id, periodo, periodo, user_id)):
+        if row['omitido']:
+            estado = 'omitido'
+        else:
+            estado, _ = calcular_estado(row['dia_vencimiento'], row['monto'], row['monto_pagado'], hoy)
+
+        yield (
+            row['nombre'],
+            row['dia_vencimiento'] or '',
+            row['monto'] or 0,
+            row['monto_pagado'],
+            estado.upper().replace('_', ' '),
+            row['medio_pago'] or ''
+        )
+
+
+def filas_pagos(db, user_id, desde=None, hasta=None):
+    """
+    Pagos registrados entre `desde` y `hasta` (datetime.date, inclusive)
+
+    Sin fechas se exporta el historial completo.
+    """
+    inicio = desde.isoformat() if desde else '0000-01-01'
+    fin = (hasta + timedelta(days=1)).isoformat() if hasta else '9999-12-31'
+
+    for row in db.execute(PAGOS_QUERY, (user_id, inicio, fin)):
+        yield (
+            row['fecha_pago'],
+            row['periodo'],
+            row['servicio_nombre'],
+            row['categoria_nombre'] or '',
+            row['monto'],
+            row['metodo_pago'] or ''
+        )
+
+
+def escribir_excel(hojas):
+    """
+    Arma un .xlsx en modo write-only
+
+    Args:
+        hojas: Lista de (titulo, encabezados, filas); `filas` puede ser un generador
+
+    Returns:
+        Archivo temporal posicionado al inicio (se borra al cerrarlo)
+    """
+    # openpyxl es lento de importar y solo se usa acá: se carga al primer export
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for titulo, encabezados, filas in hojas:
+        hoja = workbook.create_sheet(titulo)
+        hoja.append(encabezados)
+        for fila in filas:
+            hoja.append(fila)
+
+    archivo = tempfile.TemporaryFile()
+    workbook.save(archivo)
+    archivo.seek(0)
+    return archivo
+
+
+def generar_csv(encabezados, filas, filas_por_bloque=CSV_FILAS_POR_BLOQUE):
+    """
+    Genera el CSV en bloques de texto para una respuesta en streaming
+
+    El primer bloque lleva BOM para que Excel reconozca el UTF-8.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    buffer.write('\ufeff')
+    writer.writerow(encabezados)
+
+    for i, fila in enumerate(filas, 1):
+        writer.writerow(fila)
+        if i % filas_por_bloque == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
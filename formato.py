@@ -0,0 +1,23 @@
+"""
+Formato de números al estilo español, compartido por la web y los emails
+"""
+
+# Intercambia separadores: 1,234.56 (inglés) -> 1.234,56 (español)
+_SEPARADORES = str.maketrans(',.', '.,')
+
+
+def spanish_number(value):
+    """Formatea números al estilo español: 1.234,56 o 1.234 si no hay decimales"""
+    if value is None:
+        return '0'
+
+    num = float(value)
+
+    if num.is_integer():
+        return f'{int(num):,}'.replace(',', '.')
+    return f'{num:,.2f}'.translate(_SEPARADORES)
+
+
+def monto(value):
+    """Monto con signo pesos y siempre dos decimales: $1.234,56"""
+    return f'${float(value or 0):,.2f}'.translate(_SEPARADORES)
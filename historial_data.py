@@ -0,0 +1,172 @@
+"""
+Capa de datos del historial de pagos para Billetera Mata Galán
+
+Paginación por cursor sobre (fecha_pago, id): cada página sigue al último
+pago de la anterior usando idx_pagos_user_fecha, así que pedir una página
+vieja cuesta lo mismo que la primera. El total y la cantidad se calculan en
+SQL sobre todo el filtro, no sobre la página.
+"""
+
+import base64
+from cache import LRUCache
+
+PAGOS_POR_PAGINA = 50
+
+HISTORIAL_QUERY = '''
+    SELECT p.*, s.nombre as servicio_nombre, c.nombre as categoria_nombre, c.color as categoria_color
+    FROM pagos p
+    JOIN servicios s ON p.servicio_id = s.id
+    LEFT JOIN categorias c ON s.categoria_id = c.id
+    WHERE p.user_id = ?
+'''
+
+TOTALES_QUERY = '''
+    SELECT COUNT(*) as cantidad, COALESCE(SUM(p.monto), 0) as total
+    FROM pagos p
+    JOIN servicios s ON p.servicio_id = s.id
+    WHERE p.user_id = ?
+'''
+
+# Opciones de los filtros: servicios, períodos y métodos de pago con pagos del usuario
+SERVICIOS_QUERY = '''
+    SELECT DISTINCT s.id, s.nombre
+    FROM servicios s
+    JOIN pagos p ON s.id = p.servicio_id
+    WHERE p.user_id = ?
+    ORDER BY s.nombre
+'''
+
+PERIODOS_QUERY = '''
+    SELECT DISTINCT periodo
+    FROM pagos
+    WHERE user_id = ?
+    ORDER BY periodo DESC
+'''
+
+METODOS_QUERY = '''
+    SELECT DISTINCT metodo_pago
+    FROM pagos
+    WHERE user_id = ? AND metodo_pago IS NOT NULL AND metodo_pago != ''
+    ORDER BY metodo_pago
+'''
+
+# Opciones de los filtros por usuario y versión de sus datos (usuarios.datos_version,
+# que se incrementa al registrar pagos o modificar servicios en cualquier proceso)
+_opciones_cache = LRUCache(maxsize=256)
+
+
+def codificar_cursor(pago):
+    """Cursor opaco que apunta al pago `pago` (el último de una página)"""
+    valor = f"{pago['fecha_pago']}|{pago['id']}"
+    return base64.urlsafe_b64encode(valor.encode()).decode()
+
+
+def decodificar_cursor(cursor):
+    """Devuelve (fecha_pago, id) o None si el cursor no es válido"""
+    try:
+        fecha_pago, pago_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+        return fecha_pago, int(pago_id)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def _filtros_sql(servicio_id=None, periodo=None, categoria_id=None, metodo_pago=None):
+    condiciones = ''
+    params = []
+
+    if servicio_id:
+        condiciones += ' AND p.servicio_id = ?'
+        params.append(servicio_id)
+
+    if periodo:
+        condiciones += ' AND p.periodo = ?'
+        params.append(periodo)
+
+    if categoria_id:
+        condiciones += ' AND s.categoria_id = ?'
+        params.append(categoria_id)
+
+    if metodo_pago:
+        condiciones += ' AND p.metodo_pago = ?'
+        params.append(metodo_pago)
+
+    return condiciones, params
+
+
+def armar_consultas(user_id, filtros=None, posicion=None, limite=PAGOS_POR_PAGINA):
+    """
+    SQL y parámetros de una página del historial y de sus totales
+
+    Args:
+        posicion: (fecha_pago, id) del último pago de la página anterior o None
+
+    Returns:
+        ((query, params) de la página, (query, params) de los totales)
+    """
+    condiciones, params = _filtros_sql(**(filtros or {}))
+
+    query = HISTORIAL_QUERY + condiciones
+    page_params = [user_id] + params
+
+    if posicion:
+        query += ' AND (p.fecha_pago, p.id) < (?, ?)'
+        page_params.extend(posicion)
+
+    # Un pago de más para saber si hay otra página
+    query += ' ORDER BY p.fecha_pago DESC, p.id DESC LIMIT ?'
+    page_params.append(limite + 1)
+
+    return (query, page_params), (TOTALES_QUERY + condiciones, [user_id] + params)
+
+
+def obtener_historial(db, user_id, filtros=None, cursor=None, limite=PAGOS_POR_PAGINA):
+    """
+    Una página del historial de pagos, del más reciente al más viejo
+
+    Args:
+        db: Conexión SQLite con row_factory = sqlite3.Row
+        user_id: ID del usuario
+        filtros: Dict opcional con servicio_id, periodo, categoria_id y metodo_pago
+        cursor: Cursor de codificar_cursor() (None = primera página)
+        limite: Pagos por página
+
+    Returns:
+        Dict con 'pagos', 'total' y 'cantidad' (de todo el filtro) y
+        'siguiente' (cursor de la página siguiente o None)
+    """
+    posicion = decodificar_cursor(cursor) if cursor else None
+    pagina, totales = armar_consultas(user_id, filtros, posicion, limite)
+
+    pagos = db.execute(*pagina).fetchall()
+    siguiente = None
+    if len(pagos) > limite:
+        pagos = pagos[:limite]
+        siguiente = codificar_cursor(pagos[-1])
+
+    totales = db.execute(*totales).fetchone()
+
+    return {
+        'pagos': pagos,
+        'total': totales['total'],
+        'cantidad': totales['cantidad'],
+        'siguiente': siguiente
+    }
+
+
+def _cargar_opciones(db, user_id):
+    servicios = db.execute(SERVICIOS_QUERY, (user_id,)).fetchall()
+    periodos = db.execute(PERIODOS_QUERY, (user_id,)).fetchall()
+    metodos_pago = db.execute(METODOS_QUERY, (user_id,)).fetchall()
+
+    return {
+        'servicios': [dict(row) for row in servicios],
+        'periodos': [dict(row) for row in periodos],
+        'metodos_pago': [dict(row) for row in metodos_pago]
+    }
+
+
+def opciones_filtro(db, user_id):
+    """Servicios, períodos y métodos de pago con pagos del usuario (cacheados)"""
+    version = db.execute('SELECT datos_version FROM usuarios WHERE id = ?', (user_id,)).fetchone()
+    clave = (user_id, version[0] if version else 0)
+    return _opciones_cache.get_or_set(clave, lambda: _cargar_opciones(db, user_id))
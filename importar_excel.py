@@ -1,156 +1,494 @@
+#!/usr/bin/env python3
 """
-Script para importar servicios desde el Excel existente a la base de datos
+Importa servicios y pagos desde Excel a la base de datos
+
+Entiende dos formatos:
+- La planilla original: servicios desde la fila 5 de la hoja activa
+  (A = nombre, B = día de vencimiento, C = monto, F = medio de pago) hasta
+  "TOTAL MES".
+- Hojas con encabezados, como las que genera "Exportar Excel": una hoja con
+  Servicio / Vencimiento / Monto / Medio de Pago carga servicios, y una con
+  Fecha o Período / Servicio / Monto / Método de Pago carga el historial de
+  pagos (puede abarcar varios años).
+
+El libro se lee en modo read-only fila por fila, los servicios existentes se
+resuelven con un solo SELECT por usuario y todo se escribe en una transacción
+con executemany. Importar dos veces el mismo archivo no duplica nada: los
+servicios se actualizan por nombre y solo se agregan los pagos que faltan.
+Con --dry-run la base se abre en solo lectura: ni se migra ni se escribe.
+
+Usage:
+    python importar_excel.py planilla.xlsx --usuario juan
+    python importar_excel.py planilla.xlsx --usuario juan --dry-run
+    python importar_excel.py planilla.xlsx --usuario nuevo --password secreto
+    python importar_excel.py planilla.xlsx --usuario juan --db /ruta/gastos.db
 """
+
+import argparse
+import os
+import re
 import sqlite3
+import sys
+import unicodedata
+from collections import Counter
+from datetime import date, datetime
 from openpyxl import load_workbook
-import os
+import database
+import dashboard_data  # noqa: F401 (se suscribe a eventos para invalidar el dashboard)
+import eventos
+import formato
+import migrations
+
+# Planilla original
+FILA_INICIO_ORIGINAL = 5
+FIN_ORIGINAL = 'TOTAL MES'
+
+# Filas donde se busca la fila de encabezados de cada hoja
+FILAS_ENCABEZADO = 10
+
+# "1.234" o "12.345.678": puntos de miles sin coma decimal
+MILES_CON_PUNTO = re.compile(r'-?[1-9]\d{0,2}(\.\d{3})+')
+
+# Encabezado (sin tildes, en minúsculas) -> campo
+COLUMNAS = {
+    'servicio': 'nombre',
+    'nombre': 'nombre',
+    'vencimiento': 'dia_vencimiento',
+    'dia de vencimiento': 'dia_vencimiento',
+    'dia': 'dia_vencimiento',
+    'monto': 'monto',
+    'medio de pago': 'medio_pago',
+    'fecha': 'fecha',
+    'fecha de pago': 'fecha',
+    'periodo': 'periodo',
+    'metodo de pago': 'metodo_pago',
+}
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(texto.lower().split())
+
+
+def _texto(valor):
+    if valor is None:
+        return None
+    valor = str(valor).strip()
+    return valor or None
+
+
+def _numero(valor):
+    """Monto de una celda: número, o texto como "1.234,56", "1.234" o "$ 1234.56" """
+    if valor is None or isinstance(valor, (int, float)):
+        return None if valor is None else float(valor)
+    texto = str(valor).replace('$', '').replace(' ', '').strip()
+    if not texto:
+        return None
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    elif MILES_CON_PUNTO.fullmatch(texto):
+        texto = texto.replace('.', '')
+    try:
+        return float(texto)
+    except ValueError:
+        raise ValueError(f'monto "{valor}" no es un número') from None
+
+
+def _dia(valor):
+    if valor in (None, ''):
+        return None
+    try:
+        dia = int(float(valor))
+    except ValueError:
+        raise ValueError(f'día "{valor}" no es un número') from None
+    if not 1 <= dia <= 31:
+        raise ValueError(f'día {dia} fuera de rango')
+    return dia
+
+
+def _fecha(valor):
+    """Fecha de pago como texto 'YYYY-MM-DD HH:MM:SS' (el formato de CURRENT_TIMESTAMP)"""
+    if valor in (None, ''):
+        return None
+    if isinstance(valor, datetime):
+        return valor.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(valor, date):
+        return valor.strftime('%Y-%m-%d 00:00:00')
+    texto = str(valor).strip()
+    try:
+        # ISO (lo que exporta la app): fromisoformat es mucho más rápido que strptime
+        return datetime.fromisoformat(texto).strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(texto, '%d/%m/%Y').strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        raise ValueError(f'fecha "{texto}" no reconocida') from None
+
+
+def _periodo(valor):
+    if valor in (None, ''):
+        return None
+    if isinstance(valor, (datetime, date)):
+        return valor.strftime('%Y-%m')
+    texto = str(valor).strip()
+    anio, _, mes = texto.partition('-')
+    if not (len(anio) == 4 and anio.isdigit() and len(mes) == 2 and mes.isdigit() and 1 <= int(mes) <= 12):
+        raise ValueError(f'período "{texto}" no es AAAA-MM')
+    return texto
+
+
+def _columnas(fila):
+    """{campo: índice} si `fila` parece una fila de encabezados"""
+    columnas = {}
+    for indice, valor in enumerate(fila):
+        campo = COLUMNAS.get(_normalizar(valor)) if valor is not None else None
+        if campo and campo not in columnas:
+            columnas[campo] = indice
+    if 'nombre' in columnas and 'monto' in columnas:
+        return columnas
+    return None
 
-def importar_desde_excel(excel_path, username='admin', password='admin123'):
+
+def _servicio(nombre, dia, monto, medio_pago):
+    return {
+        'nombre': nombre,
+        'dia_vencimiento': _dia(dia),
+        'monto': _numero(monto),
+        'medio_pago': _texto(medio_pago),
+    }
+
+
+def _leer_original(filas, hoja, datos):
+    for numero, fila in enumerate(filas, start=FILA_INICIO_ORIGINAL):
+        nombre = _texto(fila[0] if fila else None)
+        if not nombre or nombre == FIN_ORIGINAL:
+            break
+        celda = lambda i: fila[i] if len(fila) > i else None
+        try:
+            datos['servicios'].append(_servicio(nombre, celda(1), celda(2), celda(5)))
+        except ValueError as e:
+            datos['errores'].append(f'{hoja}!{numero}: {e}')
+
+
+def _leer_con_encabezados(filas, columnas, hoja, fila_encabezado, datos):
+    es_pagos = 'fecha' in columnas or 'periodo' in columnas
+    celda = lambda fila, campo: fila[columnas[campo]] if campo in columnas and len(fila) > columnas[campo] else None
+
+    for numero, fila in enumerate(filas, start=fila_encabezado + 1):
+        nombre = _texto(celda(fila, 'nombre'))
+        if nombre == FIN_ORIGINAL:
+            break
+        if not nombre:
+            continue
+        try:
+            if es_pagos:
+                fecha = _fecha(celda(fila, 'fecha'))
+                periodo = _periodo(celda(fila, 'periodo')) or (fecha[:7] if fecha else None)
+                monto = _numero(celda(fila, 'monto'))
+                if periodo is None:
+                    raise ValueError('falta la fecha o el período')
+                if monto is None:
+                    raise ValueError('falta el monto')
+                datos['pagos'].append({
+                    'servicio': nombre,
+                    'periodo': periodo,
+                    'monto': monto,
+                    # Sin fecha: el primer día del período
+                    'fecha_pago': fecha or f'{periodo}-01 00:00:00',
+                    'metodo_pago': _texto(celda(fila, 'metodo_pago')),
+                })
+            else:
+                datos['servicios'].append(_servicio(
+                    nombre, celda(fila, 'dia_vencimiento'), celda(fila, 'monto'), celda(fila, 'medio_pago')
+                ))
+        except ValueError as e:
+            datos['errores'].append(f'{hoja}!{numero}: {e}')
+
+
+def leer_libro(excel_path):
     """
-    Importa servicios desde el Excel a la base de datos
+    Lee servicios y pagos de un libro de Excel
+
+    Returns:
+        Dict con 'servicios' y 'pagos' (listas de dicts) y 'errores' (filas
+        que no se pudieron leer, como "Hoja!fila: motivo")
     """
-    # Crear la base de datos si no existe
+    datos = {'servicios': [], 'pagos': [], 'errores': []}
+    wb = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            filas = ws.iter_rows(values_only=True)
+            columnas = None
+            fila_encabezado = 0
+            # Buscar la fila de encabezados entre las primeras
+            for fila_encabezado, fila in enumerate(filas, start=1):
+                columnas = _columnas(fila)
+                if columnas or fila_encabezado >= FILAS_ENCABEZADO:
+                    break
+
+            if columnas:
+                _leer_con_encabezados(filas, columnas, ws.title, fila_encabezado, datos)
+            elif ws.title == wb.active.title:
+                filas = ws.iter_rows(min_row=FILA_INICIO_ORIGINAL, values_only=True)
+                _leer_original(filas, ws.title, datos)
+    finally:
+        wb.close()
+    return datos
+
+
+def _clave_pago(servicio_id, periodo, monto, fecha_pago):
+    return (servicio_id, periodo, round(monto, 2), fecha_pago[:16])
+
+
+def planificar(db, user_id, datos):
+    """
+    Compara lo leído con la base, sin escribir
+
+    Returns:
+        Dict con 'servicios_nuevos', 'servicios_cambios' (id, nombre y
+        {campo: (antes, después)}), 'pagos_nuevos', 'pagos_existentes' y
+        'errores'
+    """
+    # Con un servicio activo y otro dado de baja del mismo nombre gana el activo
+    existentes = {
+        row['nombre']: dict(row)
+        for row in db.execute('''
+            SELECT id, nombre, dia_vencimiento, monto, medio_pago
+            FROM servicios WHERE user_id = ?
+            ORDER BY activo = 1, id
+        ''', (user_id,))
+    }
+
+    servicios_nuevos = {}
+    servicios_cambios = {}
+    for servicio in datos['servicios']:
+        actual = existentes.get(servicio['nombre'])
+        if actual is None:
+            servicios_nuevos[servicio['nombre']] = dict(servicio, activo=1)
+            continue
+        cambios = {
+            campo: (actual[campo], valor)
+            for campo, valor in servicio.items()
+            if campo != 'nombre' and valor is not None and valor != actual[campo]
+        }
+        if cambios:
+            servicios_cambios[servicio['nombre']] = {'id': actual['id'], 'nombre': servicio['nombre'], 'cambios': cambios}
+
+    # Servicios que solo aparecen en el historial: se crean dados de baja
+    for pago in datos['pagos']:
+        if pago['servicio'] not in existentes and pago['servicio'] not in servicios_nuevos:
+            servicios_nuevos[pago['servicio']] = {
+                'nombre': pago['servicio'], 'dia_vencimiento': None, 'monto': None,
+                'medio_pago': None, 'activo': 0
+            }
+
+    # Los pagos se comparan como multiconjunto: repetir la importación no
+    # agrega nada, pero dos pagos iguales en la planilla se cargan los dos
+    ya_cargados = Counter(
+        _clave_pago(row['servicio_id'], row['periodo'], row['monto'], row['fecha_pago'] or '')
+        for row in db.execute('''
+            SELECT servicio_id, periodo, monto, fecha_pago
+            FROM pagos WHERE user_id = ?
+        ''', (user_id,))
+    )
+    pagos_nuevos = []
+    pagos_existentes = 0
+    for pago in datos['pagos']:
+        servicio = existentes.get(pago['servicio'])
+        if servicio:
+            clave = _clave_pago(servicio['id'], pago['periodo'], pago['monto'], pago['fecha_pago'])
+            if ya_cargados[clave] > 0:
+                ya_cargados[clave] -= 1
+                pagos_existentes += 1
+                continue
+        pagos_nuevos.append(pago)
+
+    return {
+        'servicios_nuevos': list(servicios_nuevos.values()),
+        'servicios_cambios': list(servicios_cambios.values()),
+        'pagos_nuevos': pagos_nuevos,
+        'pagos_existentes': pagos_existentes,
+        'errores': datos['errores'],
+    }
+
+
+def aplicar(db, user_id, plan):
+    """Escribe el plan en una sola transacción"""
+    with db:
+        db.executemany('''
+            INSERT INTO servicios (user_id, nombre, dia_vencimiento, monto, medio_pago, activo)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [
+            (user_id, s['nombre'], s['dia_vencimiento'], s['monto'], s['medio_pago'], s['activo'])
+            for s in plan['servicios_nuevos']
+        ])
+
+        db.executemany('''
+            UPDATE servicios
+            SET dia_vencimiento = COALESCE(?, dia_vencimiento),
+                monto = COALESCE(?, monto),
+                medio_pago = COALESCE(?, medio_pago)
+            WHERE id = ?
+        ''', [
+            tuple(c['cambios'].get(campo, (None, None))[1] for campo in ('dia_vencimiento', 'monto', 'medio_pago'))
+            + (c['id'],)
+            for c in plan['servicios_cambios']
+        ])
+
+        if plan['pagos_nuevos']:
+            ids = {
+                row['nombre']: row['id']
+                for row in db.execute('''
+                    SELECT id, nombre FROM servicios WHERE user_id = ? ORDER BY activo = 1, id
+                ''', (user_id,))
+            }
+            db.executemany('''
+                INSERT INTO pagos (servicio_id, user_id, periodo, monto, fecha_pago, metodo_pago)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [
+                (ids[p['servicio']], user_id, p['periodo'], p['monto'], p['fecha_pago'], p['metodo_pago'])
+                for p in plan['pagos_nuevos']
+            ])
+
+    # El dashboard de la app (otro proceso) deja de usar su caché
+    eventos.emitir(eventos.SERVICIOS_MODIFICADOS, db=db, user_id=user_id)
+
+
+def _describir_servicio(servicio):
+    partes = []
+    if servicio['dia_vencimiento']:
+        partes.append(f"día {servicio['dia_vencimiento']}")
+    if servicio['monto'] is not None:
+        partes.append(formato.monto(servicio['monto']))
+    if servicio['medio_pago']:
+        partes.append(servicio['medio_pago'])
+    if not servicio['activo']:
+        partes.append('solo historial, inactivo')
+    return f" ({', '.join(partes)})" if partes else ''
+
+
+def imprimir_plan(plan):
+    print(f"\nServicios nuevos: {len(plan['servicios_nuevos'])}")
+    for servicio in plan['servicios_nuevos']:
+        print(f"  + {servicio['nombre']}{_describir_servicio(servicio)}")
+
+    print(f"Servicios actualizados: {len(plan['servicios_cambios'])}")
+    for cambio in plan['servicios_cambios']:
+        detalle = ', '.join(f'{campo}: {antes} → {despues}' for campo, (antes, despues) in cambio['cambios'].items())
+        print(f"  ~ {cambio['nombre']}: {detalle}")
+
+    pagos = plan['pagos_nuevos']
+    rango = f" ({min(p['periodo'] for p in pagos)} a {max(p['periodo'] for p in pagos)})" if pagos else ''
+    print(f"Pagos nuevos: {formato.spanish_number(len(pagos))}{rango}")
+    print(f"Pagos ya cargados: {formato.spanish_number(plan['pagos_existentes'])}")
+
+    if plan['errores']:
+        print(f"Filas con errores: {len(plan['errores'])}")
+        for error in plan['errores']:
+            print(f"  ✗ {error}")
+
+
+def obtener_usuario(db, username, password=None):
+    """ID del usuario; lo crea si no existe y se dio una contraseña"""
     from werkzeug.security import generate_password_hash
-    
-    db_path = 'database/gastos.db'
-    os.makedirs('database', exist_ok=True)
-    
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Crear tablas si no existen
-    cursor.execute('''CREATE TABLE IF NOT EXISTS usuarios (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL,
-        email TEXT,
-        telefono TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )''')
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS servicios (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        nombre TEXT NOT NULL,
-        dia_vencimiento INTEGER,
-        monto REAL,
-        medio_pago TEXT,
-        activo INTEGER DEFAULT 1,
-        FOREIGN KEY (user_id) REFERENCES usuarios (id)
-    )''')
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS pagos (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        servicio_id INTEGER NOT NULL,
-        user_id INTEGER NOT NULL,
-        periodo TEXT NOT NULL,
-        monto REAL NOT NULL,
-        fecha_pago TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        metodo_pago TEXT,
-        FOREIGN KEY (servicio_id) REFERENCES servicios (id),
-        FOREIGN KEY (user_id) REFERENCES usuarios (id)
-    )''')
-    
-    conn.commit()
-    
-    # Crear usuario admin si no existe
-    cursor.execute('SELECT id FROM usuarios WHERE username = ?', (username,))
-    user = cursor.fetchone()
-    
-    if not user:
-        hashed_password = generate_password_hash(password)
-        cursor.execute('INSERT INTO usuarios (username, password) VALUES (?, ?)',
-                      (username, hashed_password))
-        conn.commit()
-        user_id = cursor.lastrowid
-        print(f"✓ Usuario '{username}' creado con contraseña '{password}'")
+
+    user = db.execute('SELECT id FROM usuarios WHERE username = ?', (username,)).fetchone()
+    if user:
+        return user['id'], False
+    if not password:
+        return None, False
+
+    with db:
+        cursor = db.execute('INSERT INTO usuarios (username, password) VALUES (?, ?)',
+                            (username, generate_password_hash(password)))
+    return cursor.lastrowid, True
+
+
+def abrir_solo_lectura(path):
+    """
+    Conexión de solo lectura para --dry-run: no migra ni crea el archivo
+
+    Si la base no existe devuelve una vacía en memoria (todo se muestra como nuevo).
+    """
+    if not os.path.exists(path):
+        db = database.connect(':memory:')
+        migrations.migrate(db)
+        return db
+
+    db = sqlite3.connect(f'file:{os.path.abspath(path)}?mode=ro', uri=True,
+                         timeout=database.BUSY_TIMEOUT_MS / 1000)
+    db.row_factory = sqlite3.Row
+    return db
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Importar servicios y pagos desde Excel')
+    parser.add_argument('excel', nargs='?', default='billetera_mata_galan.xlsx',
+                        help='Archivo .xlsx (por defecto billetera_mata_galan.xlsx)')
+    parser.add_argument('--usuario', required=True,
+                        help='Usuario al que se le importan los datos')
+    parser.add_argument('--password',
+                        help='Crea el usuario con esta contraseña si no existe')
+    parser.add_argument('--db', default=database.DATABASE_PATH,
+                        help='Base de datos (por defecto DATABASE_PATH)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Mostrar qué se importaría sin escribir nada')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if not os.path.exists(args.excel):
+        print(f"Error: No se encuentra el archivo {args.excel}")
+        return 1
+
+    print("=" * 60)
+    print("IMPORTADOR DE DATOS DESDE EXCEL")
+    print("=" * 60)
+    print(f"Base de datos: {args.db}")
+
+    if args.dry_run:
+        db = abrir_solo_lectura(args.db)
+        version = migrations.get_version(db)
+        if version < migrations.SCHEMA_VERSION:
+            print(f"→ La base está en la versión {version}: la importación la migra a la {migrations.SCHEMA_VERSION}")
     else:
-        user_id = user[0]
-        print(f"✓ Usuario '{username}' ya existe")
-    
-    # Cargar Excel
-    print(f"\nLeyendo archivo Excel: {excel_path}")
-    wb = load_workbook(excel_path)
-    ws = wb.active
-    
-    servicios_importados = 0
-    
-    # Leer servicios desde la fila 5 hasta encontrar TOTAL MES
-    for row_idx in range(5, 100):
-        nombre = ws.cell(row=row_idx, column=1).value
-        
-        # Parar cuando lleguemos a TOTAL MES o celda vacía
-        if not nombre or nombre == 'TOTAL MES':
-            break
-        
-        # Saltar filas vacías
-        if nombre.strip() == '':
-            continue
-        
-        dia_vencimiento = ws.cell(row=row_idx, column=2).value
-        monto = ws.cell(row=row_idx, column=3).value
-        medio_pago_col = 6 if ws.max_column >= 6 else None
-        medio_pago = ws.cell(row=row_idx, column=medio_pago_col).value if medio_pago_col else None
-        
-        # Convertir tipos
-        try:
-            dia_vencimiento = int(dia_vencimiento) if dia_vencimiento else None
-        except:
-            dia_vencimiento = None
-        
-        try:
-            monto = float(monto) if monto else None
-        except:
-            monto = None
-        
-        # Verificar si el servicio ya existe
-        cursor.execute('SELECT id FROM servicios WHERE user_id = ? AND nombre = ?',
-                      (user_id, nombre))
-        existe = cursor.fetchone()
-        
-        if not existe:
-            cursor.execute('''
-                INSERT INTO servicios (user_id, nombre, dia_vencimiento, monto, medio_pago)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, nombre, dia_vencimiento, monto, medio_pago))
-            servicios_importados += 1
-            print(f"  ✓ Importado: {nombre}")
+        db = database.connect(args.db)
+        migrations.migrate(db)
+
+    try:
+        if args.dry_run:
+            user = db.execute('SELECT id FROM usuarios WHERE username = ?', (args.usuario,)).fetchone()
+            user_id = user['id'] if user else None
+            if user is None:
+                print(f"→ El usuario '{args.usuario}' no existe: se mostraría todo como nuevo")
         else:
-            print(f"  → Ya existe: {nombre}")
-    
-    conn.commit()
-    conn.close()
-    
-    print(f"\n{'='*60}")
-    print(f"✓ Importación completada!")
-    print(f"  - Servicios nuevos importados: {servicios_importados}")
-    print(f"  - Usuario: {username}")
-    print(f"  - Contraseña: {password}")
-    print(f"{'='*60}\n")
-    print("Ahora podés iniciar la aplicación con: python app.py")
-    print(f"Y loguearte con usuario '{username}' y contraseña '{password}'")
+            user_id, creado = obtener_usuario(db, args.usuario, args.password)
+            if user_id is None:
+                print(f"Error: No existe el usuario '{args.usuario}' (usá --password para crearlo)")
+                return 1
+            print(f"✓ Usuario '{args.usuario}' {'creado' if creado else 'encontrado'}")
+
+        print(f"\nLeyendo archivo Excel: {args.excel}")
+        datos = leer_libro(args.excel)
+        plan = planificar(db, user_id, datos)
+        imprimir_plan(plan)
+
+        if args.dry_run:
+            print("\n→ Dry run: no se escribió nada")
+            return 0
+
+        aplicar(db, user_id, plan)
+        print(f"\n{'=' * 60}")
+        print("✓ Importación completada!")
+        print(f"{'=' * 60}\n")
+        return 0
+
+    finally:
+        db.close()
+
 
 if __name__ == '__main__':
-    import sys
-    
-    if len(sys.argv) > 1:
-        excel_file = sys.argv[1]
-    else:
-        # Buscar archivo Excel en el directorio actual
-        excel_file = 'billetera_mata_galan.xlsx'
-
-        if not os.path.exists(excel_file):
-            print("Error: No se encontró el archivo Excel")
-            print("\nUso: python importar_excel.py [ruta_al_excel.xlsx]")
-            print("\nO copiá tu archivo Excel como 'billetera_mata_galan.xlsx' en esta carpeta")
-            sys.exit(1)
-    
-    if not os.path.exists(excel_file):
-        print(f"Error: No se encuentra el archivo {excel_file}")
-        sys.exit(1)
-    
-    print("="*60)
-    print("IMPORTADOR DE DATOS DESDE EXCEL")
-    print("="*60)
-    
-    importar_desde_excel(excel_file)
+    sys.exit(main())
@@ -0,0 +1,390 @@
+"""
+Instrumentación de SQL: consultas por request, métricas agregadas y consultas lentas
+
+database.connect() abre las conexiones con ConexionInstrumentada, así que
+todo lo que pasa por get_db() (la app) o reminders.get_db() (recordatorios)
+queda medido sin cambiar el código que consulta. De cada sentencia se guarda
+el texto normalizado (literales y listas de parámetros colapsados), la
+duración (execute más el tiempo de leer las filas) y las filas devueltas o
+modificadas.
+
+Con eso:
+- cada request de la app deja una línea de log JSON con sus consultas y las
+  sentencias repetidas (así aparece un N+1) y, si está activado, el header
+  Server-Timing que muestran las herramientas de desarrollo del navegador;
+- /admin/metrics (ver vistas/admin.py) muestra los totales del proceso por
+  sentencia y por endpoint;
+- las sentencias que tardan más de SQL_LENTA_MS se loguean con su EXPLAIN
+  QUERY PLAN.
+
+Solo usa la biblioteca estándar: run_reminders.py la carga sin Flask.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger('instrumentacion')
+
+_reloj = time.perf_counter
+_siguiente = sqlite3.Cursor.__next__
+
+# Sentencias que tardan al menos esto (ms) se loguean con su plan; vacío = nunca
+_lenta = os.environ.get('SQL_LENTA_MS', '100')
+LENTA_MS = float(_lenta) if _lenta else None
+
+# Una sentencia ejecutada más veces que esto en un mismo request se informa como repetida
+REPETIDAS_UMBRAL = 5
+
+# Sentencias distintas que se guardan en las métricas; las demás se suman en OTRAS
+MAX_SENTENCIAS = 500
+OTRAS = '(otras sentencias)'
+
+# Sentencias a las que se les puede pedir EXPLAIN QUERY PLAN
+_EXPLICABLES = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_LITERALES = re.compile(r"'(?:[^']|'')*'|(?<![\w.])-?\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_FILAS = re.compile(r'\(\?, \.\.\.\)(?:\s*,\s*\(\?, \.\.\.\))+')
+_ESPACIOS = re.compile(r'\s+')
+
+
+def normalizar(sql):
+    """
+    Texto de la sentencia sin literales ni espacios de más, para agrupar
+
+    Los literales pasan a ?, las listas de parámetros a (?, ...) y varias
+    filas de VALUES a una sola: `IN (?, ?, ?)` y `IN (?, ?)` son la misma
+    sentencia.
+    """
+    sql = _ESPACIOS.sub(' ', sql).strip()
+    sql = _LITERALES.sub('?', sql)
+    sql = _LISTAS.sub('(?, ...)', sql)
+    return _FILAS.sub('(?, ...), ...', sql)
+
+
+class Consulta:
+    """Una ejecución de una sentencia; queda abierta mientras se leen sus filas"""
+
+    __slots__ = ('sql', 'parametros', 'segundos', 'filas', 'abierta')
+
+    def __init__(self, sql, parametros):
+        self.sql = sql
+        self.parametros = parametros
+        self.segundos = 0.0
+        self.filas = 0
+        self.abierta = True
+
+    @property
+    def ms(self):
+        return self.segundos * 1000
+
+
+class Registro:
+    """Consultas terminadas de un request"""
+
+    def __init__(self):
+        self.consultas = []
+
+    @property
+    def ms(self):
+        return sum(consulta.ms for consulta in self.consultas)
+
+    def repetidas(self, umbral=REPETIDAS_UMBRAL):
+        """Sentencias normalizadas ejecutadas más de `umbral` veces -> cantidad"""
+        cantidades = {}
+        for consulta in self.consultas:
+            clave = normalizar(consulta.sql)
+            cantidades[clave] = cantidades.get(clave, 0) + 1
+        return {sql: cantidad for sql, cantidad in cantidades.items() if cantidad > umbral}
+
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """Cursor que mide execute y la lectura de filas de su sentencia actual"""
+
+    _consulta = None
+
+    def _medir(self, metodo, sql, parametros, muestra):
+        """`muestra`: parámetros con los que se pide el plan si resulta lenta"""
+        self._terminar()
+        consulta = Consulta(sql, muestra)
+        inicio = _reloj()
+        try:
+            resultado = metodo(sql, parametros)
+        finally:
+            consulta.segundos = _reloj() - inicio
+            self._consulta = consulta
+            self.connection._abiertas.append(consulta)
+        if self.description is None:
+            # Sin filas para leer (INSERT, UPDATE, DELETE...): ya terminó
+            consulta.filas = max(self.rowcount, 0)
+            self._terminar()
+        return resultado
+
+    def execute(self, sql, parametros=()):
+        return self._medir(super().execute, sql, parametros, parametros)
+
+    def executemany(self, sql, parametros):
+        # Un generador no se puede releer: sin muestra no se pide el plan
+        muestra = parametros[0] if isinstance(parametros, (list, tuple)) and parametros else None
+        return self._medir(super().executemany, sql, parametros, muestra)
+
+    def _leidas(self, inicio, filas, fin):
+        consulta = self._consulta
+        if consulta is not None:
+            consulta.segundos += _reloj() - inicio
+            consulta.filas += filas
+            if fin:
+                self._terminar()
+
+    def _terminar(self):
+        consulta = self._consulta
+        if consulta is not None:
+            self._consulta = None
+            self.connection.terminar(consulta)
+
+    def __next__(self):
+        # Por cada fila: es el camino caliente al iterar exportaciones grandes
+        inicio = _reloj()
+        try:
+            fila = _siguiente(self)
+        except StopIteration:
+            self._leidas(inicio, 0, True)
+            raise
+        consulta = self._consulta
+        if consulta is not None:
+            consulta.segundos += _reloj() - inicio
+            consulta.filas += 1
+        return fila
+
+    def fetchone(self):
+        inicio = _reloj()
+        fila = super().fetchone()
+        self._leidas(inicio, fila is not None, fila is None)
+        return fila
+
+    def fetchmany(self, size=None):
+        inicio = _reloj()
+        filas = super().fetchmany(self.arraysize if size is None else size)
+        self._leidas(inicio, len(filas), not filas)
+        return filas
+
+    def fetchall(self):
+        inicio = _reloj()
+        filas = super().fetchall()
+        self._leidas(inicio, len(filas), True)
+        return filas
+
+    def close(self):
+        self._terminar()
+        super().close()
+
+    def __del__(self):
+        # db.execute(...).fetchone() deja el cursor sin agotar: termina al descartarlo
+        if self._consulta is not None:
+            try:
+                self._terminar()
+            except Exception:
+                pass
+
+
+class ConexionInstrumentada(sqlite3.Connection):
+    """
+    Conexión cuyos cursores se miden
+
+    `registro` es el Registro del request que está usando la conexión (lo
+    asigna database.get_db()); sin registro las consultas igual suman a las
+    métricas y al log de lentas.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.registro = None
+        self._abiertas = []
+
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    # sqlite3.Connection.execute no pasa por cursor(): se redirigen acá
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+    def terminar(self, consulta):
+        """Registra una consulta terminada (una sola vez)"""
+        if not consulta.abierta:
+            return
+        consulta.abierta = False
+        try:
+            self._abiertas.remove(consulta)
+        except ValueError:
+            pass
+
+        if self.registro is not None:
+            self.registro.consultas.append(consulta)
+        es_lenta = LENTA_MS is not None and consulta.ms >= LENTA_MS
+        _acumular(consulta, es_lenta)
+        if es_lenta:
+            self._loguear_lenta(consulta)
+        consulta.parametros = None
+
+    def terminar_consultas(self):
+        """Cierra las consultas cuyas filas no se terminaron de leer (fetchone, cursores abandonados)"""
+        for consulta in list(self._abiertas):
+            self.terminar(consulta)
+
+    def _loguear_lenta(self, consulta):
+        plan = None
+        if consulta.parametros is not None and consulta.sql.lstrip().upper().startswith(_EXPLICABLES):
+            try:
+                # Cursor común: el EXPLAIN no se mide ni se registra
+                plan = [fila[3] for fila in sqlite3.Cursor(self).execute(
+                    'EXPLAIN QUERY PLAN ' + consulta.sql, consulta.parametros)]
+            except sqlite3.Error as e:
+                plan = [f'(sin plan: {e})']
+        logger.warning(json.dumps({
+            'evento': 'sql_lenta',
+            'ms': round(consulta.ms, 2),
+            'filas': consulta.filas,
+            'sql': normalizar(consulta.sql),
+            'plan': plan,
+        }, ensure_ascii=False))
+
+    def close(self):
+        self.terminar_consultas()
+        super().close()
+
+
+# Métricas del proceso: sentencia normalizada -> totales, endpoint -> totales
+_sentencias = {}
+_endpoints = {}
+_lock = threading.Lock()
+_desde = time.time()
+
+
+def _acumular(consulta, es_lenta):
+    clave = normalizar(consulta.sql)
+    with _lock:
+        totales = _sentencias.get(clave)
+        if totales is None:
+            if len(_sentencias) >= MAX_SENTENCIAS:
+                clave = OTRAS
+                totales = _sentencias.get(clave)
+            if totales is None:
+                totales = _sentencias[clave] = {'cantidad': 0, 'ms': 0.0, 'max_ms': 0.0, 'filas': 0, 'lentas': 0}
+        totales['cantidad'] += 1
+        totales['ms'] += consulta.ms
+        totales['max_ms'] = max(totales['max_ms'], consulta.ms)
+        totales['filas'] += consulta.filas
+        totales['lentas'] += es_lenta
+
+
+def registrar_request(endpoint, ms, registro):
+    """Suma un request terminado a las métricas de su endpoint"""
+    cantidad = len(registro.consultas)
+    with _lock:
+        totales = _endpoints.get(endpoint)
+        if totales is None:
+            totales = _endpoints[endpoint] = {'requests': 0, 'ms': 0.0, 'consultas': 0,
+                                              'sql_ms': 0.0, 'max_consultas': 0}
+        totales['requests'] += 1
+        totales['ms'] += ms
+        totales['consultas'] += cantidad
+        totales['sql_ms'] += registro.ms
+        totales['max_consultas'] = max(totales['max_consultas'], cantidad)
+
+
+def metricas():
+    """
+    Copia de las métricas del proceso
+
+    Returns:
+        Dict con 'desde' (epoch), 'lenta_ms', 'sentencias' (lista ordenada por
+        tiempo total) y 'endpoints' (lista ordenada por consultas por request)
+    """
+    with _lock:
+        sentencias = [dict(totales, sql=sql) for sql, totales in _sentencias.items()]
+        endpoints = [dict(totales, endpoint=endpoint) for endpoint, totales in _endpoints.items()]
+        desde = _desde
+
+    for totales in sentencias:
+        totales['promedio_ms'] = totales['ms'] / totales['cantidad']
+    for totales in endpoints:
+        totales['consultas_por_request'] = totales['consultas'] / totales['requests']
+        totales['promedio_ms'] = totales['ms'] / totales['requests']
+    sentencias.sort(key=lambda totales: totales['ms'], reverse=True)
+    endpoints.sort(key=lambda totales: totales['consultas_por_request'], reverse=True)
+    return {'desde': desde, 'lenta_ms': LENTA_MS, 'sentencias': sentencias, 'endpoints': endpoints}
+
+
+def reiniciar():
+    """Borra las métricas acumuladas"""
+    global _desde
+    with _lock:
+        _sentencias.clear()
+        _endpoints.clear()
+        _desde = time.time()
+
+
+def init_app(app):
+    """
+    Línea de log y Server-Timing por request
+
+    Config:
+        SQL_LOG_REQUESTS: loguear una línea JSON por request (default True)
+        SQL_SERVER_TIMING: agregar el header Server-Timing (default: en modo debug)
+    """
+    from flask import g, request
+
+    app.config.setdefault('SQL_LOG_REQUESTS', os.environ.get('SQL_LOG_REQUESTS', '1') == '1')
+    app.config.setdefault('SQL_SERVER_TIMING', os.environ.get('SQL_SERVER_TIMING', '0') == '1')
+
+    if app.config['SQL_LOG_REQUESTS'] and not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+    @app.before_request
+    def empezar_request():
+        g.sql_inicio = time.perf_counter()
+
+    @app.after_request
+    def terminar_request(response):
+        inicio = g.pop('sql_inicio', None)
+        if inicio is None:
+            return response
+
+        db = g.get('db')
+        if db is not None:
+            db.terminar_consultas()
+        registro = g.get('sql') or Registro()
+        ms = (time.perf_counter() - inicio) * 1000
+        registrar_request(request.endpoint or '(sin endpoint)', ms, registro)
+
+        if app.config['SQL_SERVER_TIMING'] or app.debug:
+            response.headers['Server-Timing'] = (
+                f'sql;dur={registro.ms:.2f};desc="{len(registro.consultas)} consultas", '
+                f'app;dur={ms:.2f}'
+            )
+
+        if app.config['SQL_LOG_REQUESTS']:
+            logger.info(json.dumps({
+                'evento': 'request',
+                'metodo': request.method,
+                'ruta': request.path,
+                'endpoint': request.endpoint,
+                'estado': response.status_code,
+                'ms': round(ms, 2),
+                'consultas': len(registro.consultas),
+                'sql_ms': round(registro.ms, 2),
+                'filas': sum(consulta.filas for consulta in registro.consultas),
+                'repetidas': registro.repetidas(),
+            }, ensure_ascii=False))
+        return response
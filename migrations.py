@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+Migraciones versionadas del esquema de Billetera Mata Galán
+
+La versión aplicada se guarda en PRAGMA user_version. Al iniciar la app se
+aplican los pasos pendientes en orden, cada uno en su propia transacción.
+Los pasos son idempotentes para que las bases creadas con los viejos
+scripts migrate_add_*.py (user_version = 0) se actualicen sin errores.
+
+Usage:
+    python migrations.py            # Aplica migraciones pendientes
+    python migrations.py --planes   # Verifica que las consultas frecuentes usen índices
+"""
+
+import sys
+import sqlite3
+import database
+
+DEFAULT_CATEGORIES = [
+    ('Comunicaciones', '#007bff', 'bi-phone'),
+    ('Educación', '#28a745', 'bi-book'),
+    ('Servicios', '#ffc107', 'bi-tools'),
+    ('Impuestos', '#dc3545', 'bi-receipt'),
+    ('Actividades Deportivas', '#17a2b8', 'bi-trophy'),
+    ('Subscripciones', '#6f42c1', 'bi-star'),
+    ('Tarjetas de Crédito', '#fd7e14', 'bi-credit-card'),
+    ('Otros', '#6c757d', 'bi-three-dots')
+]
+
+
+def add_column(db, table, column, definition):
+    """Agrega una columna si todavía no existe"""
+    columns = [col[1] for col in db.execute(f'PRAGMA table_info({table})')]
+    if column not in columns:
+        db.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+def _esquema_base(db):
+    db.execute('''CREATE TABLE IF NOT EXISTS usuarios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        email TEXT,
+        telefono TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+
+    db.execute('''CREATE TABLE IF NOT EXISTS categorias (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT NOT NULL UNIQUE,
+        color TEXT,
+        icono TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+
+    db.execute('''CREATE TABLE IF NOT EXISTS servicios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        nombre TEXT NOT NULL,
+        dia_vencimiento INTEGER,
+        monto REAL,
+        medio_pago TEXT,
+        categoria_id INTEGER,
+        es_unico INTEGER DEFAULT 0,
+        activo INTEGER DEFAULT 1,
+        FOREIGN KEY (user_id) REFERENCES usuarios (id),
+        FOREIGN KEY (categoria_id) REFERENCES categorias (id)
+    )''')
+
+    db.execute('''CREATE TABLE IF NOT EXISTS pagos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        servicio_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        periodo TEXT NOT NULL,
+        monto REAL NOT NULL,
+        fecha_pago TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        metodo_pago TEXT,
+        FOREIGN KEY (servicio_id) REFERENCES servicios (id),
+        FOREIGN KEY (user_id) REFERENCES usuarios (id)
+    )''')
+
+    db.execute('''CREATE TABLE IF NOT EXISTS servicios_omitidos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        servicio_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        periodo TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (servicio_id) REFERENCES servicios (id),
+        FOREIGN KEY (user_id) REFERENCES usuarios (id),
+        UNIQUE(servicio_id, periodo)
+    )''')
+
+    # Bases creadas por importar_excel.py antes de categorías y servicios únicos
+    add_column(db, 'servicios', 'categoria_id', 'INTEGER REFERENCES categorias(id)')
+    add_column(db, 'servicios', 'es_unico', 'INTEGER DEFAULT 0')
+
+    if db.execute('SELECT COUNT(*) FROM categorias').fetchone()[0] == 0:
+        db.executemany('''
+            INSERT INTO categorias (nombre, color, icono)
+            VALUES (?, ?, ?)
+        ''', DEFAULT_CATEGORIES)
+
+
+def _adjuntos(db):
+    # invoice_* = comprobante de pago, bill_* = factura del proveedor
+    for prefix in ('invoice', 'bill'):
+        add_column(db, 'pagos', f'{prefix}_filename', 'TEXT')
+        add_column(db, 'pagos', f'{prefix}_path', 'TEXT')
+        add_column(db, 'pagos', f'{prefix}_size', 'INTEGER')
+        add_column(db, 'pagos', f'{prefix}_uploaded_at', 'TIMESTAMP')
+
+
+def _recordatorios(db):
+    db.execute('''CREATE TABLE IF NOT EXISTS recordatorios_enviados (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        servicio_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        periodo TEXT NOT NULL,
+        dias_anticipacion INTEGER NOT NULL,
+        fecha_envio TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (servicio_id) REFERENCES servicios(id),
+        FOREIGN KEY (user_id) REFERENCES usuarios(id),
+        UNIQUE(servicio_id, periodo, dias_anticipacion)
+    )''')
+    add_column(db, 'usuarios', 'recordatorios_email', 'INTEGER DEFAULT 1')
+
+
+def _indices(db):
+    # Dashboard, get_monto_pagado_mes, recordatorios y filtros del historial
+    db.execute('''CREATE INDEX IF NOT EXISTS idx_pagos_user_periodo
+                  ON pagos (user_id, periodo, servicio_id, monto)''')
+    # Historial ordenado por fecha
+    db.execute('''CREATE INDEX IF NOT EXISTS idx_pagos_user_fecha
+                  ON pagos (user_id, fecha_pago)''')
+    # Servicios activos de un usuario (dashboard, exportación)
+    db.execute('''CREATE INDEX IF NOT EXISTS idx_servicios_user_activo
+                  ON servicios (user_id, activo, nombre)''')
+    # Servicios que vencen un día dado (recordatorios)
+    db.execute('''CREATE INDEX IF NOT EXISTS idx_servicios_activo_dia
+                  ON servicios (activo, dia_vencimiento)''')
+
+
+def _outbox_recordatorios(db):
+    # Cola persistente de recordatorios: la selección encola y el worker envía
+    db.execute('''CREATE TABLE IF NOT EXISTS recordatorios_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        idempotency_key TEXT NOT NULL UNIQUE,
+        servicio_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        periodo TEXT NOT NULL,
+        dias_anticipacion INTEGER NOT NULL,
+        payload TEXT NOT NULL,
+        estado TEXT NOT NULL DEFAULT 'pendiente',
+        intentos INTEGER NOT NULL DEFAULT 0,
+        proximo_intento TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        bloqueado_hasta TIMESTAMP,
+        ultimo_error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        enviado_at TIMESTAMP,
+        FOREIGN KEY (servicio_id) REFERENCES servicios(id),
+        FOREIGN KEY (user_id) REFERENCES usuarios(id)
+    )''')
+    db.execute('''CREATE INDEX IF NOT EXISTS idx_outbox_estado_proximo
+                  ON recordatorios_outbox (estado, proximo_intento)''')
+
+
+def _recordatorios_resumen(db):
+    # 'individual' = un email por servicio, 'resumen' = un email por usuario y día
+    add_column(db, 'usuarios', 'recordatorios_modo', "TEXT DEFAULT 'individual'")
+
+    # Los resúmenes no tienen un único servicio ni anticipación: la tabla se
+    # recrea con esas columnas opcionales y un `tipo` para distinguir las filas
+    db.execute('''CREATE TABLE recordatorios_outbox_nueva (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        idempotency_key TEXT NOT NULL UNIQUE,
+        tipo TEXT NOT NULL DEFAULT 'individual',
+        servicio_id INTEGER,
+        user_id INTEGER NOT NULL,
+        periodo TEXT NOT NULL,
+        dias_anticipacion INTEGER,
+        payload TEXT NOT NULL,
+        estado TEXT NOT NULL DEFAULT 'pendiente',
+        intentos INTEGER NOT NULL DEFAULT 0,
+        proximo_intento TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        bloqueado_hasta TIMESTAMP,
+        ultimo_error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        enviado_at TIMESTAMP,
+        FOREIGN KEY (servicio_id) REFERENCES servicios(id),
+        FOREIGN KEY (user_id) REFERENCES usuarios(id)
+    )''')
+    db.execute('''
+        INSERT INTO recordatorios_outbox_nueva
+        (id, idempotency_key, servicio_id, user_id, periodo, dias_anticipacion, payload,
+         estado, intentos, proximo_intento, bloqueado_hasta, ultimo_error, created_at, enviado_at)
+        SELECT id, idempotency_key, servicio_id, user_id, periodo, dias_anticipacion, payload,
+               estado, intentos, proximo_intento, bloqueado_hasta, ultimo_error, created_at, enviado_at
+        FROM recordatorios_outbox
+    ''')
+    db.execute('DROP TABLE recordatorios_outbox')
+    db.execute('ALTER TABLE recordatorios_outbox_nueva RENAME TO recordatorios_outbox')
+    db.execute('''CREATE INDEX IF NOT EXISTS idx_outbox_estado_proximo
+                  ON recordatorios_outbox (estado, proximo_intento)''')
+
+
+def _version_datos(db):
+    # Se incrementa con cada cambio que afecta al dashboard (ver dashboard_data)
+    add_column(db, 'usuarios', 'datos_version', 'INTEGER NOT NULL DEFAULT 0')
+
+
+def _pagos_resumen(db):
+    # Total y cantidad de pagos por usuario, período y servicio. Los triggers
+    # lo mantienen al día con cada alta, baja o edición de pagos, así que leer
+    # "cuánto se pagó este mes" es una búsqueda por clave (ver pagos_resumen.py)
+    db.execute('''CREATE TABLE IF NOT EXISTS pagos_resumen (
+        user_id INTEGER NOT NULL,
+        periodo TEXT NOT NULL,
+        servicio_id INTEGER NOT NULL,
+        total REAL NOT NULL DEFAULT 0,
+        cantidad INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, periodo, servicio_id)
+    ) WITHOUT ROWID''')
+
+    db.execute('''CREATE TRIGGER IF NOT EXISTS pagos_resumen_insert
+        AFTER INSERT ON pagos
+        BEGIN
+            INSERT INTO pagos_resumen (user_id, periodo, servicio_id, total, cantidad)
+            VALUES (NEW.user_id, NEW.periodo, NEW.servicio_id, NEW.monto, 1)
+            ON CONFLICT (user_id, periodo, servicio_id) DO UPDATE
+            SET total = total + excluded.total, cantidad = cantidad + 1;
+        END''')
+
+    db.execute('''CREATE TRIGGER IF NOT EXISTS pagos_resumen_delete
+        AFTER DELETE ON pagos
+        BEGIN
+            UPDATE pagos_resumen
+            SET total = total - OLD.monto, cantidad = cantidad - 1
+            WHERE user_id = OLD.user_id AND periodo = OLD.periodo AND servicio_id = OLD.servicio_id;
+            DELETE FROM pagos_resumen
+            WHERE user_id = OLD.user_id AND periodo = OLD.periodo AND servicio_id = OLD.servicio_id
+              AND cantidad <= 0;
+        END''')
+
+    # Solo cuando cambia algo que afecta al resumen (no al subir adjuntos)
+    db.execute('''CREATE TRIGGER IF NOT EXISTS pagos_resumen_update
+        AFTER UPDATE OF user_id, periodo, servicio_id, monto ON pagos
+        BEGIN
+            UPDATE pagos_resumen
+            SET total = total - OLD.monto, cantidad = cantidad - 1
+            WHERE user_id = OLD.user_id AND periodo = OLD.periodo AND servicio_id = OLD.servicio_id;
+            DELETE FROM pagos_resumen
+            WHERE user_id = OLD.user_id AND periodo = OLD.periodo AND servicio_id = OLD.servicio_id
+              AND cantidad <= 0;
+            INSERT INTO pagos_resumen (user_id, periodo, servicio_id, total, cantidad)
+            VALUES (NEW.user_id, NEW.periodo, NEW.servicio_id, NEW.monto, 1)
+            ON CONFLICT (user_id, periodo, servicio_id) DO UPDATE
+            SET total = total + excluded.total, cantidad = cantidad + 1;
+        END''')
+
+    db.execute('DELETE FROM pagos_resumen')
+    db.execute('''
+        INSERT INTO pagos_resumen (user_id, periodo, servicio_id, total, cantidad)
+        SELECT user_id, periodo, servicio_id, SUM(monto), COUNT(*)
+        FROM pagos
+        GROUP BY user_id, periodo, servicio_id
+    ''')
+
+
+def _adjuntos_por_contenido(db):
+    # Archivos guardados por contenido (ver almacenamiento.py): cuántos pagos usan cada uno
+    db.execute('''CREATE TABLE IF NOT EXISTS adjuntos (
+        clave TEXT PRIMARY KEY,
+        referencias INTEGER NOT NULL DEFAULT 0,
+        size INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+
+
+def _api_tokens(db):
+    # Tokens de la API JSON (ver api.py): se guarda solo el SHA-256 del token
+    db.execute('''CREATE TABLE IF NOT EXISTS api_tokens (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        nombre TEXT NOT NULL,
+        token_hash TEXT NOT NULL UNIQUE,
+        prefijo TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_used_at TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES usuarios (id)
+    )''')
+    db.execute('''CREATE INDEX IF NOT EXISTS idx_api_tokens_user
+                  ON api_tokens (user_id)''')
+
+
+def _pagos_resumen_metodo(db):
+    # Como pagos_resumen pero por medio de pago, para los gráficos de
+    # analisis.py ('' = pagos sin medio de pago)
+    db.execute('''CREATE TABLE IF NOT EXISTS pagos_resumen_metodo (
+        user_id INTEGER NOT NULL,
+        periodo TEXT NOT NULL,
+        metodo_pago TEXT NOT NULL,
+        total REAL NOT NULL DEFAULT 0,
+        cantidad INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, periodo, metodo_pago)
+    ) WITHOUT ROWID''')
+
+    db.execute('''CREATE TRIGGER IF NOT EXISTS pagos_resumen_metodo_insert
+        AFTER INSERT ON pagos
+        BEGIN
+            INSERT INTO pagos_resumen_metodo (user_id, periodo, metodo_pago, total, cantidad)
+            VALUES (NEW.user_id, NEW.periodo, COALESCE(NEW.metodo_pago, ''), NEW.monto, 1)
+            ON CONFLICT (user_id, periodo, metodo_pago) DO UPDATE
+            SET total = total + excluded.total, cantidad = cantidad + 1;
+        END''')
+
+    db.execute('''CREATE TRIGGER IF NOT EXISTS pagos_resumen_metodo_delete
+        AFTER DELETE ON pagos
+        BEGIN
+            UPDATE pagos_resumen_metodo
+            SET total = total - OLD.monto, cantidad = cantidad - 1
+            WHERE user_id = OLD.user_id AND periodo = OLD.periodo
+              AND metodo_pago = COALESCE(OLD.metodo_pago, '');
+            DELETE FROM pagos_resumen_metodo
+            WHERE user_id = OLD.user_id AND periodo = OLD.periodo
+              AND metodo_pago = COALESCE(OLD.metodo_pago, '') AND cantidad <= 0;
+        END''')
+
+    db.execute('''CREATE TRIGGER IF NOT EXISTS pagos_resumen_metodo_update
+        AFTER UPDATE OF user_id, periodo, metodo_pago, monto ON pagos
+        BEGIN
+            UPDATE pagos_resumen_metodo
+            SET total = total - OLD.monto, cantidad = cantidad - 1
+            WHERE user_id = OLD.user_id AND periodo = OLD.periodo
+              AND metodo_pago = COALESCE(OLD.metodo_pago, '');
+            DELETE FROM pagos_resumen_metodo
+            WHERE user_id = OLD.user_id AND periodo = OLD.periodo
+              AND metodo_pago = COALESCE(OLD.metodo_pago, '') AND cantidad <= 0;
+            INSERT INTO pagos_resumen_metodo (user_id, periodo, metodo_pago, total, cantidad)
+            VALUES (NEW.user_id, NEW.periodo, COALESCE(NEW.metodo_pago, ''), NEW.monto, 1)
+            ON CONFLICT (user_id, periodo, metodo_pago) DO UPDATE
+            SET total = total + excluded.total, cantidad = cantidad + 1;
+        END''')
+
+    db.execute('DELETE FROM pagos_resumen_metodo')
+    db.execute('''
+        INSERT INTO pagos_resumen_metodo (user_id, periodo, metodo_pago, total, cantidad)
+        SELECT user_id, periodo, COALESCE(metodo_pago, ''), SUM(monto), COUNT(*)
+        FROM pagos
+        GROUP BY user_id, periodo, COALESCE(metodo_pago, '')
+    ''')
+
+
+def _pronosticos(db):
+    # Monto estimado por servicio (ver pronostico.py) con la firma de la
+    # historia de pagos usada, para recalcular solo lo que cambió
+    db.execute('''CREATE TABLE IF NOT EXISTS pronosticos (
+        servicio_id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        firma TEXT NOT NULL,
+        estimado REAL,
+        FOREIGN KEY (servicio_id) REFERENCES servicios (id)
+    )''')
+    db.execute('''CREATE INDEX IF NOT EXISTS idx_pronosticos_user
+                  ON pronosticos (user_id)''')
+
+
+# (versión, descripción, paso) - agregar pasos nuevos siempre al final
+MIGRATIONS = [
+    (1, 'Esquema base, categorías y servicios únicos', _esquema_base),
+    (2, 'Facturas y comprobantes adjuntos', _adjuntos),
+    (3, 'Recordatorios por email', _recordatorios),
+    (4, 'Índices para consultas frecuentes', _indices),
+    (5, 'Outbox de recordatorios', _outbox_recordatorios),
+    (6, 'Recordatorios en modo resumen', _recordatorios_resumen),
+    (7, 'Versión de datos para la caché del dashboard', _version_datos),
+    (8, 'Resumen de pagos por período', _pagos_resumen),
+    (9, 'Adjuntos guardados por contenido', _adjuntos_por_contenido),
+    (10, 'Tokens de la API', _api_tokens),
+    (11, 'Resumen de pagos por medio de pago', _pagos_resumen_metodo),
+    (12, 'Pronósticos de montos por servicio', _pronosticos),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(db):
+    return db.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(db):
+    """
+    Aplica las migraciones pendientes
+
+    Cada paso corre en una transacción BEGIN IMMEDIATE y vuelve a leer la
+    versión una vez tomado el lock, así dos workers que arrancan a la vez
+    no aplican el mismo paso dos veces.
+
+    Returns:
+        Lista de (versión, descripción) aplicadas
+    """
+    aplicadas = []
+
+    for version, descripcion, paso in MIGRATIONS:
+        if get_version(db) >= version:
+            continue
+
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            if get_version(db) >= version:
+                db.rollback()
+                continue
+            paso(db)
+            db.execute(f'PRAGMA user_version = {version}')
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        aplicadas.append((version, descripcion))
+
+    return aplicadas
+
+
+# Filtros del historial cuyo plan se verifica (cada uno cambia el WHERE)
+FILTROS_HISTORIAL = {
+    'sin_filtros': {},
+    'servicio': {'servicio_id': 1},
+    'periodo': {'periodo': '2024-01'},
+    'categoria': {'categoria_id': 1},
+    'metodo': {'metodo_pago': 'Efectivo'},
+    'todos': {'servicio_id': 1, 'periodo': '2024-01', 'categoria_id': 1, 'metodo_pago': 'Efectivo'},
+}
+
+
+def hot_queries():
+    """
+    Consultas frecuentes que no deben recorrer tablas completas
+
+    Se importan de los módulos que las ejecutan (no son copias), así que si
+    una consulta cambia se verifica la versión nueva. Los imports van acá y
+    no arriba: run_reminders importa migrations y no debe cargar Flask.
+
+    Returns:
+        Dict nombre -> SQL
+    """
+    import historial_data
+    from analisis import SERVICIOS_QUERY as ANALISIS_SERVICIOS_QUERY, METODOS_QUERY
+    from api import TOKEN_QUERY
+    from dashboard_data import DASHBOARD_QUERY, MEDIOS_PAGO_QUERY
+    from exportacion import PAGOS_QUERY
+    from pagos_lote import SERVICIOS_QUERY
+    from pronostico import HISTORIA_QUERY, CACHE_QUERY
+    from reminders import REMINDER_PLAN_QUERY, REMINDER_DIGEST_QUERY, TARGET_ROW
+
+    queries = {
+        'dashboard': DASHBOARD_QUERY,
+        'dashboard_medios_pago': MEDIOS_PAGO_QUERY,
+        'historial_servicios': historial_data.SERVICIOS_QUERY,
+        'historial_periodos': historial_data.PERIODOS_QUERY,
+        'historial_metodos': historial_data.METODOS_QUERY,
+        'exportar': DASHBOARD_QUERY + ' ORDER BY s.nombre',
+        'exportar_pagos': PAGOS_QUERY,
+        'recordatorios': REMINDER_PLAN_QUERY.format(valores=TARGET_ROW),
+        'recordatorios_resumen': REMINDER_DIGEST_QUERY.format(valores=TARGET_ROW),
+        'pagos_lote': SERVICIOS_QUERY,
+        'analisis_servicios': ANALISIS_SERVICIOS_QUERY,
+        'analisis_metodos': METODOS_QUERY,
+        'pronostico_historia': HISTORIA_QUERY,
+        'pronostico_cache': CACHE_QUERY,
+        'api_token': TOKEN_QUERY,
+    }
+    # Página (primera y siguientes) y totales del historial con cada filtro
+    for nombre, filtros in FILTROS_HISTORIAL.items():
+        for posicion in (None, ('2024-01-01 00:00:00', 1)):
+            (pagina, _), (totales, _) = historial_data.armar_consultas(1, filtros, posicion)
+            queries[f'historial[{nombre}{"+cursor" if posicion else ""}]'] = pagina
+        queries[f'historial_totales[{nombre}]'] = totales
+    return queries
+
+
+def check_query_plans(db):
+    """
+    Corre EXPLAIN QUERY PLAN sobre hot_queries()
+
+    Returns:
+        Lista de (nombre, detalle) por cada tabla recorrida completa
+    """
+    queries = hot_queries()
+    problemas = []
+
+    for nombre, sql in queries.items():
+        params = [None] * sql.count('?')
+        # Subconsultas/CTEs materializadas: recorrerlas no toca tablas
+        temporales = {'CONSTANT ROW'}
+        for row in db.execute(f'EXPLAIN QUERY PLAN {sql}', params):
+            detalle = row[3]
+            if detalle.startswith(('MATERIALIZE ', 'CO-ROUTINE ')):
+                temporales.add(detalle.split(' ', 1)[1])
+            # "SCAN s" / "SCAN pagos USING COVERING INDEX ..." = recorrido completo
+            # (json_each sobre un parámetro recorre la lista, no una tabla)
+            elif detalle.startswith('SCAN ') and detalle[5:] not in temporales and 'VIRTUAL TABLE' not in detalle:
+                problemas.append((nombre, detalle))
+
+    return problemas
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    print(f"Base de datos: {database.DATABASE_PATH}")
+    db = database.connect()
+
+    try:
+        version_inicial = get_version(db)
+        aplicadas = migrate(db)
+
+        if aplicadas:
+            for version, descripcion in aplicadas:
+                print(f"   ✓ {version}: {descripcion}")
+        else:
+            print(f"   → Sin migraciones pendientes")
+        print(f"Versión del esquema: {version_inicial} → {get_version(db)}")
+
+        if '--planes' in argv:
+            problemas = check_query_plans(db)
+            for nombre, detalle in problemas:
+                print(f"   ✗ {nombre}: {detalle}")
+            if problemas:
+                return 1
+            print("   ✓ Ninguna consulta frecuente recorre tablas completas")
+
+        return 0
+
+    except sqlite3.Error as e:
+        print(f"\n❌ Error durante la migración: {e}")
+        return 1
+
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
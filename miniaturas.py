@@ -0,0 +1,185 @@
+"""
+Miniaturas de facturas y comprobantes para el historial
+
+Cada miniatura es un PNG chico guardado al lado del adjunto
+(blobs/ab/abcdef....thumb.png), así que la comparten todos los pagos que usan
+el mismo archivo y se borra junto con él (Almacenamiento.borrar). Se generan
+en un pool de procesos apenas se sube el archivo, para que el request no
+espere; si falta una (archivos viejos, o se borró la carpeta) se vuelve a
+generar la primera vez que se pide.
+
+Dependencias opcionales:
+- Pillow para las imágenes (pip install Pillow)
+- pdftoppm (poppler-utils) para la primera página de los PDF
+Sin ellas no hay miniaturas y el historial muestra solo el botón "Ver".
+"""
+
+import functools
+import importlib.util
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+SUFIJO = '.thumb.png'
+TAMANO = 160  # px del lado más largo
+
+# Procesos del pool (uno alcanza: las miniaturas se generan una vez por archivo)
+WORKERS = int(os.environ.get('MINIATURAS_WORKERS', '1'))
+
+# Segundos que espera un request cuando la miniatura no existe todavía
+ESPERA = 3
+
+# Segundos máximos para renderizar un PDF
+TIMEOUT_PDF = 30
+
+_pool = None
+_pendientes = {}
+_lock = threading.RLock()  # add_done_callback llama a _terminada en el acto si ya terminó
+
+
+def ruta_miniatura(ruta):
+    return ruta + SUFIJO
+
+
+@functools.cache
+def soporta_imagenes():
+    return importlib.util.find_spec('PIL') is not None
+
+
+@functools.cache
+def soporta_pdf():
+    return shutil.which('pdftoppm') is not None
+
+
+def disponible():
+    """True si se puede generar algún tipo de miniatura"""
+    return soporta_imagenes() or soporta_pdf()
+
+
+def _es_pdf(ruta):
+    with open(ruta, 'rb') as archivo:
+        return archivo.read(5) == b'%PDF-'
+
+
+def _miniatura_pdf(origen, temporal):
+    # pdftoppm agrega la extensión al prefijo de salida
+    prefijo = temporal[:-len('.png')]
+    subprocess.run(
+        ['pdftoppm', '-png', '-singlefile', '-f', '1', '-l', '1',
+         '-scale-to', str(TAMANO), origen, prefijo],
+        check=True, capture_output=True, timeout=TIMEOUT_PDF
+    )
+
+
+def _miniatura_imagen(origen, temporal):
+    from PIL import Image, ImageOps
+
+    with Image.open(origen) as imagen:
+        imagen.draft('RGB', (TAMANO, TAMANO))  # JPEG: decodifica ya reducida
+        imagen = ImageOps.exif_transpose(imagen)
+        imagen.thumbnail((TAMANO, TAMANO))
+        if imagen.mode not in ('RGB', 'RGBA'):
+            imagen = imagen.convert('RGBA')
+        imagen.save(temporal, 'PNG', optimize=True)
+
+
+def generar(origen):
+    """
+    Genera la miniatura de `origen` (corre en el pool de procesos)
+
+    Returns:
+        True si la miniatura quedó en disco
+    """
+    destino = ruta_miniatura(origen)
+    temporal = f'{destino}.{os.getpid()}.png'
+    try:
+        if _es_pdf(origen):
+            if not soporta_pdf():
+                return False
+            _miniatura_pdf(origen, temporal)
+        else:
+            if not soporta_imagenes():
+                return False
+            _miniatura_imagen(origen, temporal)
+        os.replace(temporal, destino)
+        return True
+    except Exception:
+        # Archivo dañado, borrado mientras tanto o formato no soportado
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        return False
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # spawn: los workers no heredan conexiones ni hilos del servidor
+        _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+
+def _terminada(origen):
+    with _lock:
+        _pendientes.pop(origen, None)
+
+
+def encolar(origen):
+    """
+    Pide la miniatura de `origen` al pool sin esperarla
+
+    Returns:
+        Future con el resultado de generar(), o None si no hay con qué generarla
+    """
+    global _pool
+    if not disponible():
+        return None
+
+    with _lock:
+        futuro = _pendientes.get(origen)
+        if futuro is None:
+            try:
+                futuro = _get_pool().submit(generar, origen)
+            except Exception as e:
+                # Sin miniatura no se rompe nada: se reintenta al pedirla con
+                # un pool nuevo (por ejemplo si un worker murió)
+                _pool = None
+                print(f"No se pudo encolar la miniatura de {origen}: {e}")
+                return None
+            _pendientes[origen] = futuro
+            futuro.add_done_callback(lambda _: _terminada(origen))
+    return futuro
+
+
+def obtener(origen, espera=ESPERA):
+    """
+    Ruta de la miniatura de `origen`, generándola si falta
+
+    Returns:
+        Ruta del PNG, o None si no se pudo generar en `espera` segundos
+    """
+    destino = ruta_miniatura(origen)
+    if os.path.exists(destino):
+        return destino
+    if not os.path.exists(origen):
+        return None
+
+    futuro = encolar(origen)
+    if futuro is None:
+        return None
+    try:
+        if futuro.result(timeout=espera):
+            return destino
+    except Exception:
+        # TimeoutError: queda en el pool y estará lista para el próximo pedido
+        pass
+    return None
+
+
+def borrar(origen):
+    """Borra la miniatura de `origen` si existe"""
+    destino = ruta_miniatura(origen)
+    if os.path.exists(destino):
+        os.remove(destino)
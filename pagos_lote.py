@@ -0,0 +1,125 @@
+"""
+Registro de varios pagos a la vez para Billetera Mata Galán
+
+A fin de mes se pagan muchos servicios juntos: en lugar de un POST, un
+commit y una recarga del dashboard por cada uno, se valida que todos los
+servicios sean del usuario con una sola consulta, se insertan todos los
+pagos en una transacción y se dan de baja de una vez los servicios únicos.
+"""
+
+import json
+import math
+from datetime import datetime
+
+# Máximo de pagos por pedido
+MAX_PAGOS = 200
+
+# Servicios del usuario entre los pedidos (la lista va como un array JSON)
+SERVICIOS_QUERY = '''
+    SELECT id, es_unico
+    FROM servicios
+    WHERE user_id = ? AND id IN (SELECT value FROM json_each(?))
+'''
+
+
+class PagosInvalidos(ValueError):
+    """Los pagos pedidos no se pueden registrar; el mensaje es para el usuario"""
+
+
+def _entrada(servicio_id, monto, metodo_pago):
+    # En JSON true/false pasarían por int() y float() como 1 y 0
+    if isinstance(servicio_id, bool) or isinstance(monto, bool):
+        raise PagosInvalidos('Cada pago necesita un servicio y un monto numérico')
+    try:
+        servicio_id = int(servicio_id)
+        monto = float(monto)
+    except (TypeError, ValueError, OverflowError):
+        raise PagosInvalidos('Cada pago necesita un servicio y un monto numérico') from None
+    # NaN no es mayor ni menor que nada e Infinity arruinaría los totales
+    if not (math.isfinite(monto) and monto > 0):
+        raise PagosInvalidos('Los montos tienen que ser mayores a cero')
+    if metodo_pago is not None and not isinstance(metodo_pago, str):
+        raise PagosInvalidos('El método de pago tiene que ser texto')
+    metodo_pago = (metodo_pago or '').strip() or None
+    return servicio_id, monto, metodo_pago
+
+
+def entradas_desde_form(form):
+    """
+    Pagos elegidos en el dashboard: checkboxes `servicio_id` más los campos
+    `monto_<id>` y `metodo_pago_<id>` de cada servicio
+    """
+    return [
+        _entrada(servicio_id, form.get(f'monto_{servicio_id}'), form.get(f'metodo_pago_{servicio_id}'))
+        for servicio_id in form.getlist('servicio_id')
+    ]
+
+
+def entradas_desde_json(datos):
+    """
+    Pagos de un cuerpo JSON: {"pagos": [{"servicio_id": 1, "monto": 100,
+    "metodo_pago": "Débito"}, ...]} o directamente la lista
+    """
+    pagos = datos.get('pagos') if isinstance(datos, dict) else datos
+    if not isinstance(pagos, list):
+        raise PagosInvalidos('Se esperaba una lista de pagos')
+    if not all(isinstance(pago, dict) for pago in pagos):
+        raise PagosInvalidos('Cada pago tiene que ser un objeto con servicio_id y monto')
+    return [
+        _entrada(pago.get('servicio_id'), pago.get('monto'), pago.get('metodo_pago'))
+        for pago in pagos
+    ]
+
+
+def registrar_pagos(db, user_id, entradas, periodo=None):
+    """
+    Registra varios pagos en una transacción
+
+    Args:
+        db: Conexión SQLite
+        user_id: ID del usuario
+        entradas: Lista de (servicio_id, monto, metodo_pago)
+        periodo: Período 'YYYY-MM' (por defecto el actual)
+
+    Returns:
+        Dict con 'cantidad', 'total' y 'completados' (IDs de servicios
+        únicos que quedaron dados de baja)
+
+    Raises:
+        PagosInvalidos: lista vacía, demasiado larga, o con servicios que no
+            existen o no son del usuario (no se registra nada)
+    """
+    if not entradas:
+        raise PagosInvalidos('No se seleccionó ningún servicio')
+    if len(entradas) > MAX_PAGOS:
+        raise PagosInvalidos(f'Se pueden registrar hasta {MAX_PAGOS} pagos a la vez')
+
+    periodo = periodo or datetime.now().strftime('%Y-%m')
+    ids = json.dumps(sorted({servicio_id for servicio_id, _, _ in entradas}))
+
+    servicios = {row['id']: row['es_unico'] for row in db.execute(SERVICIOS_QUERY, (user_id, ids))}
+    if len(servicios) != len(json.loads(ids)):
+        raise PagosInvalidos('Alguno de los servicios no existe')
+
+    completados = sorted(servicio_id for servicio_id, es_unico in servicios.items() if es_unico)
+
+    with db:
+        db.executemany('''
+            INSERT INTO pagos (servicio_id, user_id, periodo, monto, metodo_pago)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [
+            (servicio_id, user_id, periodo, monto, metodo_pago)
+            for servicio_id, monto, metodo_pago in entradas
+        ])
+
+        if completados:
+            db.execute('''
+                UPDATE servicios SET activo = 0
+                WHERE user_id = ? AND id IN (SELECT value FROM json_each(?))
+            ''', (user_id, json.dumps(completados)))
+
+    return {
+        'cantidad': len(entradas),
+        'total': sum(monto for _, monto, _ in entradas),
+        'completados': completados
+    }
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Mantenimiento de las tablas de resumen de pagos
+
+pagos_resumen guarda el total y la cantidad de pagos por usuario, período y
+servicio, y pagos_resumen_metodo lo mismo por medio de pago. Los triggers de
+las migraciones 8 y 11 las actualizan con cada INSERT, UPDATE o DELETE sobre
+pagos; este script sirve para comprobarlas o regenerarlas si se tocó la base
+a mano (por ejemplo con los triggers deshabilitados o restaurando un backup
+parcial).
+
+Usage:
+    python pagos_resumen.py                 # Verifica contra pagos
+    python pagos_resumen.py --reconstruir   # Regenera la tabla desde pagos
+"""
+
+import sys
+import database
+import migrations
+
+# Diferencia de total que se considera error de redondeo
+TOLERANCIA = 0.005
+
+# Tabla de resumen -> (columna clave, expresión sobre pagos que la calcula)
+RESUMENES = {
+    'pagos_resumen': ('servicio_id', 'servicio_id'),
+    'pagos_resumen_metodo': ('metodo_pago', "COALESCE(metodo_pago, '')"),
+}
+
+# Filas donde el resumen no coincide con los pagos (faltantes, sobrantes o distintas)
+DIFERENCIAS_QUERY = '''
+    WITH real AS (
+        SELECT user_id, periodo, {valor} as {clave}, SUM(monto) as total, COUNT(*) as cantidad
+        FROM pagos
+        GROUP BY user_id, periodo, {valor}
+    )
+    SELECT real.user_id, real.periodo, real.{clave} as clave,
+           real.total as total_real, real.cantidad as cantidad_real,
+           r.total as total_resumen, r.cantidad as cantidad_resumen
+    FROM real
+    LEFT JOIN {tabla} r USING (user_id, periodo, {clave})
+    WHERE r.user_id IS NULL
+       OR r.cantidad != real.cantidad
+       OR ABS(r.total - real.total) > ?
+    UNION ALL
+    SELECT r.user_id, r.periodo, r.{clave}, NULL, NULL, r.total, r.cantidad
+    FROM {tabla} r
+    WHERE NOT EXISTS (
+        SELECT 1 FROM pagos
+        WHERE pagos.user_id = r.user_id AND pagos.periodo = r.periodo AND {valor} = r.{clave}
+    )
+'''
+
+
+def verificar(db):
+    """
+    Compara las tablas de resumen con lo que da sumar pagos
+
+    Returns:
+        Lista de dicts con las filas que no coinciden (vacía si está bien);
+        'tabla' indica el resumen y 'clave' el servicio o medio de pago
+    """
+    diferencias = []
+    for tabla, (clave, valor) in RESUMENES.items():
+        query = DIFERENCIAS_QUERY.format(tabla=tabla, clave=clave, valor=valor)
+        diferencias.extend(dict(row, tabla=tabla) for row in db.execute(query, (TOLERANCIA,)))
+    return diferencias
+
+
+def reconstruir(db):
+    """
+    Regenera las tablas de resumen desde pagos en una transacción
+
+    Returns:
+        Dict tabla -> cantidad de filas del resumen
+    """
+    with db:
+        for tabla, (clave, valor) in RESUMENES.items():
+            db.execute(f'DELETE FROM {tabla}')
+            db.execute(f'''
+                INSERT INTO {tabla} (user_id, periodo, {clave}, total, cantidad)
+                SELECT user_id, periodo, {valor}, SUM(monto), COUNT(*)
+                FROM pagos
+                GROUP BY user_id, periodo, {valor}
+            ''')
+    return {
+        tabla: db.execute(f'SELECT COUNT(*) FROM {tabla}').fetchone()[0]
+        for tabla in RESUMENES
+    }
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    print(f"Base de datos: {database.DATABASE_PATH}")
+    db = database.connect()
+
+    try:
+        migrations.migrate(db)
+
+        if '--reconstruir' in argv:
+            for tabla, filas in reconstruir(db).items():
+                print(f"   ✓ {tabla} reconstruida: {filas} filas")
+            return 0
+
+        diferencias = verificar(db)
+        for fila in diferencias:
+            clave = RESUMENES[fila['tabla']][0]
+            print(f"   ✗ {fila['tabla']}: usuario {fila['user_id']}, {clave} {fila['clave']!r}, {fila['periodo']}: "
+                  f"pagos = {fila['total_real']} ({fila['cantidad_real']}), "
+                  f"resumen = {fila['total_resumen']} ({fila['cantidad_resumen']})")
+        if diferencias:
+            print("   → Corré `python pagos_resumen.py --reconstruir` para corregirlo")
+            return 1
+
+        print("   ✓ Los resúmenes coinciden con pagos")
+        return 0
+
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Pronóstico de montos por servicio para Billetera Mata Galán
+
+Los servicios guardan un monto fijo, pero las facturas de luz, gas o
+tarjeta cambian todos los meses (y muchos servicios no tienen monto). El
+monto esperado de cada servicio sale de lo pagado en los últimos
+HISTORIA meses cerrados (pagos_resumen): se recortan los valores extremos
+de cada servicio a sus percentiles PERCENTIL_BAJO/PERCENTIL_ALTO y se
+promedia con suavizado exponencial, así los meses recientes pesan más.
+
+Todos los servicios de un usuario se calculan juntos como una matriz
+servicios x meses de NumPy. El resultado queda en la tabla pronosticos con
+una firma de la historia usada, así que solo se recalculan los servicios
+cuyos pagos cambiaron (o todos cuando empieza un mes nuevo).
+
+NumPy se importa recién al recalcular: con las firmas al día (el caso de
+casi todos los requests) el dashboard no lo necesita.
+"""
+
+import calendar
+import hashlib
+import json
+from datetime import date
+
+# Meses cerrados que se usan para estimar
+HISTORIA = 12
+
+# Meses con pagos necesarios para dar una estimación
+MESES_MINIMOS = 2
+
+# Peso del último mes en el suavizado exponencial (el anterior pesa
+# ALFA * (1 - ALFA), y así)
+ALFA = 0.4
+
+# Percentiles a los que se recortan los valores extremos de cada servicio
+PERCENTIL_BAJO = 10
+PERCENTIL_ALTO = 90
+
+# Meses que muestra el calendario de vencimientos (incluye el actual)
+MESES_CALENDARIO = 3
+
+# Lo pagado por servicio y mes en la ventana, en orden de período
+HISTORIA_QUERY = '''
+    SELECT servicio_id, periodo, total
+    FROM pagos_resumen
+    WHERE user_id = ? AND periodo BETWEEN ? AND ?
+    ORDER BY periodo
+'''
+
+CACHE_QUERY = '''
+    SELECT servicio_id, firma, estimado FROM pronosticos WHERE user_id = ?
+'''
+
+
+def _periodos_anteriores(hoy, cantidad):
+    """Los `cantidad` períodos 'YYYY-MM' cerrados antes del mes de `hoy`"""
+    indice = hoy.year * 12 + hoy.month - 1
+    return [
+        f'{i // 12:04d}-{i % 12 + 1:02d}'
+        for i in range(indice - cantidad, indice)
+    ]
+
+
+def _firma(desde, historia):
+    """Huella de la historia de un servicio: cambia si cambia algún mes"""
+    texto = desde + ';' + ';'.join(f'{periodo}={total:.2f}' for periodo, total in historia)
+    return hashlib.blake2b(texto.encode(), digest_size=8).hexdigest()
+
+
+def _percentil(ordenados, cantidades, q):
+    """
+    Percentil `q` de cada fila de `ordenados` (filas ordenadas con los NaN al
+    final; `cantidades` = valores no NaN de cada fila), con la misma
+    interpolación lineal que np.percentile pero sin recorrer fila por fila
+    como np.nanpercentile
+    """
+    import numpy as np
+
+    posicion = (cantidades - 1) * (q / 100)
+    abajo = np.floor(posicion).astype(int)
+    arriba = np.ceil(posicion).astype(int)
+    filas = np.arange(ordenados.shape[0])
+    valor_abajo = ordenados[filas, abajo]
+    valor_arriba = ordenados[filas, arriba]
+    return (valor_abajo + (valor_arriba - valor_abajo) * (posicion - abajo))[:, np.newaxis]
+
+
+def estimar(matriz):
+    """
+    Monto esperado por fila de una matriz servicios x meses (NaN = sin pagos,
+    la última columna es el mes más reciente)
+
+    Returns:
+        Array con la estimación de cada fila (NaN si tiene menos de
+        MESES_MINIMOS meses con pagos)
+    """
+    import numpy as np
+
+    observados = ~np.isnan(matriz)
+    meses = observados.sum(axis=1)
+    estimados = np.full(matriz.shape[0], np.nan)
+
+    validas = meses >= MESES_MINIMOS
+    if not validas.any():
+        return estimados
+
+    valores = matriz[validas]
+    observados = observados[validas]
+
+    # Recortar extremos por servicio (una cuota atrasada que se pagó doble,
+    # un mes con un cargo extra) sin descartar meses
+    ordenados = np.sort(valores, axis=1)
+    bajo = _percentil(ordenados, meses[validas], PERCENTIL_BAJO)
+    alto = _percentil(ordenados, meses[validas], PERCENTIL_ALTO)
+    valores = np.where(observados, np.clip(valores, bajo, alto), 0.0)
+
+    # Suavizado exponencial: pesos ALFA * (1 - ALFA)^antigüedad, solo en meses con pagos
+    antiguedad = np.arange(matriz.shape[1] - 1, -1, -1)
+    pesos = np.where(observados, ALFA * (1 - ALFA) ** antiguedad, 0.0)
+
+    estimados[validas] = (valores * pesos).sum(axis=1) / pesos.sum(axis=1)
+    return estimados
+
+
+def _guardar(db, user_id, filas, sobrantes):
+    """
+    Actualiza la caché de pronosticos dentro de un savepoint
+
+    Se llama desde GET /dashboard y /analisis: si el llamador tiene una
+    transacción abierta los cambios se suman a ella (y él decide el commit);
+    si no, el RELEASE los confirma.
+    """
+    db.execute('SAVEPOINT pronosticos')
+    try:
+        db.executemany('''
+            INSERT INTO pronosticos (servicio_id, user_id, firma, estimado)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (servicio_id) DO UPDATE
+            SET firma = excluded.firma, estimado = excluded.estimado
+        ''', filas)
+        if sobrantes:
+            db.execute('''
+                DELETE FROM pronosticos
+                WHERE user_id = ? AND servicio_id IN (SELECT value FROM json_each(?))
+            ''', (user_id, json.dumps(sobrantes)))
+        db.execute('RELEASE pronosticos')
+    except Exception:
+        db.execute('ROLLBACK TO pronosticos')
+        db.execute('RELEASE pronosticos')
+        raise
+
+
+def obtener_estimados(db, user_id, hoy=None):
+    """
+    Monto esperado de cada servicio del usuario con historia suficiente
+
+    Lee la historia de pagos_resumen, compara su firma con la guardada en
+    pronosticos y recalcula (en un solo lote) solo los servicios que cambiaron.
+    No hace commit de la transacción que tenga abierta `db` (ver _guardar()).
+
+    Returns:
+        Dict servicio_id -> monto estimado
+    """
+    hoy = hoy or date.today()
+    periodos = _periodos_anteriores(hoy, HISTORIA)
+    desde = periodos[0]
+
+    historias = {}
+    for row in db.execute(HISTORIA_QUERY, (user_id, desde, periodos[-1])):
+        historias.setdefault(row['servicio_id'], []).append((row['periodo'], row['total']))
+
+    firmas = {servicio_id: _firma(desde, historia) for servicio_id, historia in historias.items()}
+    guardados = {row['servicio_id']: (row['firma'], row['estimado']) for row in db.execute(CACHE_QUERY, (user_id,))}
+
+    cambiados = [
+        servicio_id for servicio_id, firma in firmas.items()
+        if guardados.get(servicio_id, (None,))[0] != firma
+    ]
+    sobrantes = [servicio_id for servicio_id in guardados if servicio_id not in firmas]
+
+    estimados = {servicio_id: estimado for servicio_id, (_, estimado) in guardados.items()
+                 if servicio_id in firmas}
+
+    if cambiados or sobrantes:
+        if cambiados:
+            import numpy as np
+
+            columnas = {periodo: i for i, periodo in enumerate(periodos)}
+            matriz = np.full((len(cambiados), len(periodos)), np.nan)
+            for fila, servicio_id in enumerate(cambiados):
+                for periodo, total in historias[servicio_id]:
+                    matriz[fila, columnas[periodo]] = total
+
+            for servicio_id, estimado in zip(cambiados, estimar(matriz).tolist()):
+                estimados[servicio_id] = None if np.isnan(estimado) else round(estimado, 2)
+
+        _guardar(db, user_id, [(servicio_id, user_id, firmas[servicio_id], estimados[servicio_id])
+                               for servicio_id in cambiados], sobrantes)
+
+    return {servicio_id: estimado for servicio_id, estimado in estimados.items() if estimado is not None}
+
+
+def _fecha_vencimiento(anio, mes, dia):
+    # Día 31 en un mes de 30 días = último día del mes
+    return date(anio, mes, min(dia or 1, calendar.monthrange(anio, mes)[1]))
+
+
+def calendario(servicios, meses=MESES_CALENDARIO, hoy=None):
+    """
+    Vencimientos proyectados del mes actual y los siguientes
+
+    Args:
+        servicios: Servicios de obtener_dashboard() (con 'estimado' si no
+            tienen monto)
+        meses: Cantidad de meses, incluido el actual
+        hoy: Fecha de referencia (por defecto hoy)
+
+    Returns:
+        Lista de dicts por mes con 'periodo', 'total' y 'vencimientos'
+        (fecha, servicio, monto y si es estimado), ordenados por fecha. En el
+        mes actual solo figura lo que falta pagar (sin los omitidos) y los
+        servicios únicos no se repiten en los meses siguientes.
+    """
+    hoy = hoy or date.today()
+    resultado = []
+
+    for desplazamiento in range(meses):
+        indice = hoy.year * 12 + hoy.month - 1 + desplazamiento
+        anio, mes = indice // 12, indice % 12 + 1
+        actual = desplazamiento == 0
+
+        vencimientos = []
+        for servicio in servicios:
+            esperado = servicio['monto'] or servicio.get('estimado') or 0
+            if actual:
+                if servicio['omitido']:
+                    continue
+                monto = round(esperado - servicio['monto_pagado'], 2)
+            else:
+                if servicio['es_unico']:
+                    continue
+                monto = esperado
+            if monto <= 0:
+                continue
+
+            vencimientos.append({
+                'fecha': _fecha_vencimiento(anio, mes, servicio['dia_vencimiento']).isoformat(),
+                'servicio_id': servicio['id'],
+                'servicio': servicio['nombre'],
+                'monto': monto,
+                'estimado': not servicio['monto']
+            })
+
+        vencimientos.sort(key=lambda v: (v['fecha'], v['servicio']))
+        resultado.append({
+            'periodo': f'{anio:04d}-{mes:02d}',
+            'total': sum(v['monto'] for v in vencimientos),
+            'vencimientos': vencimientos
+        })
+
+    return resultado
@@ -0,0 +1,295 @@
+"""
+Durable outbox for email reminders
+
+Selection and delivery are decoupled:
+- enqueue_reminders() runs the selection query and inserts every reminder
+  into recordatorios_outbox in one transaction, keyed by the idempotency
+  key servicio_id:periodo:dias_anticipacion so re-runs never duplicate.
+  Users in digest mode get one 'resumen' row per day instead, keyed by
+  resumen:user_id:fecha, holding all of their services.
+- drain_outbox() claims due rows with a lease, sends them through
+  dispatch_reminders() and marks them sent, or schedules a retry with
+  exponential backoff. Rows whose lease expired (worker crashed mid-send)
+  are claimed again, so delivery is at-least-once.
+"""
+
+import json
+import os
+from datetime import date, datetime, timezone
+import database
+from reminders import (plan_reminders, plan_digests, render_reminder_messages,
+                       render_digest_messages, dispatch_reminders)
+
+OUTBOX_CONFIG = {
+    'batch_size': int(os.environ.get('OUTBOX_BATCH_SIZE', 200)),
+    'max_attempts': int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 5)),
+    'backoff_base': int(os.environ.get('OUTBOX_BACKOFF_BASE', 60)),  # seconds
+    'backoff_max': int(os.environ.get('OUTBOX_BACKOFF_MAX', 6 * 3600)),  # seconds
+    'lease': int(os.environ.get('OUTBOX_LEASE', 300)),  # seconds
+}
+
+# Anticipation offsets handled by the scheduled job
+DIAS_ANTICIPACION = (3, 0)
+
+
+def utcnow():
+    """
+    Current UTC time in SQLite's datetime format
+
+    Every outbox timestamp comes from here rather than datetime('now'), so
+    tests can move the clock by replacing this function.
+    """
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def idempotency_key(servicio_id, periodo, dias_anticipacion):
+    return f'{servicio_id}:{periodo}:{dias_anticipacion}'
+
+
+def digest_key(user_id, fecha_aviso):
+    return f'resumen:{user_id}:{fecha_aviso}'
+
+
+def backoff_seconds(intentos):
+    """Delay before retry number `intentos` (1 = first retry)"""
+    return min(OUTBOX_CONFIG['backoff_base'] * 2 ** (intentos - 1), OUTBOX_CONFIG['backoff_max'])
+
+
+def enqueue_reminders(db=None, desde=None, hasta=None):
+    """
+    Select every reminder due in [desde, hasta] (default: today) and add it to the outbox
+
+    Rows already queued are left alone; rows that previously exhausted their
+    retries ('fallido') are revived so the next scheduled run tries again.
+
+    Returns:
+        Number of rows inserted or revived
+    """
+    own_db = db is None
+    if own_db:
+        db = database.connect()
+
+    desde = desde or date.today()
+    hasta = hasta or desde
+
+    # One pass over the data for every offset
+    rows = [
+        (
+            idempotency_key(service['servicio_id'], service['periodo'], service['dias_anticipacion']),
+            'individual',
+            service['servicio_id'],
+            service['user_id'],
+            service['periodo'],
+            service['dias_anticipacion'],
+            json.dumps(service)
+        )
+        for service in plan_reminders(desde, hasta, DIAS_ANTICIPACION, db)
+    ]
+    rows.extend(
+        (
+            digest_key(digest['user_id'], digest['fecha_aviso']),
+            'resumen',
+            None,
+            digest['user_id'],
+            digest['fecha_aviso'][:7],
+            None,
+            json.dumps(digest)
+        )
+        for digest in plan_digests(desde, hasta, DIAS_ANTICIPACION, db)
+    )
+
+    now = utcnow()
+    try:
+        with db:
+            before = db.total_changes
+            db.executemany('''
+                INSERT INTO recordatorios_outbox
+                (idempotency_key, tipo, servicio_id, user_id, periodo, dias_anticipacion, payload,
+                 proximo_intento)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (idempotency_key) DO UPDATE
+                SET estado = 'pendiente',
+                    intentos = 0,
+                    proximo_intento = excluded.proximo_intento,
+                    payload = excluded.payload
+                WHERE estado = 'fallido'
+            ''', [row + (now,) for row in rows])
+            return db.total_changes - before
+    finally:
+        if own_db:
+            db.close()
+
+
+def claim_batch(db, limit=None):
+    """
+    Lease up to `limit` due rows to this worker
+
+    Returns:
+        List of outbox rows (sqlite3.Row)
+    """
+    limit = limit or OUTBOX_CONFIG['batch_size']
+    lease = f"+{OUTBOX_CONFIG['lease']} seconds"
+    now = utcnow()
+
+    db.execute('BEGIN IMMEDIATE')
+    try:
+        rows = db.execute('''
+            SELECT * FROM recordatorios_outbox
+            WHERE (estado = 'pendiente' AND proximo_intento <= ?)
+               OR (estado = 'enviando' AND bloqueado_hasta <= ?)
+            ORDER BY proximo_intento
+            LIMIT ?
+        ''', (now, now, limit)).fetchall()
+
+        db.executemany('''
+            UPDATE recordatorios_outbox
+            SET estado = 'enviando', bloqueado_hasta = datetime(?, ?)
+            WHERE id = ?
+        ''', [(now, lease, row['id']) for row in rows])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return rows
+
+
+def _mark_sent(db, jobs):
+    with db:
+        db.executemany('''
+            UPDATE recordatorios_outbox
+            SET estado = 'enviado', enviado_at = ?,
+                bloqueado_hasta = NULL, ultimo_error = NULL
+            WHERE id = ?
+        ''', [(utcnow(), job['outbox_id']) for job in jobs])
+        db.executemany('''
+            INSERT OR IGNORE INTO recordatorios_enviados
+            (servicio_id, user_id, periodo, dias_anticipacion)
+            VALUES (?, ?, ?, ?)
+        ''', [enviado for job in jobs for enviado in job['enviados']])
+
+
+def _mark_failed(db, failed):
+    """Schedule a retry with exponential backoff, or give up after max_attempts"""
+    now = utcnow()
+    updates = []
+    for job, error in failed:
+        intentos = job['intentos'] + 1
+        if intentos >= OUTBOX_CONFIG['max_attempts']:
+            estado, delay = 'fallido', 0
+        else:
+            estado, delay = 'pendiente', backoff_seconds(intentos)
+        updates.append((estado, intentos, now, f'+{delay} seconds', error, job['outbox_id']))
+
+    with db:
+        db.executemany('''
+            UPDATE recordatorios_outbox
+            SET estado = ?, intentos = ?, proximo_intento = datetime(?, ?),
+                ultimo_error = ?, bloqueado_hasta = NULL
+            WHERE id = ?
+        ''', updates)
+
+
+def drain_outbox(mail, max_batches=None):
+    """
+    Send everything that is due in the outbox
+
+    Args:
+        mail: correo.Correo transport (see email_config.init_mail)
+        max_batches: Stop after this many batches (None = until nothing is due)
+
+    Returns:
+        (sent_jobs, failed) like dispatch_reminders(); failed jobs carry
+        'retry' = False when they will not be retried
+    """
+    db = database.connect()
+    all_sent = []
+    all_failed = []
+    batches = 0
+
+    try:
+        while max_batches is None or batches < max_batches:
+            rows = claim_batch(db)
+            if not rows:
+                break
+            batches += 1
+
+            # Rendered rows come back as the same dicts, so jobs are keyed by id()
+            jobs = {}
+            services = []
+            digests = []
+            for row in rows:
+                job = {
+                    'outbox_id': row['id'],
+                    'tipo': row['tipo'],
+                    'periodo': row['periodo'],
+                    'dias_anticipacion': row['dias_anticipacion'],
+                    'intentos': row['intentos'],
+                    'idempotency_key': row['idempotency_key'],
+                }
+                if row['tipo'] == 'resumen':
+                    digest = json.loads(row['payload'])
+                    job['resumen'] = digest
+                    job['enviados'] = [
+                        (servicio['servicio_id'], digest['user_id'],
+                         servicio['periodo'], servicio['dias_anticipacion'])
+                        for servicio in digest['servicios']
+                    ]
+                    digests.append(digest)
+                    jobs[id(digest)] = job
+                else:
+                    service_info = dict(json.loads(row['payload']),
+                                        periodo=row['periodo'],
+                                        dias_anticipacion=row['dias_anticipacion'])
+                    job['service_info'] = service_info
+                    job['enviados'] = [(service_info['servicio_id'], service_info['user_id'],
+                                        row['periodo'], row['dias_anticipacion'])]
+                    services.append(service_info)
+                    jobs[id(service_info)] = job
+
+            messages, render_errors = render_reminder_messages(services)
+            digest_messages, digest_errors = render_digest_messages(digests)
+            messages += digest_messages
+            build_errors = [(jobs[id(payload)], error) for payload, error in render_errors + digest_errors]
+            ready = []
+            for payload, message in messages:
+                job = jobs[id(payload)]
+                # Same Message-ID on every retry so receiving servers can drop duplicates
+                message.msgId = f"<recordatorio.{job['idempotency_key'].replace(':', '.')}@billetera-mata-galan>"
+                job['message'] = message
+                ready.append(job)
+
+            sent, failed = dispatch_reminders(mail, ready)
+            failed = build_errors + failed
+
+            _mark_sent(db, sent)
+            _mark_failed(db, failed)
+
+            for job, _ in failed:
+                job['retry'] = job['intentos'] + 1 < OUTBOX_CONFIG['max_attempts']
+
+            all_sent.extend(sent)
+            all_failed.extend(failed)
+    finally:
+        db.close()
+
+    return all_sent, all_failed
+
+
+def outbox_stats(db=None):
+    """Row counts per estado"""
+    own_db = db is None
+    if own_db:
+        db = database.connect()
+    try:
+        return {
+            row['estado']: row['cantidad']
+            for row in db.execute('''
+                SELECT estado, COUNT(*) as cantidad
+                FROM recordatorios_outbox
+                GROUP BY estado
+            ''')
+        }
+    finally:
+        if own_db:
+            db.close()
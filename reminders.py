@@ -3,21 +3,196 @@ Email reminders functionality for Billetera Mata Galán
 Sends payment reminders 3 days before and on due date
 """
 
-import sqlite3
-from datetime import datetime
-from flask_mail import Message
+import calendar
+import json
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import os
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+import database
+import formato
+from correo import Mensaje
+from email_config import DISPATCH_CONFIG
+
+EMAIL_TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'email')
+APP_URL = os.environ.get('APP_URL', 'https://joselogil.pythonanywhere.com')
 
 def get_db():
-    """Get database connection"""
-    db_path = os.environ.get('DATABASE_PATH', 'database/gastos.db')
-    db = sqlite3.connect(db_path)
-    db.row_factory = sqlite3.Row
-    return db
+    """Get database connection (WAL, so the web app keeps reading while we write)"""
+    return database.connect()
+
+# Reminder plan query. `objetivo` holds one row per (run date, offset):
+# the period the target date falls in, the range of dia_vencimiento values
+# that come due on it and the effective due date. On the last day of a month
+# the range extends to 31, so services due on the 29th-31st still match in
+# shorter months. Filled in by plan_reminders(); the last parameter is the
+# user's reminder mode ('individual' or 'resumen').
+REMINDER_PLAN_QUERY = '''
+    WITH objetivo(fecha_aviso, periodo, dia_min, dia_max, fecha_vencimiento, dias_anticipacion) AS (
+        VALUES {valores}
+    )
+    SELECT
+        s.id as servicio_id,
+        s.nombre as servicio_nombre,
+        s.dia_vencimiento,
+        s.monto as servicio_monto,
+        u.id as user_id,
+        u.username,
+        u.email,
+        c.nombre as categoria_nombre,
+        objetivo.fecha_aviso,
+        objetivo.periodo,
+        objetivo.fecha_vencimiento,
+        objetivo.dias_anticipacion,
+        COALESCE(r.total, 0) as monto_pagado
+    FROM objetivo
+    JOIN servicios s
+      ON s.activo = 1
+     AND s.dia_vencimiento BETWEEN objetivo.dia_min AND objetivo.dia_max
+    JOIN usuarios u ON s.user_id = u.id
+    LEFT JOIN categorias c ON s.categoria_id = c.id
+    LEFT JOIN pagos_resumen r
+      ON r.user_id = s.user_id AND r.periodo = objetivo.periodo AND r.servicio_id = s.id
+    WHERE u.recordatorios_email = 1
+      AND u.email IS NOT NULL
+      AND u.email != ''
+      AND (s.es_unico = 0 OR s.es_unico IS NULL)
+      AND NOT EXISTS (
+          SELECT 1 FROM servicios_omitidos o
+          WHERE o.servicio_id = s.id AND o.periodo = objetivo.periodo
+      )
+      AND NOT EXISTS (
+          SELECT 1 FROM recordatorios_enviados re
+          WHERE re.servicio_id = s.id
+            AND re.user_id = s.user_id
+            AND re.periodo = objetivo.periodo
+            AND re.dias_anticipacion = objetivo.dias_anticipacion
+      )
+      AND (s.monto IS NULL OR s.monto = 0 OR monto_pagado < s.monto)
+      AND COALESCE(u.recordatorios_modo, 'individual') = ?
+    ORDER BY u.id, objetivo.fecha_vencimiento, s.nombre
+'''
+
+# One row per (user, run date) for users in digest mode: the services are
+# grouped in SQL, so the number of emails grows with users, not services
+REMINDER_DIGEST_QUERY = '''
+    SELECT
+        plan.user_id,
+        plan.username,
+        plan.email,
+        plan.fecha_aviso,
+        COUNT(*) as cantidad,
+        json_group_array(json_object(
+            'servicio_id', plan.servicio_id,
+            'servicio_nombre', plan.servicio_nombre,
+            'dia_vencimiento', plan.dia_vencimiento,
+            'servicio_monto', plan.servicio_monto,
+            'categoria_nombre', plan.categoria_nombre,
+            'periodo', plan.periodo,
+            'fecha_vencimiento', plan.fecha_vencimiento,
+            'dias_anticipacion', plan.dias_anticipacion,
+            'monto_pagado', plan.monto_pagado
+        )) as servicios
+    FROM (''' + REMINDER_PLAN_QUERY + ''') plan
+    GROUP BY plan.user_id, plan.fecha_aviso
+    ORDER BY plan.user_id, plan.fecha_aviso
+'''
+
+# Placeholder for one `objetivo` row
+TARGET_ROW = '(?, ?, ?, ?, ?, ?)'
+
+def reminder_targets(desde, hasta, offsets):
+    """
+    Expand a date range and anticipation offsets into reminder targets
+
+    Args:
+        desde, hasta: First and last run date (datetime.date), inclusive
+        offsets: Days before due date, e.g. (3, 0)
+
+    Returns:
+        List of (fecha_aviso, periodo, dia_min, dia_max, fecha_vencimiento, dias_anticipacion)
+    """
+    targets = []
+    dia = desde
+    while dia <= hasta:
+        for offset in offsets:
+            vencimiento = dia + timedelta(days=offset)
+            ultimo_dia = calendar.monthrange(vencimiento.year, vencimiento.month)[1]
+            dia_max = 31 if vencimiento.day == ultimo_dia else vencimiento.day
+            targets.append((
+                dia.isoformat(),
+                vencimiento.strftime('%Y-%m'),
+                vencimiento.day,
+                dia_max,
+                vencimiento.isoformat(),
+                offset
+            ))
+        dia += timedelta(days=1)
+    return targets
+
+def _run_plan(query, desde, hasta, offsets, modo, db):
+    targets = reminder_targets(desde, hasta, offsets)
+    if not targets:
+        return []
+
+    query = query.format(valores=', '.join([TARGET_ROW] * len(targets)))
+    params = [value for target in targets for value in target] + [modo]
+
+    own_db = db is None
+    if own_db:
+        db = get_db()
+    try:
+        return [dict(row) for row in db.execute(query, params)]
+    finally:
+        if own_db:
+            db.close()
+
+def plan_reminders(desde, hasta, offsets, db=None, modo='individual'):
+    """
+    Services that need reminders for every run date in [desde, hasta]
+
+    One indexed query covers every (date, offset) pair, so a run checks the
+    data once no matter how many offsets it handles. Due dates in the next
+    month and days 29-31 in shorter months are handled.
+
+    Args:
+        desde, hasta: First and last run date (datetime.date), inclusive
+        offsets: Days before due date, e.g. (3, 0)
+        db: Optional open connection
+        modo: Only users with this reminder mode ('individual' or 'resumen')
+
+    Returns:
+        List of dicts with user and service info ready for emailing, including
+        'fecha_aviso', 'periodo', 'fecha_vencimiento' and 'dias_anticipacion'
+    """
+    return _run_plan(REMINDER_PLAN_QUERY, desde, hasta, offsets, modo, db)
+
+def plan_digests(desde, hasta, offsets, db=None):
+    """
+    Daily digests for users in 'resumen' mode
+
+    Same selection as plan_reminders(), grouped in SQL into one row per
+    user and run date.
+
+    Returns:
+        List of dicts with 'user_id', 'username', 'email', 'fecha_aviso' and
+        'servicios' (rows shaped like plan_reminders(), due date first)
+    """
+    digests = _run_plan(REMINDER_DIGEST_QUERY, desde, hasta, offsets, 'resumen', db)
+    for digest in digests:
+        servicios = json.loads(digest['servicios'])
+        servicios.sort(key=lambda servicio: (servicio['fecha_vencimiento'], servicio['servicio_nombre']))
+        digest['servicios'] = servicios
+    return digests
 
 def get_services_needing_reminders(dias_anticipacion):
     """
-    Get services that need reminders for the specified anticipation days
+    Get services that need reminders today for the specified anticipation days
 
     Args:
         dias_anticipacion: Days before due date (3 for advance notice, 0 for due date)
@@ -25,84 +200,175 @@ def get_services_needing_reminders(dias_anticipacion):
     Returns:
         List of dicts with user and service info ready for emailing
     """
-    db = get_db()
+    hoy = date.today()
+    return plan_reminders(hoy, hoy, [dias_anticipacion])
+
+def _vencimiento(service_info):
+    if service_info.get('fecha_vencimiento'):
+        return date.fromisoformat(service_info['fecha_vencimiento']).strftime('%d/%m/%Y')
+    return f"Día {service_info['dia_vencimiento']} de cada mes"
+
+def _monto_servicio(service_info):
+    monto = service_info['servicio_monto']
+    return formato.monto(monto) if monto and monto > 0 else 'Monto no especificado'
+
+def _pendiente_servicio(service_info):
+    monto = service_info['servicio_monto']
+    if monto and monto > 0:
+        return formato.monto(monto - service_info['monto_pagado'])
+    return 'Por definir'
+
+@lru_cache(maxsize=None)
+def get_email_env():
+    """Jinja environment for email templates, compiled once per process"""
+    env = Environment(
+        loader=FileSystemLoader(EMAIL_TEMPLATES_DIR),
+        autoescape=select_autoescape(['html']),
+        auto_reload=False,
+        trim_blocks=True
+    )
+    env.filters.update({
+        'spanish_number': formato.spanish_number,
+        'monto': formato.monto,
+        'vencimiento': _vencimiento,
+        'monto_servicio': _monto_servicio,
+        'pendiente_servicio': _pendiente_servicio,
+    })
+    env.globals['app_url'] = APP_URL
+    return env
+
+def _cuando(dias_anticipacion):
+    if dias_anticipacion == 0:
+        return 'vence hoy'
+    if dias_anticipacion == 1:
+        return 'vence mañana'
+    return f'vence en {dias_anticipacion} días'
+
+def _subject(servicio_nombre, dias_anticipacion):
+    if dias_anticipacion == 0:
+        return f"¡Hoy vence! {servicio_nombre}"
+    return f"Recordatorio: {servicio_nombre} {_cuando(dias_anticipacion)}"
+
+def render_reminder_messages(services):
+    """
+    Render many reminders with the compiled templates
+
+    Args:
+        services: Rows from plan_reminders() (dicts with 'dias_anticipacion')
+
+    Returns:
+        (messages, errors): list of (service_info, Mensaje) and list of
+        (service_info, error_message) for rows that could not be rendered
+    """
+    env = get_email_env()
+    html_template = env.get_template('recordatorio.html')
+    text_template = env.get_template('recordatorio.txt')
+
+    messages = []
+    errors = []
+    for service_info in services:
+        dias_anticipacion = service_info['dias_anticipacion']
+        try:
+            context = {'servicio': service_info, 'cuando': _cuando(dias_anticipacion)}
+            messages.append((service_info, Mensaje(
+                subject=_subject(service_info['servicio_nombre'], dias_anticipacion),
+                recipients=[service_info['email']],
+                body=text_template.render(context),
+                html=html_template.render(context)
+            )))
+        except Exception as e:
+            errors.append((service_info, str(e)))
+
+    return messages, errors
+
+def _digest_subject(servicios):
+    if len(servicios) == 1:
+        return _subject(servicios[0]['servicio_nombre'], servicios[0]['dias_anticipacion'])
+    if any(servicio['dias_anticipacion'] == 0 for servicio in servicios):
+        return f"¡Vencimientos hoy! {len(servicios)} servicios pendientes"
+    return f"Recordatorio: {len(servicios)} servicios por vencer"
+
+def render_digest_messages(digests):
+    """
+    Render one summary email per digest from plan_digests()
+
+    Returns:
+        (messages, errors): list of (digest, Mensaje) and list of
+        (digest, error_message) for digests that could not be rendered
+    """
+    env = get_email_env()
+    html_template = env.get_template('resumen.html')
+    text_template = env.get_template('resumen.txt')
+
+    messages = []
+    errors = []
+    for digest in digests:
+        try:
+            servicios = digest['servicios']
+            context = {
+                'usuario': digest,
+                'vencen_hoy': [s for s in servicios if s['dias_anticipacion'] == 0],
+                'proximos': [s for s in servicios if s['dias_anticipacion'] != 0],
+            }
+            messages.append((digest, Mensaje(
+                subject=_digest_subject(servicios),
+                recipients=[digest['email']],
+                body=text_template.render(context),
+                html=html_template.render(context)
+            )))
+        except Exception as e:
+            errors.append((digest, str(e)))
+
+    return messages, errors
+
+def build_reminder_message(service_info, dias_anticipacion):
+    """
+    Build the email reminder for a service payment
+
+    Args:
+        service_info: Dict with service and user information
+        dias_anticipacion: Days before due date (3 or 0)
+
+    Returns:
+        correo.Mensaje ready to send
+    """
+    messages, errors = render_reminder_messages([dict(service_info, dias_anticipacion=dias_anticipacion)])
+    if errors:
+        raise ValueError(errors[0][1])
+    return messages[0][1]
+
+def record_sent_reminders(sent):
+    """
+    Record sent reminders in a single transaction
+
+    Args:
+        sent: List of (service_info, dias_anticipacion) tuples
+    """
+    if not sent:
+        return
+
     periodo_actual = datetime.now().strftime('%Y-%m')
-    dia_actual = datetime.now().day
-
-    # Calculate target due day based on anticipation
-    # If dias_anticipacion=3 and today is 7, we want services due on day 10
-    target_day = dia_actual + dias_anticipacion
-
-    # Query services that:
-    # 1. Are active (activo=1)
-    # 2. Are not one-time payments already completed (es_unico=0 OR not paid yet)
-    # 3. Have due date matching target day
-    # 4. User has email reminders enabled (recordatorios_email=1)
-    # 5. User has email address
-    # 6. Service is not fully paid this month
-    # 7. Reminder not already sent for this service/period/anticipation
-    query = '''
-        SELECT
-            s.id as servicio_id,
-            s.nombre as servicio_nombre,
-            s.dia_vencimiento,
-            s.monto as servicio_monto,
-            u.id as user_id,
-            u.username,
-            u.email,
-            c.nombre as categoria_nombre,
-            COALESCE(
-                (SELECT SUM(monto)
-                 FROM pagos
-                 WHERE servicio_id = s.id
-                   AND user_id = s.user_id
-                   AND periodo = ?),
-                0
-            ) as monto_pagado
-        FROM servicios s
-        JOIN usuarios u ON s.user_id = u.id
-        LEFT JOIN categorias c ON s.categoria_id = c.id
-        WHERE s.activo = 1
-          AND u.recordatorios_email = 1
-          AND u.email IS NOT NULL
-          AND u.email != ''
-          AND s.dia_vencimiento = ?
-          AND (s.es_unico = 0 OR s.es_unico IS NULL)
-          AND NOT EXISTS (
-              SELECT 1 FROM recordatorios_enviados re
-              WHERE re.servicio_id = s.id
-                AND re.user_id = s.user_id
-                AND re.periodo = ?
-                AND re.dias_anticipacion = ?
-          )
-    '''
-
-    services = db.execute(query, (
-        periodo_actual,
-        target_day,
-        periodo_actual,
-        dias_anticipacion
-    )).fetchall()
-
-    # Filter out services that are fully paid
-    services_needing_reminder = []
-    for service in services:
-        # If monto is NULL or 0, we can't determine if it's paid, so send reminder
-        if not service['servicio_monto'] or service['servicio_monto'] == 0:
-            services_needing_reminder.append(dict(service))
-        # If not fully paid, send reminder
-        elif service['monto_pagado'] < service['servicio_monto']:
-            services_needing_reminder.append(dict(service))
-
-    db.close()
-    return services_needing_reminder
+    db = get_db()
+    try:
+        with db:
+            db.executemany('''
+                INSERT OR IGNORE INTO recordatorios_enviados
+                (servicio_id, user_id, periodo, dias_anticipacion)
+                VALUES (?, ?, ?, ?)
+            ''', [
+                (service_info['servicio_id'], service_info['user_id'],
+                 service_info.get('periodo', periodo_actual), dias)
+                for service_info, dias in sent
+            ])
+    finally:
+        db.close()
 
 def send_payment_reminder(mail, service_info, dias_anticipacion):
     """
-    Send email reminder for a service payment
+    Send a single email reminder for a service payment
 
     Args:
-        mail: Flask-Mail instance
+        mail: correo.Correo transport
         service_info: Dict with service and user information
         dias_anticipacion: Days before due date (3 or 0)
 
@@ -110,180 +376,171 @@ def send_payment_reminder(mail, service_info, dias_anticipacion):
         (success: bool, error_message: str or None)
     """
     try:
-        # Prepare email content
-        servicio_nombre = service_info['servicio_nombre']
-        dia_vencimiento = service_info['dia_vencimiento']
-        categoria = service_info['categoria_nombre'] or 'Sin categoría'
-        monto = service_info['servicio_monto']
-        monto_pagado = service_info['monto_pagado']
-        user_email = service_info['email']
-        username = service_info['username']
-
-        # Calculate pending amount
-        if monto and monto > 0:
-            pendiente = monto - monto_pagado
-            monto_str = f"${monto:,.2f}".replace(',', 'TEMP').replace('.', ',').replace('TEMP', '.')
-            pendiente_str = f"${pendiente:,.2f}".replace(',', 'TEMP').replace('.', ',').replace('TEMP', '.')
-        else:
-            monto_str = "Monto no especificado"
-            pendiente_str = "Por definir"
-
-        # Determine subject and greeting based on anticipation
-        if dias_anticipacion == 3:
-            subject = f"Recordatorio: {servicio_nombre} vence en 3 días"
-            greeting = f"Hola {username}, tu servicio <strong>{servicio_nombre}</strong> vence en 3 días."
-        elif dias_anticipacion == 0:
-            subject = f"¡Hoy vence! {servicio_nombre}"
-            greeting = f"Hola {username}, tu servicio <strong>{servicio_nombre}</strong> vence hoy."
-        else:
-            subject = f"Recordatorio: {servicio_nombre}"
-            greeting = f"Hola {username}, recordatorio sobre tu servicio <strong>{servicio_nombre}</strong>."
-
-        # HTML email body
-        html_body = f'''
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ background-color: #007bff; color: white; padding: 20px; text-align: center; border-radius: 5px 5px 0 0; }}
-                .content {{ background-color: #f8f9fa; padding: 20px; border: 1px solid #dee2e6; }}
-                .service-details {{ background-color: white; padding: 15px; margin: 15px 0; border-left: 4px solid #007bff; }}
-                .service-details p {{ margin: 8px 0; }}
-                .footer {{ text-align: center; padding: 15px; color: #6c757d; font-size: 12px; }}
-                .btn {{ display: inline-block; padding: 10px 20px; background-color: #007bff; color: white; text-decoration: none; border-radius: 5px; margin: 10px 0; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>💰 Billetera Mata Galán</h1>
-                </div>
-                <div class="content">
-                    <p>{greeting}</p>
-
-                    <div class="service-details">
-                        <p><strong>📌 Servicio:</strong> {servicio_nombre}</p>
-                        <p><strong>📁 Categoría:</strong> {categoria}</p>
-                        <p><strong>📅 Vencimiento:</strong> Día {dia_vencimiento} de cada mes</p>
-                        <p><strong>💵 Monto:</strong> {monto_str}</p>
-                        <p><strong>💳 Pendiente:</strong> {pendiente_str}</p>
-                    </div>
-
-                    <p>Recordá registrar tu pago cuando lo realices para mantener tu historial actualizado.</p>
-
-                    <p style="text-align: center;">
-                        <a href="https://joselogil.pythonanywhere.com" class="btn">Ir a Billetera Mata Galán</a>
-                    </p>
-                </div>
-                <div class="footer">
-                    <p>Este es un recordatorio automático de Billetera Mata Galán</p>
-                    <p>Podés desactivar los recordatorios desde Configuración en tu panel</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        '''
-
-        # Plain text fallback
-        text_body = f'''
-        Hola {username},
-
-        {'Tu servicio vence en 3 días' if dias_anticipacion == 3 else '¡Tu servicio vence hoy!'}
-
-        Detalles del servicio:
-        - Servicio: {servicio_nombre}
-        - Categoría: {categoria}
-        - Vencimiento: Día {dia_vencimiento}
-        - Monto: {monto_str}
-        - Pendiente: {pendiente_str}
-
-        Recordá registrar tu pago en: https://joselogil.pythonanywhere.com
-
-        ---
-        Billetera Mata Galán - Recordatorio automático
-        '''
-
-        # Create and send message
-        msg = Message(
-            subject=subject,
-            recipients=[user_email],
-            body=text_body,
-            html=html_body
-        )
-
-        mail.send(msg)
-
-        # Record that reminder was sent
-        db = get_db()
-        periodo_actual = datetime.now().strftime('%Y-%m')
-        db.execute('''
-            INSERT INTO recordatorios_enviados
-            (servicio_id, user_id, periodo, dias_anticipacion)
-            VALUES (?, ?, ?, ?)
-        ''', (
-            service_info['servicio_id'],
-            service_info['user_id'],
-            periodo_actual,
-            dias_anticipacion
-        ))
-        db.commit()
-        db.close()
-
+        mail.send(build_reminder_message(service_info, dias_anticipacion))
+        record_sent_reminders([(service_info, dias_anticipacion)])
         return True, None
 
     except Exception as e:
         return False, str(e)
 
+class RateLimiter:
+    """Spaces out sends so all workers together stay under `per_second`"""
+
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second if per_second else 0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(self._next, now) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+def _next_job(pending):
+    try:
+        return pending.get_nowait()
+    except queue.Empty:
+        return None
+
+def _connection_lost(error):
+    """
+    True if `error` means the SMTP session is unusable
+
+    Every smtplib.SMTPException subclasses OSError, so they are told apart
+    first: only a disconnect or a 421 (service closing) ends the session; a
+    refused recipient or rejected message is a per-message error.
+    """
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    # Socket errors: reset, broken pipe, timeout
+    return isinstance(error, OSError)
+
+def _send_worker(mail, pending, limiter, sent, failed):
+    """
+    Drain the shared queue through one persistent SMTP connection
+
+    Per-message errors (bad recipient, rejected data, etc.) are recorded and the
+    worker moves on over the same session. If the connection itself fails, the
+    current job is recorded as failed and the worker reconnects for the rest.
+    """
+    job = _next_job(pending)
+    while job is not None:
+        try:
+            with mail.connect() as conn:
+                while job is not None:
+                    limiter.wait()
+                    try:
+                        conn.send(job['message'])
+                        sent.append(job)
+                    except Exception as e:
+                        if _connection_lost(e):
+                            raise
+                        failed.append((job, str(e)))
+                    job = _next_job(pending)
+        except Exception as e:
+            if job is not None:
+                failed.append((job, str(e)))
+                job = _next_job(pending)
+
+def dispatch_reminders(mail, jobs, concurrency=None, rate_limit=None):
+    """
+    Send many reminders over a bounded pool of persistent SMTP connections
+
+    Args:
+        mail: correo.Correo transport (see email_config.init_mail)
+        jobs: List of dicts with 'service_info', 'dias_anticipacion' and 'message'
+        concurrency: Number of worker threads / SMTP connections
+        rate_limit: Max messages per second across all workers (0 = unlimited)
+
+    Returns:
+        (sent_jobs, failed) where failed is a list of (job, error_message)
+    """
+    if concurrency is None:
+        concurrency = DISPATCH_CONFIG['concurrency']
+    if rate_limit is None:
+        rate_limit = DISPATCH_CONFIG['rate_limit']
+
+    pending = queue.Queue()
+    for job in jobs:
+        pending.put(job)
+
+    sent = []
+    failed = []
+    limiter = RateLimiter(rate_limit)
+    workers = max(1, min(concurrency, len(jobs)))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_send_worker, mail, pending, limiter, sent, failed)
+            for _ in range(workers)
+        ]
+        for future in futures:
+            future.result()
+
+    return sent, failed
+
+def describe_job(job):
+    """(service, user) of an outbox job for error reports; digests carry 'resumen' instead of 'service_info'"""
+    if job['tipo'] == 'resumen':
+        return (f"resumen de {len(job['resumen']['servicios'])} servicios",
+                job['resumen']['username'])
+    return job['service_info']['servicio_nombre'], job['service_info']['username']
+
 def check_and_send_reminders(mail):
     """
     Main function to check and send all pending reminders
 
+    Queues every due reminder in the outbox and then drains it (see
+    reminder_outbox). Failed sends stay queued and are retried with backoff.
+
     Args:
-        mail: Flask-Mail instance
+        mail: correo.Correo transport
 
     Returns:
         Dict with results summary
     """
+    # Imported here: reminder_outbox builds on this module
+    from reminder_outbox import enqueue_reminders, drain_outbox
+
     results = {
         'total_sent': 0,
+        'queued': 0,
         'errors': [],
         'details': {
             '3_days': {'sent': 0, 'errors': 0},
-            'due_today': {'sent': 0, 'errors': 0}
+            'due_today': {'sent': 0, 'errors': 0},
+            'digest': {'sent': 0, 'errors': 0}
         }
     }
 
-    # Check for services due in 3 days
-    services_3_days = get_services_needing_reminders(3)
-    for service in services_3_days:
-        success, error = send_payment_reminder(mail, service, 3)
-        if success:
-            results['total_sent'] += 1
-            results['details']['3_days']['sent'] += 1
-        else:
-            results['details']['3_days']['errors'] += 1
-            results['errors'].append({
-                'service': service['servicio_nombre'],
-                'user': service['username'],
-                'error': error
-            })
-
-    # Check for services due today
-    services_today = get_services_needing_reminders(0)
-    for service in services_today:
-        success, error = send_payment_reminder(mail, service, 0)
-        if success:
-            results['total_sent'] += 1
-            results['details']['due_today']['sent'] += 1
-        else:
-            results['details']['due_today']['errors'] += 1
-            results['errors'].append({
-                'service': service['servicio_nombre'],
-                'user': service['username'],
-                'error': error
-            })
+    def detail_key(job):
+        if job['tipo'] == 'resumen':
+            return 'digest'
+        return '3_days' if job['dias_anticipacion'] == 3 else 'due_today'
+
+    results['queued'] = enqueue_reminders()
+    sent, failed = drain_outbox(mail)
+
+    for job in sent:
+        results['total_sent'] += 1
+        results['details'][detail_key(job)]['sent'] += 1
+
+    for job, error in failed:
+        results['details'][detail_key(job)]['errors'] += 1
+        service, user = describe_job(job)
+        results['errors'].append({
+            'service': service,
+            'user': user,
+            'error': error if job['retry'] else f'{error} (sin más reintentos)'
+        })
 
     return results
@@ -3,33 +3,89 @@
 Standalone script to run email reminders
 This script is meant to be run as a scheduled task on PythonAnywhere
 
+It does not import the web app (Flask, Excel export, NumPy...): only the
+database, the email templates and the SMTP transport in correo.py, so each
+cron run starts fast.
+
 Usage:
-    python run_reminders.py
+    python run_reminders.py                 # Encola y envía una vez (tarea programada)
+    python run_reminders.py --encolar       # Solo encola los recordatorios del día
+    python run_reminders.py --encolar --desde 2024-05-01   # Recupera días sin ejecutar
+    python run_reminders.py --worker        # Envía lo encolado en un loop (proceso permanente)
+    python run_reminders.py --worker --intervalo 30
 
 Environment variables required:
     - EMAIL_USER: Gmail address
     - EMAIL_PASSWORD: Gmail app password
     - DATABASE_PATH: Path to SQLite database (optional, defaults to database/gastos.db)
-    - SECRET_KEY: Flask secret key (required by Flask)
 """
 
 import sys
 import os
-from datetime import datetime
+import time
+import argparse
+from datetime import date, datetime
 
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import app
+import database
+import instrumentacion
+import migrations
 from email_config import init_mail, validate_email_config
-from reminders import check_and_send_reminders
+from reminders import check_and_send_reminders, describe_job
+from reminder_outbox import enqueue_reminders, drain_outbox, outbox_stats
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Recordatorios por email')
+    parser.add_argument('--encolar', action='store_true',
+                        help='Solo encolar los recordatorios del día, sin enviar')
+    parser.add_argument('--desde', type=date.fromisoformat,
+                        help='Con --encolar: encolar también los días desde esta fecha (YYYY-MM-DD)')
+    parser.add_argument('--worker', action='store_true',
+                        help='Enviar lo encolado en un loop hasta que se interrumpa')
+    parser.add_argument('--intervalo', type=int, default=60,
+                        help='Segundos entre vueltas del worker (default 60)')
+    return parser.parse_args(argv)
 
-def main():
+def run_worker(mail, intervalo):
+    """Drain the outbox forever; retries become due as their backoff expires"""
+    print(f"Worker iniciado (intervalo {intervalo}s). Ctrl+C para salir.")
+    try:
+        while True:
+            sent, failed = drain_outbox(mail)
+            if sent or failed:
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] "
+                      f"enviados: {len(sent)}, errores: {len(failed)}")
+                for job, error in failed:
+                    service, user = describe_job(job)
+                    print(f"  - {service} ({user}): {error}")
+            time.sleep(intervalo)
+    except KeyboardInterrupt:
+        print("\nWorker detenido")
+    return 0
+
+def main(argv=None):
     """Main function to run reminders"""
+    args = parse_args(argv)
+
     print(f"=== Billetera Mata Galán - Email Reminders ===")
     print(f"Fecha/Hora: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print()
 
+    # Same schema as the web app (which migrates when it starts)
+    db = database.connect()
+    try:
+        migrations.migrate(db)
+    finally:
+        db.close()
+
+    if args.encolar:
+        encolados = enqueue_reminders(desde=args.desde, hasta=date.today())
+        print(f"Recordatorios encolados: {encolados}")
+        print(f"Estado de la cola: {outbox_stats()}")
+        return 0
+
     # Validate email configuration
     is_valid, message = validate_email_config()
     if not is_valid:
@@ -40,30 +96,39 @@ def main():
     print("✓ Configuración de email válida")
     print()
 
-    # Initialize Flask-Mail
-    with app.app_context():
-        mail = init_mail(app)
-
-        # Check and send reminders
-        print("Buscando servicios que necesitan recordatorios...")
-        results = check_and_send_reminders(mail)
-
-        # Print results
-        print()
-        print("=== RESULTADOS ===")
-        print(f"Total enviados: {results['total_sent']}")
-        print(f"  - Recordatorios 3 días antes: {results['details']['3_days']['sent']}")
-        print(f"  - Recordatorios día de vencimiento: {results['details']['due_today']['sent']}")
-
-        if results['errors']:
-            print(f"\n⚠ Errores: {len(results['errors'])}")
-            for error in results['errors']:
-                print(f"  - {error['service']} ({error['user']}): {error['error']}")
-        else:
-            print("\n✓ Sin errores")
-
-        print()
-        print("=== FIN ===")
+    # SMTP transport (no Flask app needed)
+    mail = init_mail()
+
+    if args.worker:
+        return run_worker(mail, args.intervalo)
+
+    # Check and send reminders
+    print("Buscando servicios que necesitan recordatorios...")
+    results = check_and_send_reminders(mail)
+
+    # Print results
+    print()
+    print("=== RESULTADOS ===")
+    print(f"Encolados: {results['queued']}")
+    print(f"Total enviados: {results['total_sent']}")
+    print(f"  - Recordatorios 3 días antes: {results['details']['3_days']['sent']}")
+    print(f"  - Recordatorios día de vencimiento: {results['details']['due_today']['sent']}")
+    print(f"  - Resúmenes diarios: {results['details']['digest']['sent']}")
+
+    if results['errors']:
+        print(f"\n⚠ Errores: {len(results['errors'])} (se reintentan con --worker o en la próxima ejecución)")
+        for error in results['errors']:
+            print(f"  - {error['service']} ({error['user']}): {error['error']}")
+    else:
+        print("\n✓ Sin errores")
+
+    # Consultas medidas por instrumentacion.py (las lentas ya se loguearon con su plan)
+    sentencias = instrumentacion.metricas()['sentencias']
+    print(f"\nSQL: {sum(s['cantidad'] for s in sentencias)} consultas, "
+          f"{sum(s['ms'] for s in sentencias):.1f}ms")
+
+    print()
+    print("=== FIN ===")
 
     return 0 if not results['errors'] else 1
 
@@ -0,0 +1,197 @@
+"""
+Recepción de facturas y comprobantes en streaming
+
+Werkzeug va escribiendo cada archivo del multipart en el stream que le
+devuelve Request._get_file_stream(), de a bloques. SubidaRequest le da un
+ArchivoSubido que:
+- con los primeros bytes verifica que el contenido sea del tipo que dice la
+  extensión (PDF, PNG o JPEG),
+- controla que el archivo no pase MAX_FILE_SIZE,
+- escribe directo al disco (uploads/tmp) calculando el SHA-256,
+así que la memoria por subida queda acotada a un bloque. Después
+Almacenamiento.confirmar() lo mueve a blobs/ sin volver a leerlo.
+
+En las rutas que solo suben un adjunto, un archivo inválido corta la subida
+(413/415) sin leer el resto del request. Donde el archivo acompaña otros
+datos (registrar un pago) el archivo queda marcado como rechazado, se
+descarta lo que falta de él y la ruta guarda el resto y avisa.
+"""
+
+import hashlib
+import os
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'}
+MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB por archivo
+
+# Primeros bytes de cada tipo permitido
+FIRMAS = {
+    'pdf': (b'%PDF-',),
+    'png': (b'\x89PNG\r\n\x1a\n',),
+    'jpg': (b'\xff\xd8\xff',),
+    'jpeg': (b'\xff\xd8\xff',),
+}
+LARGO_FIRMA = max(len(firma) for firmas in FIRMAS.values() for firma in firmas)
+
+# Rutas que reciben archivos y cuántos archivos aceptan como máximo
+ENDPOINTS_SUBIDA = {
+    'dashboard.registrar_pago': 2,
+    'adjuntos.upload_invoice': 1,
+    'adjuntos.upload_bill': 1,
+}
+
+# Rutas donde el archivo es opcional junto a otros datos: un archivo inválido
+# no corta el request, queda en ArchivoSubido.rechazado (ver rechazo())
+ENDPOINTS_TOLERANTES = {'dashboard.registrar_pago'}
+
+# Margen para los campos del formulario y los encabezados multipart
+MARGEN_FORMULARIO = 64 * 1024
+
+
+def extension(filename):
+    return filename.rsplit('.', 1)[1].lower() if filename and '.' in filename else ''
+
+
+def rechazo(file):
+    """Motivo por el que se rechazó el archivo de un FileStorage, o None si es válido"""
+    return getattr(file.stream, 'rechazado', None)
+
+
+class ArchivoSubido:
+    """
+    Archivo temporal que verifica tipo y tamaño mientras Werkzeug escribe
+
+    Después de escrito se comporta como un archivo de lectura (FileStorage lo
+    usa así) y expone `ruta`, `digest` y `size` para Almacenamiento.confirmar().
+
+    Con `estricto` un archivo inválido levanta 413/415; si no, se borra el
+    temporal, `rechazado` queda con el motivo y el resto del archivo se descarta.
+    """
+
+    def __init__(self, archivo, ext, max_size=MAX_FILE_SIZE, estricto=True):
+        self._archivo = archivo
+        self.ruta = archivo.name
+        self.ext = ext
+        self.max_size = max_size
+        self.estricto = estricto
+        self.rechazado = None
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+        self._cabecera = b''
+
+    @property
+    def digest(self):
+        return self._sha256.hexdigest()
+
+    def write(self, data):
+        if self.rechazado:
+            return len(data)
+
+        self.size += len(data)
+        if self.size > self.max_size:
+            self.rechazar(RequestEntityTooLarge(
+                f'El archivo supera el máximo de {self.max_size // (1024 * 1024)}MB'))
+            return len(data)
+
+        if len(self._cabecera) < LARGO_FIRMA:
+            self._cabecera += data[:LARGO_FIRMA - len(self._cabecera)]
+            if len(self._cabecera) >= LARGO_FIRMA or self.size >= LARGO_FIRMA:
+                if not self._verificar_tipo():
+                    return len(data)
+
+        self._sha256.update(data)
+        return self._archivo.write(data)
+
+    def _verificar_tipo(self):
+        if not self._cabecera.startswith(FIRMAS[self.ext]):
+            self.rechazar(UnsupportedMediaType('El contenido del archivo no corresponde a un PDF, JPG o PNG'))
+            return False
+        return True
+
+    def rechazar(self, error):
+        """Descarta el archivo; levanta `error` si es estricto o guarda su motivo"""
+        self.descartar()
+        if self.estricto:
+            raise error
+        self.rechazado = error.description
+
+    def seek(self, offset, whence=0):
+        # Werkzeug hace seek(0) al terminar de escribir: archivos muy cortos
+        # todavía no se verificaron
+        if not self.rechazado and len(self._cabecera) < LARGO_FIRMA:
+            self._verificar_tipo()
+        if self.rechazado:
+            return 0
+        self._archivo.flush()
+        return self._archivo.seek(offset, whence)
+
+    def read(self, *args):
+        return b'' if self.rechazado else self._archivo.read(*args)
+
+    def readline(self, *args):
+        return b'' if self.rechazado else self._archivo.readline(*args)
+
+    def tell(self):
+        return 0 if self.rechazado else self._archivo.tell()
+
+    def flush(self):
+        if not self.rechazado:
+            self._archivo.flush()
+
+    def confirmar(self, almacenamiento, db):
+        """
+        Mueve el archivo a su blob con el hash ya calculado
+
+        Returns:
+            (clave, tamaño); la transacción de `db` queda abierta
+        """
+        self._archivo.close()
+        return almacenamiento.confirmar(db, self.ruta, self.digest, self.size), self.size
+
+    def close(self):
+        """Cierra y borra el temporal si nadie lo movió a blobs/"""
+        self._archivo.close()
+        if os.path.exists(self.ruta):
+            os.remove(self.ruta)
+
+    def descartar(self):
+        self.close()
+
+    @property
+    def closed(self):
+        return self._archivo.closed
+
+
+class SubidaRequest(Request):
+    """Request que recibe los archivos de las rutas de subida con ArchivoSubido"""
+
+    @property
+    def max_content_length(self):
+        archivos = ENDPOINTS_SUBIDA.get(self.endpoint)
+        if archivos:
+            return archivos * MAX_FILE_SIZE + MARGEN_FORMULARIO
+        return super().max_content_length
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint not in ENDPOINTS_SUBIDA:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+        # Campo de archivo vacío (el usuario no eligió nada): lo descarta la ruta
+        if not filename:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+        ext = extension(filename)
+        # El de la app (ver app.create_app): el temporal queda en su raíz
+        archivo = ArchivoSubido(current_app.extensions['adjuntos'].temporal(), ext,
+                                estricto=self.endpoint not in ENDPOINTS_TOLERANTES)
+        self.__dict__.setdefault('_subidas', []).append(archivo)
+        if ext not in ALLOWED_EXTENSIONS:
+            archivo.rechazar(UnsupportedMediaType('Archivo inválido. Solo se permiten PDF, JPG, PNG'))
+        return archivo
+
+    def close(self):
+        super().close()
+        # Archivos de un multipart que se cortó a mitad de camino
+        for archivo in self.__dict__.pop('_subidas', ()):
+            archivo.close()
@@ -0,0 +1,101 @@
+"""
+Fixtures de los tests de comportamiento: base migrada, app y cliente logueado
+
+Cada test usa su propia base y carpeta de adjuntos en tmp_path. Los tiempos
+se miden aparte, en benchmarks/.
+
+Usage:
+    python -m pytest tests -q
+"""
+
+import io
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Los módulos leen DATABASE_PATH y UPLOADS_PATH al importarse: que no sean los reales
+_tmpdir = tempfile.mkdtemp(prefix='tests-')
+os.environ['DATABASE_PATH'] = os.path.join(_tmpdir, 'vacia.db')
+os.environ['UPLOADS_PATH'] = os.path.join(_tmpdir, 'uploads')
+
+import database
+import migrations
+from app import create_app
+
+USUARIO = 'ana'
+CONTRASENA = 'secreta'
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Base migrada vacía; también es la de database.DATABASE_PATH (recordatorios, outbox)"""
+    path = str(tmp_path / 'gastos.db')
+    db = database.connect(path)
+    try:
+        migrations.migrate(db)
+    finally:
+        db.close()
+    monkeypatch.setattr(database, 'DATABASE_PATH', path)
+    return path
+
+
+@pytest.fixture
+def db(db_path):
+    db = database.connect(db_path)
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def uploads(tmp_path):
+    return str(tmp_path / 'uploads')
+
+
+@pytest.fixture
+def app(db_path, uploads):
+    return create_app({
+        'DATABASE': db_path,
+        'UPLOADS_PATH': uploads,
+        'TESTING': True,
+        'SQL_LOG_REQUESTS': False,
+    })
+
+
+@pytest.fixture
+def cliente(app):
+    """Test client con USUARIO registrado y logueado"""
+    cliente = app.test_client()
+    cliente.post('/register', data={'username': USUARIO, 'password': CONTRASENA})
+    respuesta = cliente.post('/login', data={'username': USUARIO, 'password': CONTRASENA})
+    assert respuesta.status_code == 302
+    return cliente
+
+
+@pytest.fixture
+def usuario_id(cliente, db):
+    return db.execute('SELECT id FROM usuarios WHERE username = ?', (USUARIO,)).fetchone()[0]
+
+
+@pytest.fixture
+def servicio_id(cliente, db, usuario_id):
+    """Un servicio mensual de USUARIO"""
+    cliente.post('/servicio/nuevo', data={'nombre': 'Luz', 'dia_vencimiento': '10', 'monto': '1000'})
+    return db.execute('SELECT id FROM servicios WHERE user_id = ?', (usuario_id,)).fetchone()[0]
+
+
+@pytest.fixture
+def registrar_pago(cliente, db, servicio_id):
+    """registrar_pago(invoice=(bytes, nombre), ...) -> (respuesta, id del pago)"""
+    def registrar_pago(**archivos):
+        datos = {'monto': '500', 'metodo_pago': 'Efectivo'}
+        for campo, (contenido, nombre) in archivos.items():
+            datos[campo] = (io.BytesIO(contenido), nombre)
+        respuesta = cliente.post(f'/pago/registrar/{servicio_id}', data=datos,
+                                 content_type='multipart/form-data')
+        return respuesta, db.execute('SELECT MAX(id) FROM pagos').fetchone()[0]
+
+    return registrar_pago
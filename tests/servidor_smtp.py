@@ -0,0 +1,93 @@
+"""
+Servidor SMTP de prueba en 127.0.0.1 para los tests del envío de recordatorios
+
+Habla lo justo del protocolo para smtplib (EHLO, MAIL, RCPT, DATA, RSET,
+QUIT) y guarda qué recibió. Con `rechazar` responde 550 a los destinatarios
+que contienen ese texto; con `cortar_despues` cierra el socket sin avisar
+después de aceptar esa cantidad de mensajes en una misma sesión.
+"""
+
+import socketserver
+import threading
+
+
+class ServidorSMTP:
+    def __init__(self, rechazar=None, cortar_despues=None):
+        self.rechazar = rechazar
+        self.cortar_despues = cortar_despues
+        self.conexiones = 0
+        self.mensajes = []  # (destinatarios, datos) de cada DATA aceptado
+        self._lock = threading.Lock()
+
+        servidor = self
+
+        class Sesion(socketserver.StreamRequestHandler):
+            def handle(self):
+                servidor._atender(self)
+
+        self._tcp = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Sesion)
+        self._tcp.daemon_threads = True
+        self.puerto = self._tcp.server_address[1]
+
+    def __enter__(self):
+        threading.Thread(target=self._tcp.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._tcp.shutdown()
+        self._tcp.server_close()
+
+    def config(self, **extra):
+        """Claves MAIL_* para correo.Correo apuntando a este servidor"""
+        return dict({'MAIL_SERVER': '127.0.0.1', 'MAIL_PORT': self.puerto,
+                     'MAIL_DEFAULT_SENDER': 'test@example.com'}, **extra)
+
+    def destinatarios(self):
+        return [destinatario for destinatarios, _ in self.mensajes for destinatario in destinatarios]
+
+    def _atender(self, sesion):
+        with self._lock:
+            self.conexiones += 1
+
+        def responder(linea):
+            sesion.wfile.write(linea.encode() + b'\r\n')
+
+        responder('220 prueba')
+        destinatarios = []
+        datos = None
+        enviados = 0
+        for crudo in sesion.rfile:
+            linea = crudo.decode('utf-8', 'replace').rstrip('\r\n')
+            if datos is not None:
+                if linea != '.':
+                    datos.append(linea)
+                    continue
+                with self._lock:
+                    self.mensajes.append((destinatarios, '\n'.join(datos)))
+                destinatarios, datos = [], None
+                enviados += 1
+                responder('250 ok')
+                if self.cortar_despues and enviados >= self.cortar_despues:
+                    return
+                continue
+
+            comando = linea[:4].upper()
+            if comando in ('EHLO', 'HELO'):
+                responder('250 prueba')
+            elif comando == 'RCPT':
+                if self.rechazar and self.rechazar in linea:
+                    responder('550 no existe el usuario')
+                else:
+                    destinatarios.append(linea.split(':', 1)[1].strip().strip('<>'))
+                    responder('250 ok')
+            elif comando == 'RSET':
+                destinatarios = []
+                responder('250 ok')
+            elif comando == 'DATA':
+                datos = []
+                responder('354 adelante')
+            elif comando == 'QUIT':
+                responder('221 chau')
+                return
+            else:
+                responder('250 ok')
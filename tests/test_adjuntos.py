@@ -0,0 +1,120 @@
+"""
+Almacenamiento deduplicado de adjuntos (almacenamiento.py)
+
+Un mismo contenido es un solo blob con una referencia por pago; el archivo
+se borra recién cuando se libera la última y la transacción ya se confirmó.
+"""
+
+import io
+import os
+
+from almacenamiento import Almacenamiento
+
+PDF = b'%PDF-1.4\n' + b'contenido del comprobante\n' * 40
+
+
+def _blobs(raiz):
+    """Blobs en disco (sin miniaturas)"""
+    return sorted(
+        nombre
+        for _, _, archivos in os.walk(os.path.join(raiz, 'blobs'))
+        for nombre in archivos
+        if len(nombre) == 64
+    )
+
+
+def _referencias(db):
+    return db.execute('SELECT clave, referencias FROM adjuntos').fetchall()
+
+
+def test_mismo_contenido_es_un_blob_con_dos_referencias(db, tmp_path):
+    almacenamiento = Almacenamiento(str(tmp_path))
+
+    clave_a, size_a = almacenamiento.guardar(db, io.BytesIO(PDF))
+    clave_b, size_b = almacenamiento.guardar(db, io.BytesIO(PDF))
+    db.commit()
+
+    assert clave_a == clave_b
+    assert size_a == size_b == len(PDF)
+    assert [tuple(fila) for fila in _referencias(db)] == [(clave_a, 2)]
+    assert len(_blobs(str(tmp_path))) == 1
+    with open(almacenamiento.ruta(clave_a), 'rb') as f:
+        assert f.read() == PDF
+
+
+def test_liberar_una_referencia_deja_el_archivo(db, tmp_path):
+    almacenamiento = Almacenamiento(str(tmp_path))
+    clave, _ = almacenamiento.guardar(db, io.BytesIO(PDF))
+    almacenamiento.guardar(db, io.BytesIO(PDF))
+    db.commit()
+
+    assert almacenamiento.liberar(db, clave) == []
+    db.commit()
+
+    assert [tuple(fila) for fila in _referencias(db)] == [(clave, 1)]
+    assert os.path.exists(almacenamiento.ruta(clave))
+
+
+def test_la_ultima_referencia_se_borra_despues_del_commit(db, tmp_path):
+    almacenamiento = Almacenamiento(str(tmp_path))
+    clave, _ = almacenamiento.guardar(db, io.BytesIO(PDF))
+    db.commit()
+
+    # Si la transacción se revierte el blob sigue registrado y en disco
+    assert almacenamiento.liberar(db, clave) == [clave]
+    assert os.path.exists(almacenamiento.ruta(clave))
+    db.rollback()
+    assert [tuple(fila) for fila in _referencias(db)] == [(clave, 1)]
+
+    claves = almacenamiento.liberar(db, clave)
+    db.commit()
+    assert os.path.exists(almacenamiento.ruta(clave))
+
+    almacenamiento.borrar(db, claves)
+    assert _referencias(db) == []
+    assert not os.path.exists(almacenamiento.ruta(clave))
+
+
+def test_borrar_respeta_un_blob_subido_de_nuevo(db, tmp_path):
+    almacenamiento = Almacenamiento(str(tmp_path))
+    clave, _ = almacenamiento.guardar(db, io.BytesIO(PDF))
+    db.commit()
+    claves = almacenamiento.liberar(db, clave)
+    db.commit()
+
+    # Entre el commit y borrar() otro pago sube el mismo contenido
+    almacenamiento.guardar(db, io.BytesIO(PDF))
+    db.commit()
+    almacenamiento.borrar(db, claves)
+
+    assert os.path.exists(almacenamiento.ruta(clave))
+
+
+def test_limpiar_borra_blobs_sin_referencias(db, tmp_path):
+    almacenamiento = Almacenamiento(str(tmp_path))
+    clave, _ = almacenamiento.guardar(db, io.BytesIO(PDF))
+    db.rollback()
+
+    assert os.path.exists(almacenamiento.ruta(clave))
+    assert almacenamiento.limpiar(db) == (1, 0)
+    assert not os.path.exists(almacenamiento.ruta(clave))
+
+
+def test_dos_pagos_comparten_el_comprobante(cliente, db, uploads, registrar_pago):
+    _, pago_a = registrar_pago(invoice=(PDF, 'enero.pdf'))
+    _, pago_b = registrar_pago(invoice=(PDF, 'febrero.pdf'))
+
+    filas = db.execute('SELECT invoice_path FROM pagos WHERE id IN (?, ?)', (pago_a, pago_b)).fetchall()
+    claves = {fila['invoice_path'] for fila in filas}
+    assert len(claves) == 1
+    clave = claves.pop()
+    assert [tuple(fila) for fila in _referencias(db)] == [(clave, 2)]
+    assert len(_blobs(uploads)) == 1
+
+    cliente.post(f'/factura/eliminar/{pago_a}')
+    assert [tuple(fila) for fila in _referencias(db)] == [(clave, 1)]
+    assert len(_blobs(uploads)) == 1
+
+    cliente.post(f'/factura/eliminar/{pago_b}')
+    assert _referencias(db) == []
+    assert _blobs(uploads) == []
@@ -0,0 +1,135 @@
+"""
+API JSON (api.py): autenticación con token y validación de los cuerpos
+"""
+
+import json
+
+import pytest
+
+import api
+
+
+@pytest.fixture
+def token(db, usuario_id):
+    return api.crear_token(db, usuario_id, 'tests')
+
+
+@pytest.fixture
+def api_cliente(app, token):
+    """Test client que manda el token en cada pedido"""
+    class Cliente:
+        def __init__(self):
+            self._cliente = app.test_client()
+
+        def open(self, metodo, url, **kwargs):
+            kwargs.setdefault('headers', {})['Authorization'] = f'Bearer {token}'
+            return self._cliente.open(url, method=metodo, **kwargs)
+
+        def post_crudo(self, url, cuerpo):
+            """Cuerpo tal cual: puede traer NaN o Infinity, que no son JSON válido"""
+            return self.open('POST', url, data=cuerpo, content_type='application/json')
+
+    return Cliente()
+
+
+@pytest.mark.parametrize('encabezados', [
+    {},
+    {'Authorization': 'Basic YW5hOnNlY3JldGE='},
+    {'Authorization': 'Bearer'},
+])
+def test_sin_token_es_401(app, encabezados):
+    respuesta = app.test_client().get('/api/v1/dashboard', headers=encabezados)
+
+    assert respuesta.status_code == 401
+    assert respuesta.get_json() == {'error': 'Falta el token (Authorization: Bearer ...)'}
+
+
+def test_token_incorrecto_es_401(app, token):
+    respuesta = app.test_client().get('/api/v1/dashboard', headers={'Authorization': f'Bearer {token}x'})
+
+    assert respuesta.status_code == 401
+    assert respuesta.get_json() == {'error': 'Token inválido'}
+
+
+def test_token_revocado_es_401(app, db, usuario_id, token):
+    cliente = app.test_client()
+    encabezados = {'Authorization': f'Bearer {token}'}
+    assert cliente.get('/api/v1/dashboard', headers=encabezados).status_code == 200
+
+    token_id = db.execute('SELECT id FROM api_tokens WHERE user_id = ?', (usuario_id,)).fetchone()[0]
+    api.revocar_token(db, usuario_id, token_id)
+
+    respuesta = cliente.get('/api/v1/dashboard', headers=encabezados)
+    assert respuesta.status_code == 401
+    assert respuesta.get_json() == {'error': 'Token inválido'}
+
+
+@pytest.mark.parametrize('cuerpo, error', [
+    ('x', 'Se esperaba un cuerpo JSON'),
+    ('[]', 'Se esperaba un objeto'),
+    ('{"monto": 10}', 'Falta el nombre'),
+    ('{"nombre": "Luz", "color": "rojo"}', 'Campos desconocidos: color'),
+    ('{"nombre": "Luz", "monto": NaN}', 'Valor inválido para monto'),
+    ('{"nombre": "Luz", "monto": Infinity}', 'Valor inválido para monto'),
+    ('{"nombre": "Luz", "monto": -1}', 'Valor inválido para monto'),
+    ('{"nombre": "Luz", "monto": true}', 'Valor inválido para monto'),
+    ('{"nombre": "Luz", "dia_vencimiento": 32}', 'Valor inválido para dia_vencimiento'),
+    ('{"nombre": "Luz", "dia_vencimiento": Infinity}', 'Valor inválido para dia_vencimiento'),
+    ('{"nombre": "Luz", "es_unico": "false"}', 'Valor inválido para es_unico'),
+    ('{"nombre": 5}', 'Valor inválido para nombre'),
+    ('{"nombre": "Luz", "categoria_id": 999}', 'La categoría no existe'),
+])
+def test_servicio_invalido_es_400(api_cliente, db, cuerpo, error):
+    respuesta = api_cliente.post_crudo('/api/v1/servicios', cuerpo)
+
+    assert respuesta.status_code == 400
+    assert respuesta.get_json() == {'error': error}
+    assert db.execute('SELECT COUNT(*) FROM servicios').fetchone()[0] == 0
+
+
+def test_modificar_servicio_con_monto_infinito_es_400(api_cliente, servicio_id):
+    respuesta = api_cliente.open('PATCH', f'/api/v1/servicios/{servicio_id}',
+                                 data='{"monto": Infinity}', content_type='application/json')
+
+    assert respuesta.status_code == 400
+    assert api_cliente.open('GET', f'/api/v1/servicios/{servicio_id}').get_json()['monto'] == 1000
+
+
+@pytest.mark.parametrize('cuerpo', [
+    '{"servicio_id": %d, "monto": NaN}',
+    '{"servicio_id": %d, "monto": Infinity}',
+    '{"servicio_id": true, "monto": true}',
+    '{"pagos": [{"servicio_id": %d, "monto": 10}, {"servicio_id": %d, "monto": 0}]}',
+    '{"pagos": "todos"}',
+])
+def test_pago_invalido_es_400(api_cliente, db, servicio_id, cuerpo):
+    respuesta = api_cliente.post_crudo('/api/v1/pagos', cuerpo.replace('%d', str(servicio_id)))
+
+    assert respuesta.status_code == 400
+    assert set(respuesta.get_json()) == {'error'}
+    assert db.execute('SELECT COUNT(*) FROM pagos').fetchone()[0] == 0
+
+
+def test_pago_de_otro_servicio_es_400(api_cliente, db, servicio_id):
+    respuesta = api_cliente.post_crudo('/api/v1/pagos', json.dumps({'servicio_id': servicio_id + 1, 'monto': 10}))
+
+    assert respuesta.status_code == 400
+    assert respuesta.get_json() == {'error': 'Alguno de los servicios no existe'}
+
+
+def test_dashboard_es_json_valido_despues_de_pagar(api_cliente, servicio_id):
+    respuesta = api_cliente.post_crudo('/api/v1/pagos', json.dumps({'servicio_id': servicio_id, 'monto': 400}))
+    assert respuesta.status_code == 201
+    assert respuesta.get_json()['total'] == 400
+
+    respuesta = api_cliente.open('GET', '/api/v1/dashboard')
+    assert respuesta.status_code == 200
+    # json.loads estricto: sin NaN ni Infinity
+    datos = json.loads(respuesta.data, parse_constant=lambda constante: pytest.fail(constante))
+    assert datos['total_pagado'] == 400
+
+
+def test_respuesta_no_emite_nan(app):
+    with app.test_request_context('/api/v1/dashboard'):
+        with pytest.raises(ValueError):
+            api._respuesta({'total': float('inf')})
@@ -0,0 +1,61 @@
+"""
+Descarga de adjuntos (vistas/adjuntos.servir_adjunto)
+
+El ETag es el hash del contenido: una revalidación responde 304 y los
+pedidos con Range reciben solo el tramo pedido.
+"""
+
+import pytest
+
+PDF = b'%PDF-1.4\n' + bytes(range(256)) * 8
+
+
+@pytest.fixture
+def pago(registrar_pago):
+    respuesta, pago = registrar_pago(invoice=(PDF, 'comprobante.pdf'))
+    assert respuesta.status_code == 302
+    return pago
+
+
+def test_descarga_completa(cliente, pago):
+    respuesta = cliente.get(f'/factura/{pago}')
+
+    assert respuesta.status_code == 200
+    assert respuesta.data == PDF
+    assert respuesta.headers['Accept-Ranges'] == 'bytes'
+    assert respuesta.headers['ETag']
+    assert 'private' in respuesta.headers['Cache-Control']
+    assert 'no-cache' in respuesta.headers['Cache-Control']
+
+
+def test_if_none_match_responde_304(cliente, pago):
+    etag = cliente.get(f'/factura/{pago}').headers['ETag']
+
+    respuesta = cliente.get(f'/factura/{pago}', headers={'If-None-Match': etag})
+
+    assert respuesta.status_code == 304
+    assert respuesta.data == b''
+    assert respuesta.headers['ETag'] == etag
+
+
+def test_otro_etag_descarga_de_nuevo(cliente, pago):
+    respuesta = cliente.get(f'/factura/{pago}', headers={'If-None-Match': '"otro"'})
+
+    assert respuesta.status_code == 200
+    assert respuesta.data == PDF
+
+
+def test_range_responde_206(cliente, pago):
+    respuesta = cliente.get(f'/factura/{pago}', headers={'Range': 'bytes=0-9'})
+
+    assert respuesta.status_code == 206
+    assert respuesta.data == PDF[:10]
+    assert respuesta.headers['Content-Range'] == f'bytes 0-9/{len(PDF)}'
+    assert respuesta.headers['Content-Length'] == '10'
+
+
+def test_range_fuera_del_archivo_responde_416(cliente, pago):
+    respuesta = cliente.get(f'/factura/{pago}', headers={'Range': f'bytes={len(PDF) + 10}-'})
+
+    assert respuesta.status_code == 416
+    assert respuesta.headers['Content-Range'] == f'bytes */{len(PDF)}'
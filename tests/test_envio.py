@@ -0,0 +1,74 @@
+"""
+reminders.dispatch_reminders contra un servidor SMTP local (ver servidor_smtp.py)
+"""
+
+import smtplib
+
+import pytest
+
+import reminders
+from correo import Correo, Mensaje
+from servidor_smtp import ServidorSMTP
+
+
+def _jobs(*destinatarios):
+    return [{'message': Mensaje(f'Recordatorio {i}', [destinatario], body='Vence Luz')}
+            for i, destinatario in enumerate(destinatarios)]
+
+
+def test_envia_todo_con_sesiones_persistentes():
+    with ServidorSMTP() as servidor:
+        jobs = _jobs(*(f'usuario{i}@example.com' for i in range(6)))
+        sent, failed = reminders.dispatch_reminders(Correo(servidor.config()), jobs, concurrency=2, rate_limit=0)
+
+    assert failed == []
+    assert len(sent) == 6
+    assert sorted(servidor.destinatarios()) == sorted(f'usuario{i}@example.com' for i in range(6))
+    # Una sesión por worker, no una por mensaje
+    assert servidor.conexiones <= 2
+
+
+def test_destinatario_rechazado_no_corta_la_sesion():
+    with ServidorSMTP(rechazar='rechazar') as servidor:
+        jobs = _jobs('a@example.com', 'rechazar@example.com', 'b@example.com', 'c@example.com')
+        sent, failed = reminders.dispatch_reminders(Correo(servidor.config()), jobs, concurrency=1, rate_limit=0)
+
+    assert [job['message'].recipients for job, _ in failed] == [['rechazar@example.com']]
+    assert '550' in failed[0][1]
+    assert len(sent) == 3
+    assert servidor.destinatarios() == ['a@example.com', 'b@example.com', 'c@example.com']
+    assert servidor.conexiones == 1
+
+
+def test_reconecta_si_el_servidor_corta():
+    with ServidorSMTP(cortar_despues=2) as servidor:
+        jobs = _jobs(*(f'usuario{i}@example.com' for i in range(5)))
+        sent, failed = reminders.dispatch_reminders(Correo(servidor.config()), jobs, concurrency=1, rate_limit=0)
+
+    # El mensaje que encontró la conexión cortada falla (el outbox lo reintenta); el resto sale
+    assert len(failed) == 1
+    assert len(sent) == 4
+    assert servidor.conexiones == 2
+
+
+def test_servidor_caido_falla_cada_mensaje():
+    with ServidorSMTP() as servidor:
+        config = servidor.config()
+    # Ya no escucha nadie en ese puerto
+    sent, failed = reminders.dispatch_reminders(Correo(config), _jobs('a@example.com', 'b@example.com'),
+                                                concurrency=1, rate_limit=0)
+
+    assert sent == []
+    assert len(failed) == 2
+
+
+@pytest.mark.parametrize('error, perdida', [
+    (smtplib.SMTPServerDisconnected('cortó'), True),
+    (smtplib.SMTPResponseException(421, b'cerrando'), True),
+    (ConnectionResetError(), True),
+    (smtplib.SMTPRecipientsRefused({'a@example.com': (550, b'no')}), False),
+    (smtplib.SMTPDataError(554, b'spam'), False),
+    (smtplib.SMTPSenderRefused(553, b'no', 'test@example.com'), False),
+])
+def test_errores_de_conexion_y_de_mensaje(error, perdida):
+    assert reminders._connection_lost(error) is perdida
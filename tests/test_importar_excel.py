@@ -0,0 +1,93 @@
+"""
+Importación desde Excel (importar_excel.py)
+"""
+
+import os
+
+import pytest
+from openpyxl import Workbook
+
+import database
+import importar_excel
+import migrations
+
+
+@pytest.mark.parametrize('texto, monto', [
+    ('1.234', 1234),
+    ('12.345.678', 12345678),
+    ('1.234,56', 1234.56),
+    ('$ 1234.56', 1234.56),
+    ('12.5', 12.5),
+    ('0.500', 0.5),
+    ('1.23', 1.23),
+    ('1234', 1234),
+])
+def test_numero(texto, monto):
+    assert importar_excel._numero(texto) == monto
+
+
+def _planilla(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Servicios'
+    ws.append(['Servicio', 'Vencimiento', 'Monto', 'Medio de Pago'])
+    ws.append(['Luz', 10, '1.500', 'Débito'])
+    wb.save(path)
+    return path
+
+
+def test_dry_run_no_migra_ni_escribe(tmp_path):
+    path = str(tmp_path / 'vieja.db')
+    db = database.connect(path)
+    db.execute('CREATE TABLE usuarios (id INTEGER PRIMARY KEY, username TEXT, password TEXT)')
+    db.execute('''CREATE TABLE servicios (id INTEGER PRIMARY KEY, user_id INTEGER, nombre TEXT,
+                  dia_vencimiento INTEGER, monto REAL, medio_pago TEXT, activo INTEGER DEFAULT 1)''')
+    db.execute('''CREATE TABLE pagos (id INTEGER PRIMARY KEY, servicio_id INTEGER, user_id INTEGER,
+                  periodo TEXT, monto REAL, fecha_pago TEXT, metodo_pago TEXT)''')
+    db.commit()
+    db.close()
+    antes = os.path.getmtime(path), os.path.getsize(path)
+
+    excel = _planilla(str(tmp_path / 'planilla.xlsx'))
+    assert importar_excel.main([excel, '--usuario', 'ana', '--db', path, '--dry-run']) == 0
+
+    db = database.connect(path)
+    try:
+        assert migrations.get_version(db) == 0
+        assert db.execute('SELECT COUNT(*) FROM servicios').fetchone()[0] == 0
+    finally:
+        db.close()
+    assert (os.path.getmtime(path), os.path.getsize(path)) == antes
+
+
+def test_dry_run_sin_base_no_la_crea(tmp_path):
+    path = str(tmp_path / 'nueva.db')
+    excel = _planilla(str(tmp_path / 'planilla.xlsx'))
+
+    assert importar_excel.main([excel, '--usuario', 'ana', '--db', path, '--dry-run']) == 0
+    assert not os.path.exists(path)
+
+
+def test_prefiere_el_servicio_activo(db):
+    user_id = db.execute("INSERT INTO usuarios (username, password) VALUES ('ana', 'x')").lastrowid
+    db.execute("INSERT INTO servicios (user_id, nombre, monto, activo) VALUES (?, 'Luz', 900, 1)", (user_id,))
+    db.execute("INSERT INTO servicios (user_id, nombre, monto, activo) VALUES (?, 'Luz', 500, 0)", (user_id,))
+    db.commit()
+    activo = db.execute('SELECT id FROM servicios WHERE activo = 1').fetchone()[0]
+
+    datos = {
+        'servicios': [{'nombre': 'Luz', 'dia_vencimiento': None, 'monto': 1000.0, 'medio_pago': None}],
+        'pagos': [{'servicio': 'Luz', 'periodo': '2024-01', 'monto': 1000.0,
+                   'fecha_pago': '2024-01-10 00:00:00', 'metodo_pago': None}],
+        'errores': [],
+    }
+    plan = importar_excel.planificar(db, user_id, datos)
+    assert plan['servicios_nuevos'] == []
+    assert [(c['id'], c['cambios']) for c in plan['servicios_cambios']] == [(activo, {'monto': (900, 1000.0)})]
+
+    importar_excel.aplicar(db, user_id, plan)
+    assert db.execute('SELECT servicio_id FROM pagos').fetchall()[0][0] == activo
+
+    # Importar de nuevo no duplica el pago
+    plan = importar_excel.planificar(db, user_id, datos)
+    assert plan['pagos_nuevos'] == [] and plan['pagos_existentes'] == 1
@@ -0,0 +1,180 @@
+"""
+Outbox de recordatorios (reminder_outbox.py) con un transporte falso y un reloj controlado
+"""
+
+import smtplib
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import reminder_outbox
+
+# Día de ejecución: Luz vence el 10, tres días después
+HOY = date(2024, 3, 7)
+
+
+class Reloj:
+    """Reemplaza reminder_outbox.utcnow(); avanzar() mueve el tiempo"""
+
+    def __init__(self):
+        self.ahora = datetime(2024, 3, 7, 12, 0, 0)
+
+    def __call__(self):
+        return self.ahora.strftime('%Y-%m-%d %H:%M:%S')
+
+    def avanzar(self, segundos):
+        self.ahora += timedelta(seconds=segundos)
+
+
+class CorreoFalso:
+    """Transporte con la forma de correo.Correo que guarda los mensajes o falla a pedido"""
+
+    def __init__(self):
+        self.enviados = []
+        self.falla = None  # destinatario que el servidor rechaza
+
+    def connect(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def send(self, mensaje):
+        if self.falla in mensaje.recipients:
+            raise smtplib.SMTPRecipientsRefused({self.falla: (450, b'casilla llena')})
+        self.enviados.append(mensaje)
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(reminder_outbox, 'utcnow', reloj)
+    return reloj
+
+
+@pytest.fixture
+def correo():
+    return CorreoFalso()
+
+
+@pytest.fixture
+def servicio(db):
+    user_id = db.execute('''
+        INSERT INTO usuarios (username, password, email, recordatorios_email)
+        VALUES ('ana', 'x', 'ana@example.com', 1)
+    ''').lastrowid
+    servicio_id = db.execute('''
+        INSERT INTO servicios (user_id, nombre, dia_vencimiento, monto) VALUES (?, 'Luz', 10, 1000)
+    ''', (user_id,)).lastrowid
+    db.commit()
+    return servicio_id
+
+
+def _fila(db):
+    return db.execute('SELECT * FROM recordatorios_outbox').fetchone()
+
+
+def test_encolar_es_idempotente(db, servicio, reloj):
+    assert reminder_outbox.enqueue_reminders(db, HOY) == 1
+    assert reminder_outbox.enqueue_reminders(db, HOY) == 0
+
+    fila = _fila(db)
+    assert db.execute('SELECT COUNT(*) FROM recordatorios_outbox').fetchone()[0] == 1
+    assert fila['idempotency_key'] == reminder_outbox.idempotency_key(servicio, '2024-03', 3)
+    assert fila['estado'] == 'pendiente'
+    assert fila['proximo_intento'] == '2024-03-07 12:00:00'
+
+
+def test_envio_marca_enviado_y_no_repite(db, servicio, reloj, correo):
+    reminder_outbox.enqueue_reminders(db, HOY)
+
+    sent, failed = reminder_outbox.drain_outbox(correo)
+
+    assert (len(sent), failed) == (1, [])
+    assert correo.enviados[0].recipients == ['ana@example.com']
+    assert _fila(db)['estado'] == 'enviado'
+    assert _fila(db)['enviado_at'] == '2024-03-07 12:00:00'
+    # Ya figura en recordatorios_enviados: ni se vuelve a planificar ni a mandar
+    assert reminder_outbox.enqueue_reminders(db, HOY) == 0
+    assert reminder_outbox.drain_outbox(correo) == ([], [])
+    assert len(correo.enviados) == 1
+
+
+def test_lease_vencido_se_vuelve_a_tomar(db, servicio, reloj):
+    reminder_outbox.enqueue_reminders(db, HOY)
+
+    primera = reminder_outbox.claim_batch(db)
+    assert len(primera) == 1
+    assert _fila(db)['estado'] == 'enviando'
+    # Otro worker no la toma mientras dura el lease
+    assert reminder_outbox.claim_batch(db) == []
+
+    reloj.avanzar(reminder_outbox.OUTBOX_CONFIG['lease'] - 1)
+    assert reminder_outbox.claim_batch(db) == []
+
+    # El worker que la tenía se cayó: al vencer el lease la toma otro
+    reloj.avanzar(1)
+    segunda = reminder_outbox.claim_batch(db)
+    assert [fila['id'] for fila in segunda] == [primera[0]['id']]
+
+
+def test_reintentos_con_backoff_exponencial(db, servicio, reloj, correo, monkeypatch):
+    monkeypatch.setitem(reminder_outbox.OUTBOX_CONFIG, 'backoff_base', 60)
+    monkeypatch.setitem(reminder_outbox.OUTBOX_CONFIG, 'max_attempts', 5)
+    correo.falla = 'ana@example.com'
+    reminder_outbox.enqueue_reminders(db, HOY)
+
+    for intento, espera in enumerate((60, 120, 240), start=1):
+        sent, failed = reminder_outbox.drain_outbox(correo)
+        assert sent == []
+        assert len(failed) == 1 and failed[0][0]['retry']
+        fila = _fila(db)
+        assert (fila['estado'], fila['intentos']) == ('pendiente', intento)
+        assert '450' in fila['ultimo_error']
+        assert fila['proximo_intento'] == (reloj.ahora + timedelta(seconds=espera)).strftime('%Y-%m-%d %H:%M:%S')
+
+        # Antes de tiempo no se reintenta
+        reloj.avanzar(espera - 1)
+        assert reminder_outbox.drain_outbox(correo) == ([], [])
+        reloj.avanzar(1)
+
+    correo.falla = None
+    sent, failed = reminder_outbox.drain_outbox(correo)
+    assert (len(sent), failed) == (1, [])
+    assert _fila(db)['estado'] == 'enviado'
+
+
+def test_backoff_tiene_tope(monkeypatch):
+    monkeypatch.setitem(reminder_outbox.OUTBOX_CONFIG, 'backoff_base', 60)
+    monkeypatch.setitem(reminder_outbox.OUTBOX_CONFIG, 'backoff_max', 600)
+    assert [reminder_outbox.backoff_seconds(n) for n in range(1, 7)] == [60, 120, 240, 480, 600, 600]
+
+
+def test_fallido_al_agotar_intentos_y_revivir(db, servicio, reloj, correo, monkeypatch):
+    monkeypatch.setitem(reminder_outbox.OUTBOX_CONFIG, 'max_attempts', 2)
+    correo.falla = 'ana@example.com'
+    reminder_outbox.enqueue_reminders(db, HOY)
+
+    reminder_outbox.drain_outbox(correo)
+    reloj.avanzar(reminder_outbox.backoff_seconds(1))
+    sent, failed = reminder_outbox.drain_outbox(correo)
+
+    assert sent == []
+    assert failed[0][0]['retry'] is False
+    fila = _fila(db)
+    assert (fila['estado'], fila['intentos']) == ('fallido', 2)
+    # Fallido no se vuelve a tomar solo, por más tiempo que pase
+    reloj.avanzar(24 * 3600)
+    assert reminder_outbox.drain_outbox(correo) == ([], [])
+    assert reminder_outbox.outbox_stats(db) == {'fallido': 1}
+
+    # La próxima corrida programada lo revive con los intentos en cero
+    assert reminder_outbox.enqueue_reminders(db, HOY) == 1
+    fila = _fila(db)
+    assert (fila['estado'], fila['intentos']) == ('pendiente', 0)
+    correo.falla = None
+    sent, failed = reminder_outbox.drain_outbox(correo)
+    assert (len(sent), failed) == (1, [])
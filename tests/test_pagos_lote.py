@@ -0,0 +1,54 @@
+"""
+Registro de varios pagos a la vez (pagos_lote.py)
+"""
+
+import pytest
+
+import pagos_lote
+
+
+@pytest.mark.parametrize('pago', [
+    {'servicio_id': True, 'monto': 100},
+    {'servicio_id': 1, 'monto': True},
+    {'servicio_id': 1, 'monto': float('nan')},
+    {'servicio_id': 1, 'monto': float('inf')},
+    {'servicio_id': 1, 'monto': '-Infinity'},
+    {'servicio_id': 1, 'monto': 'NaN'},
+    {'servicio_id': 1, 'monto': 0},
+    {'servicio_id': 1, 'monto': -5},
+    {'servicio_id': 'uno', 'monto': 100},
+    {'servicio_id': float('inf'), 'monto': 100},
+    {'servicio_id': 1},
+    {'servicio_id': 1, 'monto': 100, 'metodo_pago': 5},
+])
+def test_entrada_invalida(pago):
+    with pytest.raises(pagos_lote.PagosInvalidos):
+        pagos_lote.entradas_desde_json([pago])
+
+
+def test_entrada_valida():
+    pagos = [{'servicio_id': '3', 'monto': '12.5', 'metodo_pago': ' Débito '}, {'servicio_id': 4, 'monto': 7}]
+    assert pagos_lote.entradas_desde_json({'pagos': pagos}) == [(3, 12.5, 'Débito'), (4, 7.0, None)]
+
+
+@pytest.mark.parametrize('cuerpo', [
+    '{"pagos": [{"servicio_id": %d, "monto": NaN}]}',
+    '{"pagos": [{"servicio_id": %d, "monto": Infinity}]}',
+    '{"pagos": [{"servicio_id": %d, "monto": 10}, {"servicio_id": true, "monto": true}]}',
+])
+def test_registrar_no_guarda_nada_si_un_pago_es_invalido(cliente, db, servicio_id, cuerpo):
+    respuesta = cliente.post('/pagos/registrar', data=cuerpo % servicio_id, content_type='application/json')
+
+    assert respuesta.status_code == 400
+    assert 'error' in respuesta.get_json()
+    assert db.execute('SELECT COUNT(*) FROM pagos').fetchone()[0] == 0
+
+
+def test_registrar_varios(cliente, db, servicio_id):
+    respuesta = cliente.post('/pagos/registrar', json={'pagos': [
+        {'servicio_id': servicio_id, 'monto': 10},
+        {'servicio_id': servicio_id, 'monto': 2.5, 'metodo_pago': 'Efectivo'},
+    ]})
+
+    assert respuesta.status_code == 201
+    assert db.execute('SELECT COUNT(*), SUM(monto) FROM pagos').fetchone()[:] == (2, 12.5)
@@ -0,0 +1,76 @@
+"""
+Caché de pronósticos (pronostico.obtener_estimados)
+
+Se actualiza al leer el dashboard: nunca tiene que confirmar una transacción
+que el llamador dejó abierta.
+"""
+
+from datetime import date
+
+import pytest
+
+import database
+import pronostico
+
+HOY = date(2024, 6, 15)
+
+
+@pytest.fixture
+def servicio(db):
+    user_id = db.execute("INSERT INTO usuarios (username, password) VALUES ('ana', 'x')").lastrowid
+    servicio_id = db.execute("INSERT INTO servicios (user_id, nombre) VALUES (?, 'Gas')", (user_id,)).lastrowid
+    db.executemany('INSERT INTO pagos (servicio_id, user_id, periodo, monto) VALUES (?, ?, ?, ?)', [
+        (servicio_id, user_id, periodo, monto)
+        for periodo, monto in (('2024-03', 100), ('2024-04', 120), ('2024-05', 110))
+    ])
+    db.commit()
+    return user_id, servicio_id
+
+
+def _guardados(db_path):
+    """Lo confirmado en la base, visto desde otra conexión"""
+    otra = database.connect(db_path)
+    try:
+        return otra.execute('SELECT servicio_id, estimado FROM pronosticos').fetchall()
+    finally:
+        otra.close()
+
+
+def test_guarda_el_pronostico(db, db_path, servicio):
+    user_id, servicio_id = servicio
+
+    estimados = pronostico.obtener_estimados(db, user_id, HOY)
+
+    assert set(estimados) == {servicio_id}
+    assert 100 < estimados[servicio_id] < 120
+    assert not db.in_transaction
+    assert [tuple(fila) for fila in _guardados(db_path)] == [(servicio_id, estimados[servicio_id])]
+
+
+def test_no_confirma_la_transaccion_del_llamador(db, db_path, servicio):
+    user_id, servicio_id = servicio
+    db.execute("UPDATE servicios SET nombre = 'Gas natural' WHERE id = ?", (servicio_id,))
+    assert db.in_transaction
+
+    estimados = pronostico.obtener_estimados(db, user_id, HOY)
+
+    assert servicio_id in estimados
+    assert db.in_transaction
+    assert _guardados(db_path) == []
+    db.rollback()
+    assert db.execute('SELECT nombre FROM servicios').fetchone()[0] == 'Gas'
+
+
+def test_recalcula_solo_lo_que_cambio(db, servicio):
+    user_id, servicio_id = servicio
+    primero = pronostico.obtener_estimados(db, user_id, HOY)
+
+    db.execute("UPDATE pronosticos SET estimado = 1 WHERE servicio_id = ?", (servicio_id,))
+    db.commit()
+    # Misma historia: sale de la caché
+    assert pronostico.obtener_estimados(db, user_id, HOY) == {servicio_id: 1}
+
+    db.execute('INSERT INTO pagos (servicio_id, user_id, periodo, monto) VALUES (?, ?, ?, ?)',
+               (servicio_id, user_id, '2024-05', 40))
+    db.commit()
+    assert pronostico.obtener_estimados(db, user_id, HOY)[servicio_id] != primero[servicio_id]
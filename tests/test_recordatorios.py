@@ -0,0 +1,129 @@
+"""
+Planificación de recordatorios en los bordes de mes (reminders.reminder_targets / plan_reminders)
+"""
+
+from datetime import date
+
+import pytest
+
+import reminders
+
+
+@pytest.mark.parametrize('dia, esperados', [
+    # Febrero sin bisiesto: el 28 cubre los vencimientos 28-31
+    (date(2023, 2, 25), [('2023-02', 28, 31, '2023-02-28', 3), ('2023-02', 25, 25, '2023-02-25', 0)]),
+    # Tres días después ya es marzo
+    (date(2023, 2, 26), [('2023-03', 1, 1, '2023-03-01', 3), ('2023-02', 26, 26, '2023-02-26', 0)]),
+    (date(2023, 2, 28), [('2023-03', 3, 3, '2023-03-03', 3), ('2023-02', 28, 31, '2023-02-28', 0)]),
+    # Bisiesto: el 28 es un día más y el 29 cubre 29-31
+    (date(2024, 2, 26), [('2024-02', 29, 31, '2024-02-29', 3), ('2024-02', 26, 26, '2024-02-26', 0)]),
+    (date(2024, 2, 28), [('2024-03', 2, 2, '2024-03-02', 3), ('2024-02', 28, 28, '2024-02-28', 0)]),
+    (date(2024, 2, 29), [('2024-03', 3, 3, '2024-03-03', 3), ('2024-02', 29, 31, '2024-02-29', 0)]),
+    # Abril tiene 30: el 31 vence el 30
+    (date(2024, 4, 27), [('2024-04', 30, 31, '2024-04-30', 3), ('2024-04', 27, 27, '2024-04-27', 0)]),
+    (date(2024, 4, 30), [('2024-05', 3, 3, '2024-05-03', 3), ('2024-04', 30, 31, '2024-04-30', 0)]),
+    # Cambio de año
+    (date(2024, 12, 29), [('2025-01', 1, 1, '2025-01-01', 3), ('2024-12', 29, 29, '2024-12-29', 0)]),
+    (date(2024, 12, 31), [('2025-01', 3, 3, '2025-01-03', 3), ('2024-12', 31, 31, '2024-12-31', 0)]),
+])
+def test_objetivos_en_bordes_de_mes(dia, esperados):
+    objetivos = reminders.reminder_targets(dia, dia, (3, 0))
+    assert objetivos == [(dia.isoformat(),) + esperado for esperado in esperados]
+
+
+@pytest.fixture
+def servicios(db):
+    """Servicios de un usuario con recordatorios por email, por día de vencimiento"""
+    user_id = db.execute('''
+        INSERT INTO usuarios (username, password, email, recordatorios_email)
+        VALUES ('ana', 'x', 'ana@example.com', 1)
+    ''').lastrowid
+    ids = {}
+    for dia in (1, 2, 15, 28, 29, 30, 31):
+        ids[dia] = db.execute('''
+            INSERT INTO servicios (user_id, nombre, dia_vencimiento, monto) VALUES (?, ?, ?, 1000)
+        ''', (user_id, f'Vence el {dia}', dia)).lastrowid
+    db.commit()
+    return ids
+
+
+def _plan(db, servicios, desde, hasta=None, offsets=(3, 0)):
+    dia_de = {servicio_id: dia for dia, servicio_id in servicios.items()}
+    return sorted(
+        (fila['fecha_aviso'], fila['dias_anticipacion'], dia_de[fila['servicio_id']],
+         fila['periodo'], fila['fecha_vencimiento'])
+        for fila in reminders.plan_reminders(desde, hasta or desde, offsets, db)
+    )
+
+
+def test_fin_de_febrero_incluye_dias_29_a_31(db, servicios):
+    assert _plan(db, servicios, date(2023, 2, 25)) == [
+        ('2023-02-25', 3, 28, '2023-02', '2023-02-28'),
+        ('2023-02-25', 3, 29, '2023-02', '2023-02-28'),
+        ('2023-02-25', 3, 30, '2023-02', '2023-02-28'),
+        ('2023-02-25', 3, 31, '2023-02', '2023-02-28'),
+    ]
+
+
+def test_bisiesto_el_28_no_cubre_el_29(db, servicios):
+    assert _plan(db, servicios, date(2024, 2, 28), offsets=(0,)) == [
+        ('2024-02-28', 0, 28, '2024-02', '2024-02-28'),
+    ]
+    assert _plan(db, servicios, date(2024, 2, 29), offsets=(0,)) == [
+        ('2024-02-29', 0, 29, '2024-02', '2024-02-29'),
+        ('2024-02-29', 0, 30, '2024-02', '2024-02-29'),
+        ('2024-02-29', 0, 31, '2024-02', '2024-02-29'),
+    ]
+
+
+def test_vencimientos_del_mes_siguiente(db, servicios):
+    # Del 29 de diciembre al 1 de enero: el período es el del vencimiento, no el del aviso
+    assert _plan(db, servicios, date(2024, 12, 29), offsets=(3,)) == [
+        ('2024-12-29', 3, 1, '2025-01', '2025-01-01'),
+    ]
+    assert _plan(db, servicios, date(2024, 4, 30), offsets=(3,)) == []
+    assert _plan(db, servicios, date(2024, 4, 29), offsets=(3,)) == [
+        ('2024-04-29', 3, 2, '2024-05', '2024-05-02'),
+    ]
+
+
+def test_ventana_de_recuperacion(db, servicios):
+    # Corrida atrasada que cubre del 25/2 al 1/3: cada aviso con su fecha y período
+    assert _plan(db, servicios, date(2023, 2, 25), date(2023, 3, 1)) == [
+        ('2023-02-25', 3, 28, '2023-02', '2023-02-28'),
+        ('2023-02-25', 3, 29, '2023-02', '2023-02-28'),
+        ('2023-02-25', 3, 30, '2023-02', '2023-02-28'),
+        ('2023-02-25', 3, 31, '2023-02', '2023-02-28'),
+        ('2023-02-26', 3, 1, '2023-03', '2023-03-01'),
+        ('2023-02-27', 3, 2, '2023-03', '2023-03-02'),
+        ('2023-02-28', 0, 28, '2023-02', '2023-02-28'),
+        ('2023-02-28', 0, 29, '2023-02', '2023-02-28'),
+        ('2023-02-28', 0, 30, '2023-02', '2023-02-28'),
+        ('2023-02-28', 0, 31, '2023-02', '2023-02-28'),
+        ('2023-03-01', 0, 1, '2023-03', '2023-03-01'),
+    ]
+
+
+def test_ventana_omite_enviados_pagados_y_omitidos(db, servicios):
+    user_id = db.execute("SELECT id FROM usuarios WHERE username = 'ana'").fetchone()[0]
+    # Ya avisado con 3 días, pagado completo y omitido en su período
+    db.execute('''
+        INSERT INTO recordatorios_enviados (servicio_id, user_id, periodo, dias_anticipacion)
+        VALUES (?, ?, '2023-03', 3)
+    ''', (servicios[1], user_id))
+    db.execute('''
+        INSERT INTO pagos (servicio_id, user_id, periodo, monto) VALUES (?, ?, '2023-02', 1000)
+    ''', (servicios[28], user_id))
+    db.execute('''
+        INSERT INTO servicios_omitidos (servicio_id, user_id, periodo) VALUES (?, ?, '2023-02')
+    ''', (servicios[31], user_id))
+    db.commit()
+
+    assert _plan(db, servicios, date(2023, 2, 25), date(2023, 3, 1)) == [
+        ('2023-02-25', 3, 29, '2023-02', '2023-02-28'),
+        ('2023-02-25', 3, 30, '2023-02', '2023-02-28'),
+        ('2023-02-27', 3, 2, '2023-03', '2023-03-02'),
+        ('2023-02-28', 0, 29, '2023-02', '2023-02-28'),
+        ('2023-02-28', 0, 30, '2023-02', '2023-02-28'),
+        ('2023-03-01', 0, 1, '2023-03', '2023-03-01'),
+    ]
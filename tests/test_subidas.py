@@ -0,0 +1,91 @@
+"""
+Validación de archivos mientras se reciben (subidas.py)
+
+Al registrar un pago un archivo inválido se descarta y el pago queda; en las
+rutas que solo suben un adjunto el request se corta con 413/415.
+"""
+
+import io
+import os
+
+import subidas
+
+PDF = b'%PDF-1.4\n' + b'x' * 1024
+
+
+def _flashes(cliente):
+    with cliente.session_transaction() as sesion:
+        return [mensaje for _, mensaje in sesion.get('_flashes', [])]
+
+
+def _temporales(uploads):
+    tmp = os.path.join(uploads, 'tmp')
+    return os.listdir(tmp) if os.path.isdir(tmp) else []
+
+
+def test_extension_falsa_se_descarta_y_el_pago_queda(cliente, db, uploads, registrar_pago):
+    respuesta, pago = registrar_pago(invoice=(b'MZ\x90\x00 no es un pdf', 'comprobante.pdf'))
+
+    assert respuesta.status_code == 302
+    fila = db.execute('SELECT monto, invoice_path FROM pagos WHERE id = ?', (pago,)).fetchone()
+    assert fila['monto'] == 500
+    assert fila['invoice_path'] is None
+    assert db.execute('SELECT COUNT(*) FROM adjuntos').fetchone()[0] == 0
+    assert _temporales(uploads) == []
+    assert any(m.startswith('Pago registrado pero no se guardó el comprobante') for m in _flashes(cliente))
+
+
+def test_extension_no_permitida_se_descarta_y_el_pago_queda(cliente, db, registrar_pago):
+    _, pago = registrar_pago(bill=(PDF, 'factura.exe'), invoice=(PDF, 'comprobante.pdf'))
+
+    fila = db.execute('SELECT invoice_path, bill_path FROM pagos WHERE id = ?', (pago,)).fetchone()
+    assert fila['invoice_path'] is not None
+    assert fila['bill_path'] is None
+    assert any(m.startswith('Pago registrado pero no se guardó la factura') for m in _flashes(cliente))
+
+
+def test_archivo_grande_al_registrar_se_descarta(cliente, db, registrar_pago):
+    grande = b'%PDF-1.4\n' + b'x' * subidas.MAX_FILE_SIZE
+    _, pago = registrar_pago(invoice=(grande, 'comprobante.pdf'))
+
+    assert db.execute('SELECT invoice_path FROM pagos WHERE id = ?', (pago,)).fetchone()[0] is None
+    assert db.execute('SELECT COUNT(*) FROM pagos').fetchone()[0] == 1
+
+
+def test_request_demasiado_grande_es_413(cliente, db, servicio_id):
+    limite = subidas.ENDPOINTS_SUBIDA['dashboard.registrar_pago'] * subidas.MAX_FILE_SIZE + subidas.MARGEN_FORMULARIO
+    respuesta = cliente.post(f'/pago/registrar/{servicio_id}', data={
+        'monto': '500',
+        'invoice': (io.BytesIO(b'%PDF-' + b'x' * limite), 'comprobante.pdf'),
+    }, content_type='multipart/form-data')
+
+    # subida_rechazada convierte el 413 en un redirect con el mensaje
+    assert respuesta.status_code == 302
+    assert any('supera el máximo' in m for m in _flashes(cliente))
+    assert db.execute('SELECT COUNT(*) FROM pagos').fetchone()[0] == 0
+
+
+def test_subir_archivo_grande_es_413(cliente, db, uploads, registrar_pago):
+    """Un archivo de más de MAX_FILE_SIZE corta la subida aunque el request entre en el límite"""
+    _, pago = registrar_pago()
+    grande = b'%PDF-1.4\n' + b'x' * subidas.MAX_FILE_SIZE
+    respuesta = cliente.post(f'/factura/subir/{pago}', data={
+        'invoice': (io.BytesIO(grande), 'comprobante.pdf'),
+    }, content_type='multipart/form-data')
+
+    assert respuesta.status_code == 302
+    assert any('supera el máximo' in m for m in _flashes(cliente))
+    assert db.execute('SELECT invoice_path FROM pagos WHERE id = ?', (pago,)).fetchone()[0] is None
+    assert _temporales(uploads) == []
+
+
+def test_subir_extension_falsa_es_415(cliente, db, uploads, registrar_pago):
+    _, pago = registrar_pago()
+    respuesta = cliente.post(f'/factura/bill/subir/{pago}', data={
+        'bill': (io.BytesIO(b'<html>no es una imagen</html>'), 'factura.png'),
+    }, content_type='multipart/form-data')
+
+    assert respuesta.status_code == 302
+    assert any(m.startswith('Archivo inválido') for m in _flashes(cliente))
+    assert db.execute('SELECT bill_path FROM pagos WHERE id = ?', (pago,)).fetchone()[0] is None
+    assert _temporales(uploads) == []
@@ -0,0 +1,11 @@
+"""
+Vistas HTML de la aplicación, agrupadas en blueprints
+
+create_app() (ver app.py) registra BLUEPRINTS en este orden. Los endpoints
+llevan el nombre del blueprint como prefijo: url_for('dashboard.dashboard'),
+url_for('historial.exportar_csv'), etc.
+"""
+
+from vistas import adjuntos, admin, auth, categorias, configuracion, dashboard, historial
+
+BLUEPRINTS = (auth.bp, dashboard.bp, adjuntos.bp, historial.bp, categorias.bp, configuracion.bp, admin.bp)
@@ -0,0 +1,393 @@
+"""
+Facturas y comprobantes de los pagos: subida, descarga, miniaturas y borrado
+
+Los archivos se guardan una vez por contenido en UPLOADS_PATH/blobs (ver
+almacenamiento.py) y se reciben en streaming (ver subidas.py).
+"""
+
+import hashlib
+import mimetypes
+import os
+from datetime import datetime, timezone
+from flask import Blueprint, Response, current_app, flash, redirect, request, send_file, session, url_for
+from werkzeug.http import is_resource_modified
+from werkzeug.utils import secure_filename
+import miniaturas
+import subidas
+from database import get_db
+from vistas.auth import login_required
+
+bp = Blueprint('adjuntos', __name__)
+
+
+def almacenamiento():
+    """Almacenamiento de la app actual (ver app.create_app)"""
+    return current_app.extensions['adjuntos']
+
+def allowed_file(filename):
+    """Check if file has an allowed extension"""
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in subidas.ALLOWED_EXTENSIONS
+
+def guardar_adjunto(db, file, payment_id, prefix):
+    """
+    Store an uploaded file as the payment's bill or invoice
+
+    prefix is 'bill' (factura) or 'invoice' (comprobante). Runs inside a
+    savepoint so a failed upload leaves no reference behind; the caller commits.
+    """
+    adjuntos = almacenamiento()
+    filename = secure_filename(file.filename)
+    db.execute('SAVEPOINT adjunto')
+    try:
+        if isinstance(file.stream, subidas.ArchivoSubido):
+            # Already on disk and hashed while it was received
+            clave, file_size = file.stream.confirmar(adjuntos, db)
+        else:
+            clave, file_size = adjuntos.guardar(db, file.stream)
+        db.execute(f'''
+            UPDATE pagos
+            SET {prefix}_filename = ?,
+                {prefix}_path = ?,
+                {prefix}_size = ?,
+                {prefix}_uploaded_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (filename, clave, file_size, payment_id))
+        db.execute('RELEASE adjunto')
+    except Exception:
+        db.execute('ROLLBACK TO adjunto')
+        db.execute('RELEASE adjunto')
+        raise
+
+    # Preview for the history page, built in the background
+    miniaturas.encolar(adjuntos.ruta(clave))
+
+def eliminar_adjunto(db, payment_id, prefix, clave):
+    """Drop the payment's bill or invoice, deleting the file if no other payment uses it"""
+    adjuntos = almacenamiento()
+    try:
+        claves = adjuntos.liberar(db, clave)
+        db.execute(f'''
+            UPDATE pagos
+            SET {prefix}_filename = NULL,
+                {prefix}_path = NULL,
+                {prefix}_size = NULL,
+                {prefix}_uploaded_at = NULL
+            WHERE id = ?
+        ''', (payment_id,))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    # Only once the row no longer points at it (see Almacenamiento.borrar)
+    adjuntos.borrar(db, claves)
+
+def servir_adjunto(pago, prefix):
+    """
+    Response with the payment's bill or invoice, or None if the file is missing
+
+    pago must include {prefix}_path, _filename, _size and _uploaded_at. The
+    ETag (content hash) and Last-Modified (upload time) come from the row, so
+    revalidations get a 304 without touching the disk. Range requests are
+    honored; with ADJUNTOS_X_ACCEL or USE_X_SENDFILE the proxy sends the bytes.
+    """
+    clave = pago[f'{prefix}_path']
+    filename = pago[f'{prefix}_filename']
+    x_accel = current_app.config['ADJUNTOS_X_ACCEL']
+
+    if os.path.isabs(clave):
+        # Legacy absolute path: no hash in the name
+        etag = hashlib.sha256(f"{clave}:{pago[f'{prefix}_size']}".encode()).hexdigest()
+    else:
+        etag = clave.rsplit('/', 1)[-1]
+
+    last_modified = None
+    if pago[f'{prefix}_uploaded_at']:
+        last_modified = datetime.strptime(pago[f'{prefix}_uploaded_at'][:19], '%Y-%m-%d %H:%M:%S')
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = Response(status=304)
+    elif x_accel and not os.path.isabs(clave):
+        # nginx answers Range and serves the file from the internal location
+        response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = x_accel.rstrip('/') + '/' + clave
+        response.headers.set('Content-Disposition', 'inline', filename=filename)
+    else:
+        ruta = almacenamiento().ruta(clave)
+        if not os.path.exists(ruta):
+            return None
+        response = send_file(
+            ruta,
+            as_attachment=False,
+            download_name=filename,
+            conditional=True,
+            etag=etag,
+            last_modified=last_modified
+        )
+        response.accept_ranges = 'bytes'
+
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+# Subidas cortadas antes de terminar de leerlas (ver subidas.py)
+@bp.app_errorhandler(413)
+@bp.app_errorhandler(415)
+def subida_rechazada(error):
+    if request.endpoint not in subidas.ENDPOINTS_SUBIDA:
+        return error
+    if error.code == 413:
+        flash(f'El archivo supera el máximo de {subidas.MAX_FILE_SIZE // (1024 * 1024)}MB', 'error')
+    else:
+        flash('Archivo inválido. Solo se permiten PDF, JPG, PNG', 'error')
+    destino = 'dashboard.dashboard' if request.endpoint == 'dashboard.registrar_pago' else 'historial.historial'
+    return redirect(url_for(destino))
+
+@bp.route('/factura/<int:payment_id>')
+@login_required
+def download_invoice(payment_id):
+    """Serve invoice file for a payment"""
+    db = get_db()
+    pago = db.execute('''
+        SELECT invoice_path, invoice_filename, invoice_size, invoice_uploaded_at, user_id
+        FROM pagos
+        WHERE id = ?
+    ''', (payment_id,)).fetchone()
+
+    if not pago:
+        flash('Pago no encontrado', 'error')
+        return redirect(url_for('historial.historial'))
+
+    # Security check: ensure user owns this payment
+    if pago['user_id'] != session['user_id']:
+        flash('Acceso denegado', 'error')
+        return redirect(url_for('historial.historial'))
+
+    if not pago['invoice_path']:
+        flash('Este pago no tiene factura adjunta', 'warning')
+        return redirect(url_for('historial.historial'))
+
+    # Serve file
+    response = servir_adjunto(pago, 'invoice')
+    if response is None:
+        flash('Archivo no encontrado', 'error')
+        return redirect(url_for('historial.historial'))
+    return response
+
+@bp.route('/adjunto/<tipo>/<int:payment_id>/miniatura')
+@login_required
+def miniatura_adjunto(tipo, payment_id):
+    """Serve the preview of a payment's bill or invoice (generated on a miss)"""
+    if tipo not in ('bill', 'invoice'):
+        return '', 404
+
+    db = get_db()
+    pago = db.execute(f'''
+        SELECT {tipo}_path as ruta, user_id
+        FROM pagos
+        WHERE id = ?
+    ''', (payment_id,)).fetchone()
+
+    if not pago or pago['user_id'] != session['user_id'] or not pago['ruta']:
+        return '', 404
+
+    ruta = miniaturas.obtener(almacenamiento().ruta(pago['ruta']))
+    if ruta is None:
+        return '', 404
+
+    # The page links it with ?v=<upload time>: a new attachment gets a new URL
+    response = send_file(ruta, mimetype='image/png', conditional=True, max_age=7 * 24 * 3600)
+    response.cache_control.private = True
+    response.cache_control.public = False
+    return response
+
+@bp.route('/factura/subir/<int:payment_id>', methods=['POST'])
+@login_required
+def upload_invoice(payment_id):
+    """Upload invoice to existing payment"""
+    db = get_db()
+    pago = db.execute('''
+        SELECT user_id, invoice_path
+        FROM pagos
+        WHERE id = ?
+    ''', (payment_id,)).fetchone()
+
+    if not pago:
+        flash('Pago no encontrado', 'error')
+        return redirect(url_for('historial.historial'))
+
+    # Security check
+    if pago['user_id'] != session['user_id']:
+        flash('Acceso denegado', 'error')
+        return redirect(url_for('historial.historial'))
+
+    if pago['invoice_path']:
+        flash('Este pago ya tiene una factura', 'warning')
+        return redirect(url_for('historial.historial'))
+
+    # Handle file upload
+    if 'invoice' in request.files:
+        file = request.files['invoice']
+        if file and file.filename and allowed_file(file.filename):
+            try:
+                guardar_adjunto(db, file, payment_id, 'invoice')
+                db.commit()
+
+                flash('Factura subida exitosamente', 'success')
+            except Exception as e:
+                print(f"Error uploading invoice: {e}")
+                flash('Error al subir la factura', 'error')
+        else:
+            flash('Archivo inválido. Solo se permiten PDF, JPG, PNG', 'error')
+    else:
+        flash('No se seleccionó ningún archivo', 'error')
+
+    return redirect(url_for('historial.historial'))
+
+@bp.route('/factura/eliminar/<int:payment_id>', methods=['POST'])
+@login_required
+def delete_invoice(payment_id):
+    """Delete invoice from a payment"""
+    db = get_db()
+    pago = db.execute('''
+        SELECT user_id, invoice_path
+        FROM pagos
+        WHERE id = ?
+    ''', (payment_id,)).fetchone()
+
+    if not pago:
+        flash('Pago no encontrado', 'error')
+        return redirect(url_for('historial.historial'))
+
+    # Security check
+    if pago['user_id'] != session['user_id']:
+        flash('Acceso denegado', 'error')
+        return redirect(url_for('historial.historial'))
+
+    if not pago['invoice_path']:
+        flash('Este pago no tiene factura', 'warning')
+        return redirect(url_for('historial.historial'))
+
+    # Delete file (if no other payment uses it) and clear invoice data
+    try:
+        eliminar_adjunto(db, payment_id, 'invoice', pago['invoice_path'])
+    except Exception as e:
+        print(f"Error deleting file: {e}")
+        flash('Error al eliminar el archivo', 'error')
+        return redirect(url_for('historial.historial'))
+
+    flash('Comprobante eliminado exitosamente', 'success')
+    return redirect(url_for('historial.historial'))
+
+@bp.route('/factura/bill/subir/<int:payment_id>', methods=['POST'])
+@login_required
+def upload_bill(payment_id):
+    """Upload bill/invoice to a payment"""
+    db = get_db()
+    pago = db.execute('''
+        SELECT user_id, bill_path
+        FROM pagos
+        WHERE id = ?
+    ''', (payment_id,)).fetchone()
+
+    if not pago:
+        flash('Pago no encontrado', 'error')
+        return redirect(url_for('historial.historial'))
+
+    # Security check
+    if pago['user_id'] != session['user_id']:
+        flash('Acceso denegado', 'error')
+        return redirect(url_for('historial.historial'))
+
+    if pago['bill_path']:
+        flash('Este pago ya tiene una factura', 'warning')
+        return redirect(url_for('historial.historial'))
+
+    # Handle file upload
+    if 'bill' in request.files:
+        file = request.files['bill']
+        if file and file.filename and allowed_file(file.filename):
+            try:
+                guardar_adjunto(db, file, payment_id, 'bill')
+                db.commit()
+
+                flash('Factura subida exitosamente', 'success')
+            except Exception as e:
+                print(f"Error uploading bill: {e}")
+                flash('Error al subir la factura', 'error')
+        else:
+            flash('Archivo inválido. Solo se permiten PDF, JPG, PNG', 'error')
+    else:
+        flash('No se seleccionó ningún archivo', 'error')
+
+    return redirect(url_for('historial.historial'))
+
+@bp.route('/factura/bill/<int:payment_id>')
+@login_required
+def download_bill(payment_id):
+    """Serve bill/invoice file for a payment"""
+    db = get_db()
+    pago = db.execute('''
+        SELECT bill_path, bill_filename, bill_size, bill_uploaded_at, user_id
+        FROM pagos
+        WHERE id = ?
+    ''', (payment_id,)).fetchone()
+
+    if not pago:
+        flash('Pago no encontrado', 'error')
+        return redirect(url_for('historial.historial'))
+
+    # Security check: ensure user owns this payment
+    if pago['user_id'] != session['user_id']:
+        flash('Acceso denegado', 'error')
+        return redirect(url_for('historial.historial'))
+
+    if not pago['bill_path']:
+        flash('Este pago no tiene factura adjunta', 'warning')
+        return redirect(url_for('historial.historial'))
+
+    # Serve file
+    response = servir_adjunto(pago, 'bill')
+    if response is None:
+        flash('Archivo no encontrado', 'error')
+        return redirect(url_for('historial.historial'))
+    return response
+
+@bp.route('/factura/bill/eliminar/<int:payment_id>', methods=['POST'])
+@login_required
+def delete_bill(payment_id):
+    """Delete bill/invoice from a payment"""
+    db = get_db()
+    pago = db.execute('''
+        SELECT user_id, bill_path
+        FROM pagos
+        WHERE id = ?
+    ''', (payment_id,)).fetchone()
+
+    if not pago:
+        flash('Pago no encontrado', 'error')
+        return redirect(url_for('historial.historial'))
+
+    # Security check
+    if pago['user_id'] != session['user_id']:
+        flash('Acceso denegado', 'error')
+        return redirect(url_for('historial.historial'))
+
+    if not pago['bill_path']:
+        flash('Este pago no tiene factura', 'warning')
+        return redirect(url_for('historial.historial'))
+
+    # Delete file (if no other payment uses it) and clear bill data
+    try:
+        eliminar_adjunto(db, payment_id, 'bill', pago['bill_path'])
+    except Exception as e:
+        print(f"Error deleting bill file: {e}")
+        flash('Error al eliminar el archivo', 'error')
+        return redirect(url_for('historial.historial'))
+
+    flash('Factura eliminada exitosamente', 'success')
+    return redirect(url_for('historial.historial'))
@@ -0,0 +1,43 @@
+"""
+Métricas de SQL del proceso (ver instrumentacion.py), solo para administradores
+
+Los administradores son los usuarios listados en ADMIN_USUARIOS (variable
+de entorno, separados por coma). Para el resto la ruta no existe (404).
+"""
+
+from datetime import datetime
+from functools import wraps
+from flask import Blueprint, abort, current_app, flash, jsonify, redirect, render_template, request, session, url_for
+import instrumentacion
+from vistas.auth import login_required
+
+bp = Blueprint('admin', __name__, url_prefix='/admin')
+
+
+def es_admin():
+    return session.get('username') in current_app.config['ADMIN_USUARIOS']
+
+def admin_required(f):
+    @wraps(f)
+    @login_required
+    def decorated_function(*args, **kwargs):
+        if not es_admin():
+            abort(404)
+        return f(*args, **kwargs)
+    return decorated_function
+
+@bp.route('/metrics')
+@admin_required
+def metricas():
+    datos = instrumentacion.metricas()
+    if request.args.get('formato') == 'json':
+        return jsonify(datos)
+    return render_template('admin_metricas.html', datos=datos,
+                           desde=datetime.fromtimestamp(datos['desde']))
+
+@bp.route('/metrics/reiniciar', methods=['POST'])
+@admin_required
+def reiniciar_metricas():
+    instrumentacion.reiniciar()
+    flash('Métricas reiniciadas', 'info')
+    return redirect(url_for('admin.metricas'))
@@ -0,0 +1,79 @@
+"""
+Registro, inicio y cierre de sesión
+"""
+
+from functools import wraps
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from werkzeug.security import generate_password_hash, check_password_hash
+from database import get_db
+
+bp = Blueprint('auth', __name__)
+
+
+# Decorator para rutas protegidas
+def login_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            flash('Por favor iniciá sesión primero', 'warning')
+            return redirect(url_for('auth.login'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+@bp.route('/')
+def index():
+    if 'user_id' in session:
+        return redirect(url_for('dashboard.dashboard'))
+    return redirect(url_for('auth.login'))
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        email = request.form.get('email')
+        telefono = request.form.get('telefono')
+
+        db = get_db()
+
+        # Verificar si el usuario ya existe
+        user = db.execute('SELECT id FROM usuarios WHERE username = ?', (username,)).fetchone()
+        if user:
+            flash('El usuario ya existe', 'danger')
+            return redirect(url_for('auth.register'))
+
+        # Crear usuario
+        hashed_password = generate_password_hash(password)
+        db.execute('INSERT INTO usuarios (username, password, email, telefono) VALUES (?, ?, ?, ?)',
+                   (username, hashed_password, email, telefono))
+        db.commit()
+
+        flash('Usuario creado exitosamente. Por favor iniciá sesión.', 'success')
+        return redirect(url_for('auth.login'))
+
+    return render_template('register.html')
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+
+        db = get_db()
+        user = db.execute('SELECT * FROM usuarios WHERE username = ?', (username,)).fetchone()
+
+        if user and check_password_hash(user['password'], password):
+            session['user_id'] = user['id']
+            session['username'] = user['username']
+            flash(f'Bienvenido {username}!', 'success')
+            return redirect(url_for('dashboard.dashboard'))
+        else:
+            flash('Usuario o contraseña incorrectos', 'danger')
+
+    return render_template('login.html')
+
+@bp.route('/logout')
+def logout():
+    session.clear()
+    flash('Sesión cerrada exitosamente', 'info')
+    return redirect(url_for('auth.login'))
@@ -0,0 +1,91 @@
+"""
+Categorías de servicios (compartidas por todos los usuarios)
+"""
+
+import sqlite3
+from flask import Blueprint, flash, redirect, render_template, request, url_for
+import eventos
+from database import get_db
+from vistas.auth import login_required
+
+bp = Blueprint('categorias', __name__)
+
+
+@bp.route('/categorias')
+@login_required
+def categorias():
+    db = get_db()
+    categorias = db.execute('SELECT * FROM categorias ORDER BY nombre').fetchall()
+    return render_template('categorias.html', categorias=categorias)
+
+@bp.route('/categoria/nueva', methods=['GET', 'POST'])
+@login_required
+def nueva_categoria():
+    if request.method == 'POST':
+        nombre = request.form['nombre']
+        color = request.form.get('color', '#6c757d')
+        icono = request.form.get('icono', 'bi-tag')
+
+        db = get_db()
+        try:
+            db.execute('''
+                INSERT INTO categorias (nombre, color, icono)
+                VALUES (?, ?, ?)
+            ''', (nombre, color, icono))
+            db.commit()
+            flash(f'Categoría "{nombre}" creada exitosamente', 'success')
+        except sqlite3.IntegrityError:
+            flash('Ya existe una categoría con ese nombre', 'danger')
+
+        return redirect(url_for('categorias.categorias'))
+
+    return render_template('nueva_categoria.html')
+
+@bp.route('/categoria/<int:id>/editar', methods=['GET', 'POST'])
+@login_required
+def editar_categoria(id):
+    db = get_db()
+
+    if request.method == 'POST':
+        nombre = request.form['nombre']
+        color = request.form.get('color', '#6c757d')
+        icono = request.form.get('icono', 'bi-tag')
+
+        try:
+            db.execute('''
+                UPDATE categorias
+                SET nombre = ?, color = ?, icono = ?
+                WHERE id = ?
+            ''', (nombre, color, icono, id))
+            db.commit()
+            eventos.emitir(eventos.CATEGORIAS_MODIFICADAS, db=db)
+            flash('Categoría actualizada exitosamente', 'success')
+        except sqlite3.IntegrityError:
+            flash('Ya existe una categoría con ese nombre', 'danger')
+
+        return redirect(url_for('categorias.categorias'))
+
+    categoria = db.execute('SELECT * FROM categorias WHERE id = ?', (id,)).fetchone()
+
+    if not categoria:
+        flash('Categoría no encontrada', 'danger')
+        return redirect(url_for('categorias.categorias'))
+
+    return render_template('editar_categoria.html', categoria=categoria)
+
+@bp.route('/categoria/<int:id>/eliminar', methods=['POST'])
+@login_required
+def eliminar_categoria(id):
+    db = get_db()
+
+    # Check if any services use this category
+    servicios = db.execute('SELECT COUNT(*) as count FROM servicios WHERE categoria_id = ?', (id,)).fetchone()
+
+    if servicios['count'] > 0:
+        flash(f'No se puede eliminar: hay {servicios["count"]} servicio(s) usando esta categoría', 'danger')
+    else:
+        db.execute('DELETE FROM categorias WHERE id = ?', (id,))
+        db.commit()
+        flash('Categoría eliminada', 'info')
+
+    return redirect(url_for('categorias.categorias'))
@@ -0,0 +1,104 @@
+"""
+Configuración del usuario: datos de contacto, recordatorios y tokens de la API
+"""
+
+from flask import Blueprint, flash, redirect, render_template, request, session, url_for
+import api
+from database import get_db
+from vistas.auth import login_required
+
+bp = Blueprint('configuracion', __name__)
+
+
+@bp.route('/configuracion', methods=['GET', 'POST'])
+@login_required
+def configuracion():
+    if request.method == 'POST':
+        email = request.form.get('email')
+        telefono = request.form.get('telefono')
+        # Checkbox returns 'on' if checked, None if unchecked
+        recordatorios_email = 1 if request.form.get('recordatorios_email') == 'on' else 0
+        recordatorios_modo = request.form.get('recordatorios_modo')
+        if recordatorios_modo not in ('individual', 'resumen'):
+            recordatorios_modo = 'individual'
+
+        db = get_db()
+        db.execute('''
+            UPDATE usuarios
+            SET email = ?, telefono = ?, recordatorios_email = ?, recordatorios_modo = ?
+            WHERE id = ?
+        ''', (email, telefono, recordatorios_email, recordatorios_modo, session['user_id']))
+        db.commit()
+
+        flash('Configuración actualizada', 'success')
+        return redirect(url_for('configuracion.configuracion'))
+
+    db = get_db()
+    user = db.execute('SELECT * FROM usuarios WHERE id = ?', (session['user_id'],)).fetchone()
+
+    return render_template('configuracion.html', user=user,
+                           tokens=api.listar_tokens(db, session['user_id']))
+
+@bp.route('/configuracion/tokens', methods=['POST'])
+@login_required
+def crear_token_api():
+    db = get_db()
+    nombre = request.form.get('nombre', '').strip() or 'Token sin nombre'
+    token = api.crear_token(db, session['user_id'], nombre)
+    user = db.execute('SELECT * FROM usuarios WHERE id = ?', (session['user_id'],)).fetchone()
+
+    # Se muestra una sola vez y nunca pasa por la sesión (flash va en la cookie)
+    return render_template('configuracion.html', user=user,
+                           tokens=api.listar_tokens(db, session['user_id']),
+                           nuevo_token=token, nuevo_token_nombre=nombre)
+
+@bp.route('/configuracion/tokens/<int:token_id>/revocar', methods=['POST'])
+@login_required
+def revocar_token_api(token_id):
+    api.revocar_token(get_db(), session['user_id'], token_id)
+    flash('Token revocado', 'info')
+    return redirect(url_for('configuracion.configuracion'))
+
+@bp.route('/test_reminders')
+@login_required
+def test_reminders():
+    """
+    Test route to manually trigger email reminders
+    Only for testing purposes - shows what reminders would be sent
+    """
+    try:
+        from email_config import init_mail, validate_email_config
+        from reminders import check_and_send_reminders
+
+        # Validate email config
+        is_valid, message = validate_email_config()
+        if not is_valid:
+            flash(f'Error de configuración: {message}', 'danger')
+            return redirect(url_for('dashboard.dashboard'))
+
+        # Initialize mail
+        mail = init_mail()
+
+        # Run reminders
+        results = check_and_send_reminders(mail)
+
+        # Show results
+        if results['total_sent'] > 0:
+            flash(f'✓ {results["total_sent"]} recordatorios enviados exitosamente', 'success')
+            if results['details']['3_days']['sent'] > 0:
+                flash(f'  • {results["details"]["3_days"]["sent"]} recordatorios de 3 días antes', 'info')
+            if results['details']['due_today']['sent'] > 0:
+                flash(f'  • {results["details"]["due_today"]["sent"]} recordatorios de día de vencimiento', 'info')
+            if results['details']['digest']['sent'] > 0:
+                flash(f'  • {results["details"]["digest"]["sent"]} resúmenes diarios', 'info')
+        else:
+            flash('No hay servicios que necesiten recordatorios en este momento', 'info')
+
+        if results['errors']:
+            for error in results['errors']:
+                flash(f'Error enviando recordatorio para {error["service"]}: {error["error"]}', 'warning')
+
+    except Exception as e:
+        flash(f'Error ejecutando recordatorios: {str(e)}', 'danger')
+
+    return redirect(url_for('dashboard.dashboard'))
@@ -0,0 +1,268 @@
+"""
+Dashboard del mes: servicios, omisiones y registro de pagos
+"""
+
+import sqlite3
+from datetime import datetime
+from flask import (Blueprint, current_app, flash, jsonify, make_response, redirect,
+                   render_template, request, session, url_for)
+import eventos
+import formato
+import pagos_lote
+import subidas
+from dashboard_data import obtener_dashboard_cacheado
+from database import get_db
+from vistas.adjuntos import allowed_file, guardar_adjunto
+from vistas.auth import login_required
+
+bp = Blueprint('dashboard', __name__)
+
+
+@bp.route('/dashboard')
+@login_required
+def dashboard():
+    db = get_db()
+    user_id = session['user_id']
+
+    # Obtener filtros
+    categoria_filter = request.args.get('categoria_id', type=int)
+    medio_pago_filter = request.args.get('medio_pago')
+
+    # Servicios, pagos del mes, omisiones, totales y medios de pago
+    # (desde memoria mientras no cambien los datos del usuario ni el día)
+    datos = obtener_dashboard_cacheado(db, user_id,
+                                       categoria_id=categoria_filter,
+                                       medio_pago=medio_pago_filter)
+
+    # Obtener lista de categorías para el filtro
+    categorias = db.execute('SELECT * FROM categorias ORDER BY nombre').fetchall()
+
+    response = make_response(render_template('dashboard.html',
+                         servicios=datos['servicios'],
+                         total_mes=datos['total_mes'],
+                         total_pagado=datos['total_pagado'],
+                         pendiente=datos['pendiente'],
+                         categorias=categorias,
+                         medios_pago=datos['medios_pago'],
+                         categoria_filter=categoria_filter,
+                         medio_pago_filter=medio_pago_filter))
+
+    # ETag del HTML: si el navegador ya tiene esta misma página responde 304.
+    # Los mensajes flash forman parte del HTML, así que nunca se pierden.
+    if current_app.config['DASHBOARD_ETAG']:
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.add_etag()
+        response.make_conditional(request)
+    return response
+
+@bp.route('/servicio/nuevo', methods=['GET', 'POST'])
+@login_required
+def nuevo_servicio():
+    if request.method == 'POST':
+        nombre = request.form['nombre']
+        dia_vencimiento = request.form.get('dia_vencimiento')
+        monto = request.form.get('monto')
+        medio_pago = request.form.get('medio_pago')
+        categoria_id = request.form.get('categoria_id')
+        es_unico = 1 if request.form.get('es_unico') else 0
+
+        db = get_db()
+        db.execute('''
+            INSERT INTO servicios (user_id, nombre, dia_vencimiento, monto, medio_pago, categoria_id, es_unico)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (session['user_id'], nombre,
+              int(dia_vencimiento) if dia_vencimiento else None,
+              float(monto) if monto else None,
+              medio_pago,
+              int(categoria_id) if categoria_id else None,
+              es_unico))
+        db.commit()
+        eventos.emitir(eventos.SERVICIOS_MODIFICADOS, db=db, user_id=session['user_id'])
+
+        flash(f'Servicio "{nombre}" agregado exitosamente', 'success')
+        return redirect(url_for('dashboard.dashboard'))
+
+    db = get_db()
+    categorias = db.execute('SELECT * FROM categorias ORDER BY nombre').fetchall()
+
+    return render_template('nuevo_servicio.html', categorias=categorias)
+
+@bp.route('/servicio/<int:id>/editar', methods=['GET', 'POST'])
+@login_required
+def editar_servicio(id):
+    db = get_db()
+
+    if request.method == 'POST':
+        nombre = request.form['nombre']
+        dia_vencimiento = request.form.get('dia_vencimiento')
+        monto = request.form.get('monto')
+        medio_pago = request.form.get('medio_pago')
+        categoria_id = request.form.get('categoria_id')
+        es_unico = 1 if request.form.get('es_unico') else 0
+
+        db.execute('''
+            UPDATE servicios
+            SET nombre = ?, dia_vencimiento = ?, monto = ?, medio_pago = ?, categoria_id = ?, es_unico = ?
+            WHERE id = ? AND user_id = ?
+        ''', (nombre,
+              int(dia_vencimiento) if dia_vencimiento else None,
+              float(monto) if monto else None,
+              medio_pago,
+              int(categoria_id) if categoria_id else None,
+              es_unico,
+              id, session['user_id']))
+        db.commit()
+        eventos.emitir(eventos.SERVICIOS_MODIFICADOS, db=db, user_id=session['user_id'])
+
+        flash(f'Servicio actualizado exitosamente', 'success')
+        return redirect(url_for('dashboard.dashboard'))
+
+    servicio = db.execute('SELECT * FROM servicios WHERE id = ? AND user_id = ?',
+                          (id, session['user_id'])).fetchone()
+    categorias = db.execute('SELECT * FROM categorias ORDER BY nombre').fetchall()
+
+    if not servicio:
+        flash('Servicio no encontrado', 'danger')
+        return redirect(url_for('dashboard.dashboard'))
+
+    return render_template('editar_servicio.html', servicio=servicio, categorias=categorias)
+
+@bp.route('/servicio/<int:id>/eliminar', methods=['POST'])
+@login_required
+def eliminar_servicio(id):
+    db = get_db()
+    db.execute('UPDATE servicios SET activo = 0 WHERE id = ? AND user_id = ?',
+               (id, session['user_id']))
+    db.commit()
+    eventos.emitir(eventos.SERVICIOS_MODIFICADOS, db=db, user_id=session['user_id'])
+
+    flash('Servicio eliminado', 'info')
+    return redirect(url_for('dashboard.dashboard'))
+
+@bp.route('/servicio/<int:id>/omitir', methods=['POST'])
+@login_required
+def omitir_servicio(id):
+    db = get_db()
+    periodo_actual = datetime.now().strftime('%Y-%m')
+    user_id = session['user_id']
+
+    try:
+        db.execute('''
+            INSERT INTO servicios_omitidos (servicio_id, user_id, periodo)
+            VALUES (?, ?, ?)
+        ''', (id, user_id, periodo_actual))
+        db.commit()
+        eventos.emitir(eventos.SERVICIOS_MODIFICADOS, db=db, user_id=user_id)
+        flash('Servicio omitido para este mes', 'success')
+    except sqlite3.IntegrityError:
+        flash('El servicio ya está omitido para este mes', 'warning')
+
+    return redirect(url_for('dashboard.dashboard'))
+
+@bp.route('/servicio/<int:id>/reactivar', methods=['POST'])
+@login_required
+def reactivar_servicio(id):
+    db = get_db()
+    periodo_actual = datetime.now().strftime('%Y-%m')
+
+    db.execute('''
+        DELETE FROM servicios_omitidos
+        WHERE servicio_id = ? AND periodo = ?
+    ''', (id, periodo_actual))
+    db.commit()
+    eventos.emitir(eventos.SERVICIOS_MODIFICADOS, db=db, user_id=session['user_id'])
+
+    flash('Servicio reactivado para este mes', 'success')
+    return redirect(url_for('dashboard.dashboard'))
+
+@bp.route('/pago/registrar/<int:servicio_id>', methods=['POST'])
+@login_required
+def registrar_pago(servicio_id):
+    monto = request.form.get('monto')
+    metodo_pago = request.form.get('metodo_pago')
+    periodo = datetime.now().strftime('%Y-%m')
+    user_id = session['user_id']
+
+    db = get_db()
+
+    # Registrar el pago - obtener el ID del pago insertado
+    cursor = db.execute('''
+        INSERT INTO pagos (servicio_id, user_id, periodo, monto, metodo_pago)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (servicio_id, user_id, periodo, float(monto), metodo_pago))
+
+    payment_id = cursor.lastrowid
+
+    # Handle invoice upload if present
+    if 'invoice' in request.files:
+        file = request.files['invoice']
+        if file and file.filename and subidas.rechazo(file):
+            # Rejected while it streamed in (see subidas.py); the payment is kept
+            flash(f'Pago registrado pero no se guardó el comprobante: {subidas.rechazo(file)}', 'warning')
+        elif file and file.filename and allowed_file(file.filename):
+            try:
+                guardar_adjunto(db, file, payment_id, 'invoice')
+            except Exception as e:
+                # Log error but don't fail the payment
+                print(f"Error uploading invoice: {e}")
+                flash('Pago registrado pero hubo un error al subir el comprobante', 'warning')
+
+    # Handle bill upload if present
+    if 'bill' in request.files:
+        file = request.files['bill']
+        if file and file.filename and subidas.rechazo(file):
+            # Rejected while it streamed in (see subidas.py); the payment is kept
+            flash(f'Pago registrado pero no se guardó la factura: {subidas.rechazo(file)}', 'warning')
+        elif file and file.filename and allowed_file(file.filename):
+            try:
+                guardar_adjunto(db, file, payment_id, 'bill')
+            except Exception as e:
+                # Log error but don't fail the payment
+                print(f"Error uploading bill: {e}")
+                flash('Pago registrado pero hubo un error al subir la factura', 'warning')
+
+    # Verificar si es un servicio único (one-time)
+    servicio = db.execute('SELECT es_unico FROM servicios WHERE id = ?', (servicio_id,)).fetchone()
+
+    if servicio and servicio['es_unico']:
+        # Desactivar el servicio automáticamente
+        db.execute('UPDATE servicios SET activo = 0 WHERE id = ?', (servicio_id,))
+        db.commit()
+        flash('Pago registrado y servicio único marcado como completado', 'success')
+    else:
+        db.commit()
+        flash('Pago registrado exitosamente', 'success')
+
+    eventos.emitir(eventos.PAGOS_MODIFICADOS, db=db, user_id=user_id)
+
+    return redirect(url_for('dashboard.dashboard'))
+
+@bp.route('/pagos/registrar', methods=['POST'])
+@login_required
+def registrar_pagos():
+    """Register several payments at once (dashboard checkboxes or a JSON body)"""
+    user_id = session['user_id']
+    db = get_db()
+
+    try:
+        if request.is_json:
+            entradas = pagos_lote.entradas_desde_json(request.get_json(silent=True))
+        else:
+            entradas = pagos_lote.entradas_desde_form(request.form)
+        resultado = pagos_lote.registrar_pagos(db, user_id, entradas)
+    except pagos_lote.PagosInvalidos as e:
+        if request.is_json:
+            return jsonify({'error': str(e)}), 400
+        flash(str(e), 'error')
+        return redirect(url_for('dashboard.dashboard'))
+
+    eventos.emitir(eventos.PAGOS_MODIFICADOS, db=db, user_id=user_id)
+
+    if request.is_json:
+        return jsonify(resultado), 201
+
+    mensaje = f"{resultado['cantidad']} pagos registrados por {formato.monto(resultado['total'])}"
+    if resultado['completados']:
+        mensaje += f" ({len(resultado['completados'])} servicios únicos completados)"
+    flash(mensaje, 'success')
+    return redirect(url_for('dashboard.dashboard'))
@@ -0,0 +1,126 @@
+"""
+Historial de pagos, análisis por mes y exportación a Excel/CSV
+"""
+
+from datetime import date, datetime
+from flask import Blueprint, Response, flash, redirect, render_template, request, send_file, session, stream_with_context, url_for
+import analisis
+import exportacion
+import historial_data
+import miniaturas
+from database import get_db
+from vistas.auth import login_required
+
+bp = Blueprint('historial', __name__)
+
+
+@bp.route('/historial')
+@login_required
+def historial():
+    db = get_db()
+    user_id = session['user_id']
+
+    # Obtener filtros de la URL
+    servicio_filter = request.args.get('servicio_id', type=int)
+    periodo_filter = request.args.get('periodo')
+    categoria_filter = request.args.get('categoria_id', type=int)
+    metodo_pago_filter = request.args.get('metodo_pago')
+
+    filtros = {
+        'servicio_id': servicio_filter,
+        'periodo': periodo_filter,
+        'categoria_id': categoria_filter,
+        'metodo_pago': metodo_pago_filter
+    }
+    pagina = historial_data.obtener_historial(db, user_id, filtros, request.args.get('cursor'))
+    opciones = historial_data.opciones_filtro(db, user_id)
+
+    # Obtener lista de categorías para el filtro
+    categorias = db.execute('SELECT * FROM categorias ORDER BY nombre').fetchall()
+
+    return render_template('historial.html',
+                          pagos=pagina['pagos'],
+                          servicios=opciones['servicios'],
+                          periodos=opciones['periodos'],
+                          categorias=categorias,
+                          metodos_pago=opciones['metodos_pago'],
+                          servicio_filter=servicio_filter,
+                          periodo_filter=periodo_filter,
+                          categoria_filter=categoria_filter,
+                          metodo_pago_filter=metodo_pago_filter,
+                          total_pagos=pagina['total'],
+                          cantidad_pagos=pagina['cantidad'],
+                          filtros={k: v for k, v in filtros.items() if v},
+                          cursor=request.args.get('cursor'),
+                          siguiente=pagina['siguiente'],
+                          miniaturas=miniaturas.disponible())
+
+@bp.route('/analisis')
+@login_required
+def analisis_gastos():
+    """Totales por mes, categoría, servicio y medio de pago, con el pronóstico del mes"""
+    periodos = request.args.get('periodos', analisis.PERIODOS_DEFECTO, type=int)
+    if periodos not in analisis.OPCIONES_PERIODOS:
+        periodos = analisis.PERIODOS_DEFECTO
+
+    datos = analisis.obtener_analisis_cacheado(get_db(), session['user_id'], periodos)
+
+    return render_template('analisis.html',
+                          datos=datos,
+                          periodos=periodos,
+                          opciones_periodos=analisis.OPCIONES_PERIODOS)
+
+def rango_exportacion():
+    """Lee ?desde=YYYY-MM-DD&hasta=YYYY-MM-DD (ambos opcionales); ValueError si son inválidos"""
+    desde = request.args.get('desde')
+    hasta = request.args.get('hasta')
+    return (
+        date.fromisoformat(desde) if desde else None,
+        date.fromisoformat(hasta) if hasta else None
+    )
+
+@bp.route('/exportar/excel')
+@login_required
+def exportar_excel():
+    try:
+        desde, hasta = rango_exportacion()
+    except ValueError:
+        flash('Rango de fechas inválido para exportar', 'danger')
+        return redirect(url_for('dashboard.dashboard'))
+
+    db = get_db()
+    user_id = session['user_id']
+
+    # Hoja "Gastos" con el estado del mes y hoja "Pagos" con el historial del rango
+    archivo = exportacion.escribir_excel([
+        ('Gastos', exportacion.ENCABEZADOS_ESTADO, exportacion.filas_estado(db, user_id)),
+        ('Pagos', exportacion.ENCABEZADOS_PAGOS, exportacion.filas_pagos(db, user_id, desde, hasta)),
+    ])
+
+    fecha = datetime.now().strftime('%Y-%m-%d')
+
+    return send_file(
+        archivo,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        as_attachment=True,
+        download_name=f'billetera_mata_galan_{fecha}.xlsx'
+    )
+
+@bp.route('/exportar/csv')
+@login_required
+def exportar_csv():
+    try:
+        desde, hasta = rango_exportacion()
+    except ValueError:
+        flash('Rango de fechas inválido para exportar', 'danger')
+        return redirect(url_for('dashboard.dashboard'))
+
+    filas = exportacion.filas_pagos(get_db(), session['user_id'], desde, hasta)
+    fecha = datetime.now().strftime('%Y-%m-%d')
+
+    # stream_with_context mantiene el request (y su conexión) vivo mientras se envía
+    return Response(
+        stream_with_context(exportacion.generar_csv(exportacion.ENCABEZADOS_PAGOS, filas)),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename=billetera_mata_galan_pagos_{fecha}.csv'}
+    )
@@ -13,5 +13,6 @@ if project_home not in sys.path:
 os.environ['SECRET_KEY'] = 'CHANGE_THIS_TO_A_RANDOM_SECRET_KEY'
 os.environ['DATABASE_PATH'] = '/home/YOUR_USERNAME/gastos_app/database/gastos.db'
 
-# Import Flask app
-from app import app as application
+# Create Flask app (applies pending migrations)
+from app import create_app
+application = create_app()